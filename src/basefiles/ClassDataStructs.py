@@ -9,36 +9,106 @@
 #
 # @author lukasl93
 
+import numpy as np
 
-## Dataformat Class for 2D Data Tuple - currently unused
+## Dataformat Class for 2D graph data\n
+# The x and y values are stored in two contiguous float64 NumPy arrays
+# instead of one ClassData2D object per point.
 class ClassGraphData(object):
     ## Constructor
-    def __init__(self):
-        self.xquant = 'f'
-        self.yquant = "S_{mn}"
-        self.xunit = 'GHz'
-        self.yunit = 'dB'
-        self.data = []
+    # @param xdata Array or list with the x values
+    # @param ydata Array or list with the y values,
+    # same length as @parname{xdata}
+    # @param xquant Symbol of the x quantity - String default 'f'
+    # @param yquant Symbol of the y quantity - String default 'S_{mn}'
+    # @param xunit Unit of the x quantity - String default 'GHz'
+    # @param yunit Unit of the y quantity - String default 'dB'
+    def __init__(self, xdata=[], ydata=[], xquant='f', yquant="S_{mn}",
+                 xunit='GHz', yunit='dB'):
+        self.xquant = xquant
+        self.yquant = yquant
+        self.xunit = xunit
+        self.yunit = yunit
+        if len(xdata) != len(ydata):
+            raise ValueError('Variables xdata and ydata must have the same length!')
+        # no copy is made if float64 arrays are passed
+        self.xdata = np.asarray(xdata, dtype=np.float64)
+        self.ydata = np.asarray(ydata, dtype=np.float64)
 
+    ## Create a copy of the graph properties with other data arrays
+    # @param xdata Array with the x values
+    # @param ydata Array with the y values
+    # @return New ClassGraphData object
+    def __newdata(self, xdata, ydata):
+        return ClassGraphData(xdata, ydata, self.xquant, self.yquant,
+                              self.xunit, self.yunit)
 
     ## Add data in the ClassData2D format
-    # @param data Format is data.xvalue,data.yvalue
+    # @param data List of ClassData2D points
     # subkeys must be float or int types
     def addData2D(self, data):
-        if type(data[0]) is [ClassData2D]:
-            self.data.append(data)
-        else:
-            raise TypeError('Variable data must be a list of type ClassData2D!')
+        for point in data:
+            if not type(point) is ClassData2D:
+                raise TypeError('Variable data must be a list of type ClassData2D!')
+        self.addDataList([point.xvalue for point in data],
+                         [point.yvalue for point in data])
 
     ## Add list of data in the ClassData2D format
     # @param xdata Must be float or int type
     # @param ydata Must be float or int type
     def addDataList(self, xdata, ydata):
-        if len(xdata) == len(ydata):
-            data = []
-            for i in range(0, len(xdata), 1):
-                data.append(ClassData2D(xdata[i], xdata[i]))
-            self.data.append(data)
+        if len(xdata) != len(ydata):
+            raise ValueError('Variables xdata and ydata must have the same length!')
+        self.xdata = np.concatenate(
+            (self.xdata, np.asarray(xdata, dtype=np.float64)))
+        self.ydata = np.concatenate(
+            (self.ydata, np.asarray(ydata, dtype=np.float64)))
+
+    ## Definition of addition of ClassGraphData and Number
+    # to add the number to all y values.
+    # @param other Numerical value to be added to the y values
+    # @return New ClassGraphData object sharing the x values
+    def __add__(self, other):
+        return self.__newdata(self.xdata, self.ydata + other)
+
+    ## Number of points
+    def __len__(self):
+        return len(self.xdata)
+
+    ## Index or slice the graph data
+    # @param key Integer index or slice
+    # @return ClassData2D point for an index,
+    # ClassGraphData view for a slice
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.__newdata(self.xdata[key], self.ydata[key])
+        return ClassData2D(float(self.xdata[key]), float(self.ydata[key]))
+
+    ## Iterate over all points as ClassData2D objects,
+    # to be usable wherever a list of ClassData2D is expected
+    def __iter__(self):
+        for xval, yval in zip(self.xdata.tolist(), self.ydata.tolist()):
+            yield ClassData2D(xval, yval)
+
+    ## Return the point with the minimum y value
+    # @return ClassData2D point
+    def get_min(self):
+        return self[int(np.argmin(self.ydata))]
+
+    ## Return the point with the maximum y value
+    # @return ClassData2D point
+    def get_max(self):
+        return self[int(np.argmax(self.ydata))]
+
+    ## Print data stored in ClassGraphData Object as tuple list,
+    # when print(ClassGraphDataobject) is called.
+    def __str__(self):
+        return str(list(zip(self.xdata.tolist(), self.ydata.tolist())))
+
+    ## If a list of ClassGraphData objects should be printed
+    # call __str()__ for each element in the list
+    def __repr__(self):
+        return self.__str__()
 
 
 ## Dataformat Class for 2D Data Tuple
@@ -87,7 +157,8 @@ class ClassRequirements(object):
     # String default '0.63500,0.07800,0.18400'
     # @param reqscale Scaling factor in y direction
     # for the requirements type indicator
-    # @param data List of ClassData2D points defining the requirement
+    # @param data List of ClassData2D points or ClassGraphData
+    # defining the requirement
     def __init__(self, legend='Requirements', reqtype='', style='- . .',
                  color='0.63500,0.07800,0.18400', reqscale=1, data=[]):
         # Graph parameters
@@ -101,21 +172,23 @@ class ClassRequirements(object):
             self.reqtype = ''
             print('Unnown Type of Requirement given! Must be one of max,min,is or empty')
         # Graphdata array
-        if not data:    # if list is empty
-                self.data = []
+        if type(data) is ClassGraphData:
+            self.data = data
         else:
-            if type(data[0]) is ClassData2D:
-                self.data = data
-            else:
-                raise TypeError('Variable data must be of type list(ClassData2D)!')
+            self.data = ClassGraphData()
+            if data:    # if list is not empty
+                if type(data[0]) is ClassData2D:
+                    self.data.addData2D(data)
+                else:
+                    raise TypeError('Variable data must be of type list(ClassData2D) or ClassGraphData!')
 
     ## Definition of addition of ClassRequirements and Number
     # to add the number to all yvalues of the data array.
     # @ param other Numerical value to add to y data values
     # @return Warning: Does not return an object copy,
-    # but a copy of the objects data list plus @parname{other}
+    # but a ClassGraphData copy of the objects data plus @parname{other}
     def __add__(self, other):
-        return [x + other for x in self.data]
+        return self.data + other
 
     ## Print all properties of ClassRequirements Object,
     # when print(ClassRequirements) is called.
@@ -124,7 +197,7 @@ class ClassRequirements(object):
     Legendentry: \'%s\',
     Graphcolor: \'%s\',
     Linestyle: \'%s\',
-    Scale: \'%i\',
+    Scale: \'%s\',
     Type: \'%s\',
     Curvedata: %s''' % (self.legendentry, self.graphcolor,
                         self.linestyle, self.reqscale, self.reqtype,
@@ -145,7 +218,7 @@ class ClassRequirements(object):
     # @param point ClassData2D object
     def add_datapoint(self, point):
         if type(point) is ClassData2D:
-            self.data.append(point)
+            self.data.addData2D([point])
         else:
             raise TypeError('Variable point must be of type ClassData2D!')
 
@@ -153,8 +226,8 @@ class ClassRequirements(object):
     # @param datatuples Tuplelist in format [(xval1,yval1),(xval2,yval2),...]
     # with type number xval und yval
     def set_comp_data(self, datatuples):
-        for date in datatuples:
-            self.add_datapoint(ClassData2D(date[0], date[1]))
+        self.data.addDataList([date[0] for date in datatuples],
+                              [date[1] for date in datatuples])
 
     ## Mostly just a linear requirement graph is needed with two endpoints.\n
     # This is a convenience function to configure a linear requirement.
@@ -166,12 +239,10 @@ class ClassRequirements(object):
     # Type number\n
     # You don't have to pass @parname{uppery} if its the same as @parname{lowery}
     def set_data(self, lowerx, upperx, lowery, uppery=None):
-        self.data = []
         # you don't have to pass uppery if its the same as lowery
         if uppery is None:
             uppery = lowery
-        self.data.append(ClassData2D(lowerx, lowery))
-        self.data.append(ClassData2D(upperx, uppery))
+        self.data = ClassGraphData([lowerx, upperx], [lowery, uppery])
 
     ## Return the offset direction tuple of the requirement type indicator
     # @return Offset direction tuple for this requirementtypes
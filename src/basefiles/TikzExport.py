@@ -13,12 +13,31 @@
 #
 # @author lukasl93
 
-import time
 import os
+import hashlib
+import tempfile
 from collections import OrderedDict
 from string import Template
-from ClassDataStructs import ClassData2D, ClassRequirements
-from tikzhelpers import get_path_data_string
+from ClassDataStructs import ClassData2D, ClassGraphData, ClassRequirements
+from tikzhelpers import get_path_data_string, openOutputFile, \
+    format_table_data, get_header_date, getOutputPath, numberformat
+from profiler import profiled
+
+
+## Compile a Template into a format string with named fields for the %
+# operator, placeholders become %(name)s and literal % signs are escaped
+# @param template string.Template object
+# @return Format string, rendered by format % {name: value}
+def compile_template(template):
+    def convert(match):
+        name = match.group('named') or match.group('braced')
+        if name is not None:
+            return '%(' + name + ')s'
+        if match.group('escaped') is not None:
+            return match.group('escaped')
+        raise ValueError('Invalid placeholder in template: ' + match.group())
+    return template.pattern.sub(convert,
+                                template.template.replace('%', '%%'))
 
 
 ## @class ClassTikzExport
@@ -59,6 +78,9 @@ class ClassTikzExport(object):
     ## Tikz data separator (tabulator in Latex)
     __tikzsep = '\t'
 
+    ## Number of data rows formatted and written to the output at once
+    __tikzchunk = 65536
+
     ## Tikz graph styles (continuous, doted, line dot,...)
     __tikzgs = OrderedDict([
         ('', 'solid'),
@@ -152,13 +174,31 @@ ${addoptions}
 ]""")
 
     ## Plot template for Tikzpicture
-    __tikzplot = Template(r"""\addplot [color=$plotcolor,style=$linestyle,$addopt]
-table[row sep=crcr]{%""")
+    __tikzplot = Template(r"\addplot [color=$plotcolor,style=$linestyle,$addopt]")
+
+    ## Inline table template for Tikzpicture, followed by the data rows
+    __tikztable = r"table[row sep=crcr]{%"
 
     ## Data template for Tikzpicture
     __tikzdata = Template(r"""$data
 };""")
 
+    ## Table template for Tikzpicture reading the data from a file
+    __tikzdatafile = Template(r"table {$datafile};")
+
+    ## Boundary template of a band, an invisible named graph
+    __tikzbandpath = Template(r"\addplot [draw=none,forget plot,name path=$pathname]")
+
+    ## Band template for Tikzpicture, the area between two named graphs
+    __tikzband = Template(r"""\addplot [fill=$plotcolor,fill opacity=$opacity,area legend,$addopt]
+fill between[
+of=$pathname1 and $pathname2,
+];""")
+
+    ## Annotation template for Tikzpicture, a marked point with a pin label
+    __tikzannotation = Template(r"""\node[circle,fill=$plotcolor,inner sep=1.5pt,pin={[pin edge={$plotcolor},font=\footnotesize]$pinangle:{$text}}]
+at (axis cs:$xvalue,$yvalue) {};""")
+
     ## Legend template for Tikzpicture
     __tikzlegend = Template(r"\addlegendentry{$label$desc};")
 
@@ -176,11 +216,68 @@ fill between[
 of=$reqname1 and $reqname2,
 ];""")
 
+
+    ## Templates compiled once to format strings, which render several
+    # times faster than Template.substitute (see compile_template)
+    __fmtheader = compile_template(__tikzheader)
+    __fmtcolor = compile_template(__tikzcolor)
+    __fmtconfig = compile_template(__tikzconfig)
+    __fmtplot = compile_template(__tikzplot)
+    __fmtdatafile = compile_template(__tikzdatafile)
+    __fmtbandpath = compile_template(__tikzbandpath)
+    __fmtband = compile_template(__tikzband)
+    __fmtannotation = compile_template(__tikzannotation)
+    __fmtlegend = compile_template(__tikzlegend)
+    __fmtreq = compile_template(__tikzreq)
+
+    ## End of an inline data section
+    __tikzdataend = __tikzdata.substitute({'data': ''})
+
+    ## Compiled legend label Templates indexed by their template string
+    __fmtlabels = {}
     # Class Functions --------------------------------------------------------
 
     ## Constructor
-    def __init__(self):
-        self.__fulltikzstring = ''
+    # @param stream Open file or io buffer to write all sections to
+    # as soon as they are added - default None collects the sections
+    # until createTikzFile is called
+    # @param numformat printf style format of the y values of the data,
+    # the x values are formatted with tikzhelpers::numberformat -
+    # String default '%.6g'
+    # @param datadir Directory to write the data of every graph to as
+    # .dat file named by the hash of its content, so equal graphs of
+    # several Tikz files share one file. Relative to the basefiles folder
+    # or full path, created if missing - default None embeds the data
+    # in the Tikz file
+    # @param dataprefix Path of @parname{datadir} as seen from the Latex
+    # document, used in the Tikz file - default None uses @parname{datadir}
+    # @param date Date String in the Format '2017-03-29' written to the
+    # header - default None uses tikzhelpers::get_header_date at the time
+    # the header is added
+    def __init__(self, stream=None, numformat='%.6g', datadir=None,
+                 dataprefix=None, date=None):
+        self.numformat = numformat
+        self.date = date
+        self.datadir = datadir
+        if datadir is not None:
+            if not os.path.isabs(datadir):
+                self.datadir = os.path.join(os.path.dirname(__file__),
+                                            datadir)
+            try:
+                os.makedirs(self.datadir)
+            except OSError:
+                # already created, for example by another worker process
+                if not os.path.isdir(self.datadir):
+                    raise
+        self.dataprefix = datadir if dataprefix is None else dataprefix
+        # Sections collected in buffered mode
+        self.__tikzsections = []
+        self.__stream = stream
+        # Only close the stream if it was opened by openTikzFile
+        self.__ownstream = False
+        # Temporary file of openTikzFile and the Tikz file it replaces
+        self.__tmpname = None
+        self.__tikzname = None
 
     ## Getter for linestyle list
     def get_linestyles(self):
@@ -198,22 +295,57 @@ of=$reqname1 and $reqname2,
 
     ## Debug function to view intermediate Tikzfile content
     def printtikz(self):
-        print(self.__fulltikzstring)
+        if self.__stream is None:
+            print(''.join(self.__tikzsections))
+        elif hasattr(self.__stream, 'getvalue'):
+            print(self.__stream.getvalue())
+        else:
+            print('Tikzfile content is already written to the stream!')
+
+    ## Write a section to the stream or collect it in buffered mode
+    # @param section String which is added to the Tikzfile
+    def __write(self, section):
+        if self.__stream is None:
+            self.__tikzsections.append(section)
+        else:
+            self.__stream.write(section)
+
+    ## Start streaming mode: All sections added after this call are
+    # written to the file directly.\n
+    # The sections are written to a temporary file in the same folder,
+    # which replaces the Tikz file in createTikzFile. An existing Tikz file
+    # is therefore never left incomplete, call closeTikzFile in a finally
+    # block to remove the temporary file if the export fails.
+    # @param filename String - Exports Tikzfile to filename in local path,
+    # or to specified location if full path is given
+    def openTikzFile(self, filename='test.tikz'):
+        if self.__stream is not None:
+            raise IOError('ClassTikzExport already writes to a stream!')
+        self.__tikzname = getOutputPath(filename)
+        tmphandle, self.__tmpname = tempfile.mkstemp(
+            suffix='.tikz', dir=os.path.dirname(self.__tikzname))
+        self.__stream = os.fdopen(tmphandle, 'w')
+        self.__ownstream = True
+        # write everything collected before in buffered mode
+        self.__stream.write(''.join(self.__tikzsections))
+        self.__tikzsections = []
 
     ## Helper function to add any Latex Code contained in section to the Tikzfile
     # @param section String which is added to the Tikzfile without checks
     def addsection(self, section):
-        self.__fulltikzstring += '\n' + section
+        self.__write('\n' + section)
 
     ## Add the header with the current date\n
     # First add function to be called
     # @param filenames A List of source files to be added to the header
     # @param date Overwrites the current date by your date Sting
-    # in the Format '2017-03-29' when passed
-    def addheader(self, filenames='',
-                  date=time.strftime('%Y-%m-%d', time.localtime())):
-        self.__fulltikzstring += \
-            self.__tikzheader.substitute({'date': date, 'filelist': filenames})
+    # in the Format '2017-03-29' when passed - default None uses #date
+    # or tikzhelpers::get_header_date
+    def addheader(self, filenames='', date=None):
+        if date is None:
+            date = self.date if self.date is not None else get_header_date()
+        self.__write(
+            self.__fmtheader % {'date': date, 'filelist': filenames})
 
     ## Add color definition to be used for a graph
     # @param colorname Name of color to be used in one of the graphs
@@ -221,8 +353,21 @@ of=$reqname1 and $reqname2,
     # @param rgbval RGB values between 0 and 1 of color with name colorname
     # for example '0.00000,0.44700,0.74100'
     def addcolor(self, colorname, rgbval):
-        self.__fulltikzstring += '\n' + self.__tikzcolor.substitute({
-            'colorname': colorname, 'rgbval': rgbval})
+        self.__write(self.__rendercolor(colorname, rgbval))
+
+    ## Add the definitions of several colors in one call
+    # @param colors List of (colorname, rgbval) tuples, see addcolor
+    def addcolors(self, colors):
+        self.__write(''.join(self.__rendercolor(colorname, rgbval)
+                             for colorname, rgbval in colors))
+
+    ## Render a color definition
+    # @param colorname Name of the color
+    # @param rgbval RGB values between 0 and 1 of the color
+    # @return Tikz code of the color definition
+    def __rendercolor(self, colorname, rgbval):
+        return '\n' + self.__fmtcolor % {
+            'colorname': colorname, 'rgbval': rgbval}
 
     ## Add config definition to be used for the whole image
     # @param xmin Xaxis minimum value - String '0'
@@ -248,7 +393,7 @@ of=$reqname1 and $reqname2,
                 legendpos='(0.03,0.97)', legendanchor='north west',
                 legendcolor='white!15!black', bgcolor='white',
                 addoptions='ylabel style={rotate=-90}'):
-        self.__fulltikzstring += '\n' + self.__tikzconfig.substitute({
+        self.__write('\n' + self.__fmtconfig % {
             'xmin': xmin, 'xmax': xmax, 'ymin': ymin, 'ymax': ymax,
             'xparam': xparam, 'xunit': xunit, 'yparam': yparam, 'yunit': yunit,
             'legendpos': legendpos, 'legendanchor': legendanchor,
@@ -266,21 +411,124 @@ of=$reqname1 and $reqname2,
     # String default ''\n
     # Examples: 'thick', 'ultra thick'
     def addplot(self, colorname, linestyle='', addoptions=''):
-        self.__fulltikzstring += '\n' + self.__tikzplot.substitute({
+        self.__write(self.__renderplot(colorname, linestyle, addoptions))
+
+    ## Render a plot header
+    # @param colorname Name of color to be used in the graph
+    # @param linestyle Style of the graphline, see addplot
+    # @param addoptions Additional Options to be added to the plot axis
+    # @return Tikz code of the plot header
+    def __renderplot(self, colorname, linestyle, addoptions):
+        return '\n' + self.__fmtplot % {
             'plotcolor': colorname,
             'linestyle': self.__tikzgs[linestyle],
-            'addopt': addoptions})
+            'addopt': addoptions}
+
+    ## Add several graphs with their data and legend entries in one call
+    # @param graphs List of (colorname, linestyle, addoptions, data, legend)
+    # tuples: the first three are the arguments of addplot, data is passed
+    # to adddata and legend is a tuple of the arguments of addlegend or
+    # None to add no legend entry
+    def addgraphs(self, graphs):
+        for colorname, linestyle, addoptions, data, legend in graphs:
+            self.__write(self.__renderplot(colorname, linestyle, addoptions))
+            self.adddata(data)
+            if legend is not None:
+                self.__write(self.__renderlegend(*legend))
 
     ## Add data section to the Tikzplot
-    # @param data Has to be an array with ClassData2D elements.
+    # @param data Has to be a ClassGraphData object
+    # or an array with ClassData2D elements.
     def adddata(self, data):
-        datastring = ''
-        for date in data:
-            datastring += '\n' + str(date.xvalue) + self.__tikzsep + \
-                str(date.yvalue) + self.__tikzle
-
-        self.__fulltikzstring += \
-            self.__tikzdata.substitute({'data': datastring})
+        if type(data) is ClassGraphData:
+            self.adddataxy(data.xdata, data.ydata)
+        else:
+            self.adddataxy([date.xvalue for date in data],
+                           [date.yvalue for date in data])
+
+    ## Add data section to the Tikzplot from two value arrays\n
+    # The y values are formatted with #numformat,
+    # one chunk of rows at a time. With #datadir the rows are written
+    # to a data file referenced by the Tikzplot.
+    # @param xdata Array or list with the x values
+    # @param ydata Array or list with the y values,
+    # same length as @parname{xdata}
+    @profiled()
+    def adddataxy(self, xdata, ydata):
+        if len(xdata) != len(ydata):
+            raise ValueError('Variables xdata and ydata must have the same length!')
+        if self.datadir is not None:
+            self.__write('\n' + self.__fmtdatafile % {
+                'datafile': self.__writedatafile(xdata, ydata)})
+            return
+        self.__write('\n' + self.__tikztable)
+        for i in range(0, len(xdata), self.__tikzchunk):
+            self.__write(format_table_data(
+                xdata[i:i + self.__tikzchunk], ydata[i:i + self.__tikzchunk],
+                self.numformat, self.__tikzsep, self.__tikzle))
+        self.__write(self.__tikzdataend)
+
+    ## Write two value arrays to a data file in #datadir named by the hash
+    # of its content, an existing file with the same content is kept
+    # @param xdata Array or list with the x values
+    # @param ydata Array or list with the y values,
+    # same length as @parname{xdata}
+    # @return Path of the data file for the Tikz file
+    def __writedatafile(self, xdata, ydata):
+        datahash = hashlib.sha1()
+        tmphandle, tmpname = tempfile.mkstemp(suffix='.dat',
+                                              dir=self.datadir)
+        try:
+            with os.fdopen(tmphandle, 'w') as tmpfile:
+                for i in range(0, len(xdata), self.__tikzchunk):
+                    # one row per line, the leading linefeed of the
+                    # first row is moved to the end
+                    rows = format_table_data(
+                        xdata[i:i + self.__tikzchunk],
+                        ydata[i:i + self.__tikzchunk],
+                        self.numformat, self.__tikzsep, '')[1:] + '\n'
+                    datahash.update(rows.encode('ascii'))
+                    tmpfile.write(rows)
+            dataname = datahash.hexdigest() + '.dat'
+            if os.path.isfile(os.path.join(self.datadir, dataname)):
+                os.remove(tmpname)
+            else:
+                # mkstemp creates the file readable for the owner only
+                os.chmod(tmpname, 0o644)
+                os.rename(tmpname, os.path.join(self.datadir, dataname))
+        except BaseException:
+            if os.path.isfile(tmpname):
+                os.remove(tmpname)
+            raise
+        return self.dataprefix.rstrip('/') + '/' + dataname
+
+    ## Add a filled band between a lower and an upper graph,
+    # for example the envelope of many measurements
+    # @param colorname Name of color to fill the band with -
+    # has to be defined by addcolor earlier
+    # @param lower ClassGraphData object with the lower boundary
+    # @param upper ClassGraphData object with the upper boundary
+    # @param opacity Fill opacity of the band - String default '0.3'
+    # @param addoptions Additional Options to be added to the band -
+    # String default ''
+    # @param bandname Name of the band, must be unique in one plot -
+    # default None uses @parname{colorname}
+    @profiled()
+    def addband(self, colorname, lower, upper, opacity='0.3', addoptions='',
+                bandname=None):
+        if bandname is None:
+            bandname = colorname
+        # the boundaries are named paths like the requirement type
+        # indicators, filled by the fillbetween library
+        for pathname, boundary in ((bandname + '-lower', lower),
+                                   (bandname + '-upper', upper)):
+            self.__write('\n' + self.__fmtbandpath % {
+                'pathname': pathname})
+            self.adddataxy(boundary.xdata, boundary.ydata)
+        self.__write('\n' + self.__fmtband % {
+            'plotcolor': colorname, 'opacity': opacity, 'addopt': addoptions,
+            'pathname1': bandname + '-lower',
+            'pathname2': bandname + '-upper'})
 
     ## Add plot legend to be used for a graph
     # @param index Index of the plots sparameter -
@@ -293,15 +541,37 @@ of=$reqname1 and $reqname2,
     # with $index in it, the @parname{index} variable will be ignored
     def addlegend(self, index='11', description='',
                   label=Template('$$S_{$index}$$')):
+        self.__write(self.__renderlegend(index, description, label))
+
+    ## Render a legend entry, label Templates are compiled only once
+    # @param index Index of the plots sparameter, see addlegend
+    # @param description Description in the legend
+    # @param label Alternative Symbol - String or Template with $index
+    # @return Tikz code of the legend entry
+    def __renderlegend(self, index='11', description='',
+                       label=Template('$$S_{$index}$$')):
         if type(label) is Template:
-            self.__fulltikzstring += '\n' + self.__tikzlegend.substitute({
-                'desc': description,
-                'label': label.substitute({'index': index})})
-        elif type(label) is str:
-            self.__fulltikzstring += '\n' + self.__tikzlegend.substitute({
-                'desc': description, 'label': label})
-        else:
+            labelformat = self.__fmtlabels.get(label.template)
+            if labelformat is None:
+                labelformat = compile_template(label)
+                self.__fmtlabels[label.template] = labelformat
+            label = labelformat % {'index': index}
+        elif type(label) is not str:
             raise TypeError('You passed an unexpected type to the label variable. Must be eigther String or Template!')
+        return '\n' + self.__fmtlegend % {'desc': description, 'label': label}
+
+    ## Add an annotation marking a point of the plot,
+    # for example the worst margin to a requirement
+    # @param colorname Name of a color added before by addcolor
+    # @param xvalue X value of the point
+    # @param yvalue Y value of the point
+    # @param text Text of the pin label
+    # @param pinangle Direction of the pin label in degree - String default '90'
+    def addannotation(self, colorname, xvalue, yvalue, text, pinangle='90'):
+        self.__write('\n' + self.__fmtannotation % {
+            'plotcolor': colorname, 'pinangle': pinangle, 'text': text,
+            'xvalue': numberformat % xvalue,
+            'yvalue': self.numformat % yvalue})
 
     ## Add requirement type indicator
     # @param requirement ClassRequirements object
@@ -312,7 +582,7 @@ of=$reqname1 and $reqname2,
     # must be unique in one plot,
     # ideally it's the same color the requirement line has already
     def add_req_type_ind(self, requirement, reqname):
-        self.__fulltikzstring += '\n' + self.__tikzreq.substitute({
+        self.__write('\n' + self.__fmtreq % {
             'reqname1': reqname + '+' + str(requirement.get_reqdir()[0]),
             'reqname2': reqname + '+' + str(requirement.get_reqdir()[1]),
             'reqcolorname': reqname,
@@ -322,24 +592,39 @@ of=$reqname1 and $reqname2,
     ## Add the footer to the Tikzpicture
     # Last add function to be called
     def addfooter(self):
-        self.__fulltikzstring += '\n' + self.__tikzfooter.template
+        self.__write('\n' + self.__tikzfooter.template)
 
-    ## Export function to write Tikzfile
+    ## Export function to write Tikzfile\n
+    # In streaming mode the content is already written,
+    # so the stream is only flushed, or closed and moved to the Tikz file
+    # if opened by openTikzFile
     # @param filename String - Exports Tikzfile to filename in local path,
     # or to specified location if full path is given
+    @profiled()
     def createTikzFile(self, filename='test.tikz'):
-        if not os.path.isabs(filename):
-            tikzfile = \
-                open(os.path.join(os.path.dirname(__file__), filename), 'w')
-        elif os.path.isabs(filename):
-            if os.path.isdir(os.path.dirname(filename)):
-                tikzfile = open(filename, 'w')
-            else:
-                raise IOError('Path not existent. Please create the Folders and run again!\nPath: ' + filename)
+        if self.__stream is None:
+            tikzfile = openOutputFile(filename, 'w')
+            tikzfile.write(''.join(self.__tikzsections))
+            tikzfile.close()
+        elif self.__ownstream:
+            self.__stream.close()
+            self.__stream = None
+            self.__ownstream = False
+            # mkstemp creates the file readable for the owner only
+            os.chmod(self.__tmpname, 0o644)
+            os.rename(self.__tmpname, self.__tikzname)
         else:
-            raise ValueError('Variable filename contains no valid type, value or whatever!')
-        tikzfile.write(self.__fulltikzstring)
-        tikzfile.close()
+            self.__stream.flush()
+
+    ## Stop the streaming mode of openTikzFile without export, the
+    # temporary file is removed and an existing Tikz file is kept.
+    # Does nothing after createTikzFile.
+    def closeTikzFile(self):
+        if self.__ownstream:
+            self.__stream.close()
+            self.__stream = None
+            self.__ownstream = False
+            os.remove(self.__tmpname)
 
 
 ## @cond Prevents doxygen from scanning the following
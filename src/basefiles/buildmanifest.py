@@ -0,0 +1,328 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package buildmanifest
+# Provides the #buildmanifest::ClassBuildManifest for incremental builds.
+#
+# For every created Tikz file the manifest records a fingerprint of
+# everything the file depends on:
+#  - the content hashes of the input Touchstone files
+#  - the plot definitions (indexes, descriptions, requirements, ...)
+#    with all fields and all data values (see get_definition_key)
+#  - the version of the design script, of the calling config script with
+#    its hard-coded constants and of the basefiles
+#
+# A Tikz file with an unchanged fingerprint is not created again,
+# so its modification time is kept and tikzexternalize does not
+# recompile it.
+#
+# Tikz files with their data in shared .dat files (see
+# TikzExport::ClassTikzExport) record the names of the referenced files.
+# A Tikz file is only up to date if all of them exist, and data files no
+# Tikz file references anymore are deleted when the manifest is saved.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import glob
+import hashlib
+import inspect
+import json
+import numbers
+import os
+import re
+import sys
+import tempfile
+import threading
+import numpy as np
+from ClassDataStructs import ClassGraphData, ClassRequirements
+from tikzhelpers import get_file_hash
+
+
+## Name of the manifest file in the result directory
+manifestname = '.tikzmanifest.json'
+
+## Data files written by TikzExport::ClassTikzExport, named by the hash
+# of their content
+datafilepattern = re.compile(r'[0-9a-f]{40}\.dat$')
+
+## References of data files in a Tikz file
+datareferencepattern = re.compile(r'table \{[^}]*?([0-9a-f]{40}\.dat)\};')
+
+
+## Return a complete description of a plot definition for the
+# fingerprint. Unlike repr() it contains all fields of requirements and
+# all data values with full precision.
+# @param definition Any combination of lists, tuples, dictionaries,
+# ClassRequirements, ClassGraphData, NumPy arrays, numbers and Strings
+# @return String
+def get_definition_key(definition):
+    if type(definition) is ClassRequirements:
+        return 'ClassRequirements' + get_definition_key((
+            definition.legendentry, definition.reqtype, definition.linestyle,
+            definition.graphcolor, definition.reqscale, definition.data))
+    if type(definition) is ClassGraphData:
+        return 'ClassGraphData' + get_definition_key((
+            definition.xquant, definition.yquant, definition.xunit,
+            definition.yunit, definition.xdata, definition.ydata))
+    if isinstance(definition, np.ndarray):
+        data = np.ascontiguousarray(definition)
+        return 'ndarray(%s,%s,%s)' % (
+            data.dtype.str, data.shape, hashlib.sha1(data.tobytes()).hexdigest())
+    if isinstance(definition, (list, tuple)):
+        return type(definition).__name__ + '(' + ','.join(
+            get_definition_key(item) for item in definition) + ')'
+    if isinstance(definition, dict):
+        return 'dict(' + ','.join(sorted(
+            get_definition_key(key) + ':' + get_definition_key(value)
+            for key, value in definition.items())) + ')'
+    if isinstance(definition, (bool, np.bool_)):
+        return repr(bool(definition))
+    if isinstance(definition, numbers.Integral):
+        return '%d' % definition
+    if isinstance(definition, numbers.Real):
+        # shortest representation of the exact value
+        return repr(float(definition))
+    return repr(definition)
+
+
+## @class ClassBuildManifest
+# Fingerprints of all Tikz files in one result directory
+class ClassBuildManifest(object):
+
+    ## Constructor
+    # @param resultdir Directory of the Tikz files and the manifest file
+    def __init__(self, resultdir):
+        self.resultdir = resultdir
+        self.filename = os.path.join(resultdir, manifestname)
+        # Entries with the fingerprint and the data files of the Tikz file
+        # indexed by Tikz file name
+        self.__fingerprints = self.__load()
+        # Fingerprints changed since the last save
+        self.__updated = {}
+        # File hashes indexed by path, with mtime and size for validation
+        self.__filehashes = {}
+        # Code versions indexed by design script and config script file
+        self.__versions = {}
+        # The config scripts may run in multiple threads
+        self.__lock = threading.RLock()
+
+    ## Read the entries from the manifest file
+    # @return Dictionary of entries indexed by Tikz file name
+    def __load(self):
+        if not os.path.isfile(self.filename):
+            return {}
+        try:
+            with open(self.filename, 'r') as manifestfile:
+                return json.load(manifestfile)
+        except ValueError:
+            # damaged manifest, create everything again
+            return {}
+
+    ## Return the content hash of a file,
+    # only hashing again if its modification time or size changed
+    # @param filename Path of the file
+    # @return Content hash of the file
+    def __get_file_hash(self, filename):
+        stat = os.stat(filename)
+        fileinfo = self.__filehashes.get(filename)
+        if fileinfo is None or \
+                fileinfo[0:2] != (stat.st_mtime, stat.st_size):
+            fileinfo = (stat.st_mtime, stat.st_size, get_file_hash(filename))
+            self.__filehashes[filename] = fileinfo
+        return fileinfo[2]
+
+    ## Return the version of a design function, which is the hash of its
+    # source file, of the calling config script and of all basefiles
+    # @param function Design function, for example spara_db_2tikz
+    # @param callerfile Source file of the config script defining the plot,
+    # so its hard-coded constants are part of the version -
+    # default None ignores it
+    # @return Hash of all code the created Tikz file depends on
+    def get_code_version(self, function, callerfile=None):
+        sourcefile = inspect.getsourcefile(function)
+        codefiles = [sourcefile]
+        if callerfile is not None and os.path.isfile(callerfile):
+            codefiles.append(os.path.realpath(callerfile))
+        key = tuple(codefiles)
+        with self.__lock:
+            if key not in self.__versions:
+                version = hashlib.sha1()
+                basefiles = sorted(glob.glob(
+                    os.path.join(os.path.dirname(__file__), '*.py')))
+                for codefile in codefiles + basefiles:
+                    version.update(self.__get_file_hash(codefile).encode())
+                self.__versions[key] = version.hexdigest()
+            return self.__versions[key]
+
+    ## Return the fingerprint of a Tikz file
+    # @param sources List of the paths of all input Touchstone files
+    # @param function Design function creating the Tikz file
+    # @param definitions All further plot definitions, for example
+    # indexes, descriptions and requirements (see get_definition_key).
+    # Constants hard-coded in the calling config script are covered by
+    # the hash of its source file.
+    # @return Fingerprint String
+    def get_fingerprint(self, sources, function, *definitions):
+        # source file of the calling config script
+        callerfile = sys._getframe(1).f_code.co_filename
+        fingerprint = hashlib.sha1()
+        fingerprint.update(
+            self.get_code_version(function, callerfile).encode())
+        with self.__lock:
+            for source in sorted(sources):
+                fingerprint.update(self.__get_file_hash(source).encode())
+        fingerprint.update(get_definition_key(definitions).encode('utf-8'))
+        return fingerprint.hexdigest()
+
+    ## Return the fingerprint and the data files of a manifest entry,
+    # entries of older manifests consist of the fingerprint only
+    # @param entry Entry of the manifest or None
+    # @return Tuple (fingerprint, list of data file paths relative to
+    # #resultdir)
+    @staticmethod
+    def __get_entry(entry):
+        if entry is None:
+            return None, []
+        if isinstance(entry, dict):
+            return entry['fingerprint'], entry['datafiles']
+        return entry, []
+
+    ## Check if a Tikz file has to be created again
+    # @param tikzfile Path of the Tikz file
+    # @param fingerprint Fingerprint from get_fingerprint
+    # @return True if the Tikz file and all its data files exist and it
+    # was created with the same fingerprint
+    def is_uptodate(self, tikzfile, fingerprint):
+        with self.__lock:
+            recorded, datafiles = self.__get_entry(
+                self.__fingerprints.get(os.path.basename(tikzfile)))
+        return os.path.isfile(tikzfile) and recorded == fingerprint and \
+            all(os.path.isfile(os.path.join(self.resultdir, datafile))
+                for datafile in datafiles)
+
+    ## Record the fingerprint of a created Tikz file
+    # @param tikzfile Path of the Tikz file
+    # @param fingerprint Fingerprint from get_fingerprint
+    # @param datafolder Subfolder of #resultdir with the data files of the
+    # Tikz file (see tikzhelpers::get_export_options), the referenced
+    # files are read from the Tikz file - default None for embedded data
+    def update(self, tikzfile, fingerprint, datafolder=None):
+        datafiles = []
+        if datafolder is not None:
+            with open(tikzfile, 'r') as tikz:
+                datafiles = sorted(set(
+                    datafolder + '/' + name for name in
+                    datareferencepattern.findall(tikz.read())))
+        entry = {'fingerprint': fingerprint, 'datafiles': datafiles}
+        with self.__lock:
+            self.__fingerprints[os.path.basename(tikzfile)] = entry
+            self.__updated[os.path.basename(tikzfile)] = entry
+
+    ## Forget the fingerprint of a Tikz file, for example because the file
+    # is deleted
+    # @param tikzfile Path of the Tikz file
+    def remove(self, tikzfile):
+        with self.__lock:
+            self.__fingerprints.pop(os.path.basename(tikzfile), None)
+            # None removes the entry from the manifest file on save
+            self.__updated[os.path.basename(tikzfile)] = None
+
+    ## Return and forget the fingerprints recorded since the last save,
+    # so a worker process can hand them to the process saving the manifest
+    # @return Dictionary of fingerprints indexed by Tikz file name
+    def pop_updates(self):
+        with self.__lock:
+            updated = self.__updated
+            self.__updated = {}
+            return updated
+
+    ## Record fingerprints of Tikz files created by another process
+    # @param updates Dictionary from pop_updates of the other process
+    def merge(self, updates):
+        with self.__lock:
+            for name, entry in updates.items():
+                if entry is None:
+                    self.__fingerprints.pop(name, None)
+                else:
+                    self.__fingerprints[name] = entry
+            self.__updated.update(updates)
+
+    ## Write the manifest file atomically,
+    # keeping entries written by others in the meantime,
+    # and delete the data files no Tikz file references anymore
+    def save(self):
+        with self.__lock:
+            previous = self.__load()
+            fingerprints = dict(previous)
+            for name, entry in self.__updated.items():
+                if entry is None:
+                    fingerprints.pop(name, None)
+                else:
+                    fingerprints[name] = entry
+            tmphandle, tmpname = tempfile.mkstemp(
+                suffix='.json', dir=os.path.dirname(self.filename))
+            with os.fdopen(tmphandle, 'w') as tmpfile:
+                json.dump(fingerprints, tmpfile, indent=0, sort_keys=True)
+            os.rename(tmpname, self.filename)
+            self.__fingerprints = fingerprints
+            self.__updated = {}
+            self.__sweep(previous, fingerprints)
+
+    ## Delete the data files in all data folders of the manifest
+    # which are not referenced by any entry
+    # @param previous Entries before the save, their data folders are
+    # swept too
+    # @param entries Entries of the saved manifest
+    def __sweep(self, previous, entries):
+        referenced = set()
+        for entry in entries.values():
+            referenced.update(self.__get_entry(entry)[1])
+        folders = set(os.path.dirname(datafile) for datafile in referenced)
+        for entry in previous.values():
+            folders.update(os.path.dirname(datafile)
+                           for datafile in self.__get_entry(entry)[1])
+        for folder in sorted(folders):
+            datadir = os.path.join(self.resultdir, folder)
+            if not os.path.isdir(datadir):
+                continue
+            for name in os.listdir(datadir):
+                if datafilepattern.match(name) and \
+                        folder + '/' + name not in referenced:
+                    os.remove(os.path.join(datadir, name))
+
+
+## Manifests of the process indexed by result directory
+__manifests = {}
+__manifestslock = threading.Lock()
+
+
+## Return the manifest of a result directory shared by the whole process
+# @param resultdir Directory of the Tikz files
+# @return ClassBuildManifest object
+def get_build_manifest(resultdir):
+    resultdir = os.path.realpath(resultdir)
+    with __manifestslock:
+        if resultdir not in __manifests:
+            __manifests[resultdir] = ClassBuildManifest(resultdir)
+        return __manifests[resultdir]
+
+
+## Return and forget the fingerprints recorded by this process
+# in all manifests since their last save
+# @return Dictionary of pop_updates results indexed by result directory
+def pop_manifest_updates():
+    with __manifestslock:
+        manifests = list(__manifests.items())
+    return dict((resultdir, manifest.pop_updates())
+                for resultdir, manifest in manifests)
+
+
+## Record fingerprints of Tikz files created by another process
+# in the manifests of this process
+# @param updates Dictionary from pop_manifest_updates of the other process
+def merge_manifest_updates(updates):
+    for resultdir, fingerprints in updates.items():
+        get_build_manifest(resultdir).merge(fingerprints)
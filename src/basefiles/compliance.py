@@ -0,0 +1,324 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package compliance
+# Provides the check of S-Parameter traces against requirements.
+#
+# The piecewise linear data of a ClassDataStructs::ClassRequirements is
+# interpolated onto the frequency grid of the traces once, then the
+# margins of all traces of all networks on this grid are computed in one
+# vectorized operation. Networks measured on different grids are checked
+# per grid on their own frequency points, the traces are never resampled.
+# A positive margin means the requirement is met:
+#  - 'max': limit - trace
+#  - 'min': trace - limit
+#  - 'is': tolerance - |trace - limit|
+#
+# The tolerance of an 'is' requirement is its reqscale by default, which
+# is the band drawn by TikzExport::ClassTikzExport::add_req_type_ind.
+#
+# Frequencies outside of the range of the requirement data are not
+# checked. The results can be written to a CSV or JSON report. The worst
+# margins annotated in the comparison plots are searched the same way, so
+# the plots and the reports agree.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import csv
+import json
+import sys
+import numpy as np
+from ClassDataStructs import ClassRequirements
+from sparaextract import ClassSparaStack, get_extract
+from resampling import get_grid_key
+from tikzhelpers import getOutputPath
+from profiler import stage
+
+
+## Columns of a compliance report
+reportfields = ['network', 'sparameter', 'requirement', 'reqtype',
+                'margin', 'frequency', 'passed']
+
+
+## Return the requirements as list, a single ClassRequirements is allowed
+# like in the design scripts
+# @param requirements ClassRequirements object or list of them
+# @return List of ClassRequirements objects
+def get_requirement_list(requirements):
+    if type(requirements) is ClassRequirements:
+        return [requirements]
+    for requirement in requirements:
+        if not type(requirement) is ClassRequirements:
+            raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
+    return list(requirements)
+
+
+## Interpolate the requirement data onto a frequency grid
+# @param xdata NumPy array with the frequency values in the unit of the
+# requirement data
+# @param requirement ClassRequirements object
+# @return NumPy array with the limit per frequency point,
+# NaN outside of the range of the requirement data
+def get_limit(xdata, requirement):
+    if not len(requirement.data):
+        raise ValueError('The requirement ' + requirement.legendentry +
+                         ' has no data!')
+    # stable sort keeps the order of steps at the same frequency
+    order = np.argsort(requirement.data.xdata, kind='mergesort')
+    return np.interp(xdata, requirement.data.xdata[order],
+                     requirement.data.ydata[order],
+                     left=np.nan, right=np.nan)
+
+
+## Calculate the margins of traces to a requirement
+# @param xdata NumPy array with the frequency values of the traces
+# @param traces NumPy array of any shape with the frequency points
+# along the last axis
+# @param requirement ClassRequirements object of type 'max', 'min' or 'is'
+# @param tolerance Allowed deviation of an 'is' requirement -
+# default None uses the reqscale of the requirement
+# @return NumPy array with the margins in the shape of @parname{traces},
+# NaN outside of the range of the requirement data
+def get_margins(xdata, traces, requirement, tolerance=None):
+    limit = get_limit(xdata, requirement)
+    traces = np.asarray(traces, dtype=np.float64)
+    if tolerance is None:
+        tolerance = requirement.reqscale
+    if requirement.reqtype == 'max':
+        return limit - traces
+    if requirement.reqtype == 'min':
+        return traces - limit
+    if requirement.reqtype == 'is':
+        return tolerance - np.abs(traces - limit)
+    raise ValueError('Requirement ' + requirement.legendentry +
+                     ' has no type to be checked! Must be one of max,min,is')
+
+
+## Find the worst margin of every trace to a requirement
+# @param xdata NumPy array with the frequency values of the traces
+# @param traces NumPy array of any shape with the frequency points
+# along the last axis
+# @param requirement ClassRequirements object of type 'max', 'min' or 'is'
+# @param tolerance Allowed deviation of an 'is' requirement -
+# default None uses the reqscale of the requirement
+# @return Tuple (margins, points) of arrays in the shape of
+# @parname{traces} without the last axis with the worst margin of every
+# trace and the index of its frequency point. The margin is NaN if the
+# requirement does not cover any frequency point.
+def get_worst_margins(xdata, traces, requirement, tolerance=None):
+    margins = get_margins(xdata, traces, requirement, tolerance)
+    valid = ~np.isnan(margins)
+    points = np.argmin(np.where(valid, margins, np.inf), axis=-1)
+    worst = np.take_along_axis(margins, points[..., np.newaxis],
+                               axis=-1)[..., 0]
+    return worst, points
+
+
+## Find the trace and the frequency point with the worst margin of all
+# traces to a requirement, for example to annotate it in a plot
+# @param xdata NumPy array with the frequency values of the traces
+# @param traces NumPy array of shape (traces, points)
+# @param requirement ClassRequirements object of type 'max', 'min' or 'is'
+# @param tolerance Allowed deviation of an 'is' requirement -
+# default None uses the reqscale of the requirement
+# @return Tuple (margin, trace index, point index) or None if the
+# requirement does not cover any frequency point
+def get_worst_point(xdata, traces, requirement, tolerance=None):
+    margins, points = get_worst_margins(xdata, traces, requirement,
+                                        tolerance)
+    if np.isnan(margins).all():
+        return None
+    trace = int(np.nanargmin(margins))
+    return float(margins[trace]), trace, int(points[trace])
+
+
+## Group networks with exactly the same frequency grid, a reader reads
+# the traces and the frequency vector in one pass
+# @param extracts List of ClassSparaExtract objects
+# @param indexes List of S-Parameter tuples or 'D'
+# @param unity Unit of the y data - String 'dB' or 'deg'
+# @return List of lists with the positions of the networks of one grid in
+# @parname{extracts}, in the order of their first network
+def get_grid_groups(extracts, indexes, unity='dB'):
+    groups = {}
+    for i, extract in enumerate(extracts):
+        extract.get_traces(indexes, unity)
+        groups.setdefault(get_grid_key(extract.get_xdata('Hz')),
+                          []).append(i)
+    return sorted(groups.values())
+
+
+## Check the traces of many networks against requirements, every
+# requirement is checked for all traces of all networks on the same
+# frequency grid at once
+# @param networks List of Network Objects from scikit-rf,
+# ClassTouchstoneReader, ClassLazyNetwork or ClassSparaExtract objects or
+# a sparaextract::ClassSparaStack. Networks on different frequency grids
+# are checked on their own frequency points, the requirement is
+# interpolated once per grid.
+# @param indexes List of S-Parameter tuples or 'D'
+# @param requirements ClassRequirements object or list of them,
+# requirements without type are skipped
+# @param frequnit Unit of the frequency values of the requirement data -
+# String default 'GHz'
+# @param unity Unit of the y data - String 'dB' or 'deg'
+# @param tolerance Allowed deviation of an 'is' requirement -
+# default None uses the reqscale of the requirement
+# @return List of dictionaries with the keys of #reportfields, one per
+# network, S-Parameter and requirement covering at least one frequency point
+def check_compliance(networks, indexes, requirements, frequnit='GHz',
+                     unity='dB', tolerance=None):
+    if type(networks) is ClassSparaStack:
+        extracts = networks.extracts
+    else:
+        extracts = [get_extract(network) for network in networks]
+    groups = get_grid_groups(extracts, indexes, unity)
+    results = []
+    for requirement in get_requirement_list(requirements):
+        if not requirement.reqtype:
+            continue
+        # worst margins and their frequencies in the order of extracts
+        margins = np.empty((len(extracts), len(indexes)))
+        frequencies = np.empty((len(extracts), len(indexes)))
+        for members in groups:
+            xdata = extracts[members[0]].get_xdata(frequnit)
+            traces = np.array([extracts[i].get_traces(indexes, unity)
+                               for i in members])
+            with stage('compliance', networks=len(members),
+                       traces=len(indexes)):
+                margins[members], points = get_worst_margins(
+                    xdata, traces, requirement, tolerance)
+            frequencies[members] = xdata[points]
+        for i, extract in enumerate(extracts):
+            for j, index in enumerate(indexes):
+                if np.isnan(margins[i, j]):
+                    continue
+                results.append({
+                    'network': extract.name,
+                    'sparameter': 'D' if index == 'D' else
+                    'S' + str(index[0]) + str(index[1]),
+                    'requirement': requirement.legendentry,
+                    'reqtype': requirement.reqtype,
+                    'margin': float(margins[i, j]),
+                    'frequency': float(frequencies[i, j]),
+                    'passed': bool(margins[i, j] >= 0)})
+    return results
+
+
+## Return the names of the networks failing any requirement
+# @param results List of results from check_compliance
+# @return Sorted list of network names
+def get_failed_networks(results):
+    return sorted(set(result['network'] for result in results
+                      if not result['passed']))
+
+
+## Write the results of check_compliance to a report file
+# @param filename Name or full path of the report, '.json' writes the
+# summary and all results as JSON, any other extension a CSV table
+# @param results List of results from check_compliance
+def write_compliance_report(filename, results):
+    filename = getOutputPath(filename)
+    if filename.lower().endswith('.json'):
+        with open(filename, 'w') as reportfile:
+            json.dump({
+                'passed': not get_failed_networks(results),
+                'failed': get_failed_networks(results),
+                'results': results}, reportfile, indent=1, sort_keys=True)
+        return
+    if sys.version_info[0] < 3:
+        reportfile = open(filename, 'wb')
+    else:
+        reportfile = open(filename, 'w', newline='')
+    with reportfile:
+        writer = csv.DictWriter(reportfile, reportfields)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+## Annotate the worst margin of the plotted traces to every requirement
+# @param tikzplot TikzExport::ClassTikzExport object, the requirement
+# colors must be added
+# @param xdata NumPy array with the frequency values of the traces
+# @param traces NumPy array of shape (traces, points)
+# @param requirements ClassRequirements object or list of them,
+# requirements without type are skipped
+# @param colornames Names of the requirement colors in the order of
+# @parname{requirements}
+# @param unity Unit of the y data - String 'dB' or 'deg'
+# @param tolerance Allowed deviation of an 'is' requirement -
+# default None uses the reqscale of the requirement
+def add_margin_annotations(tikzplot, xdata, traces, requirements,
+                           colornames, unity='dB', tolerance=None):
+    traces = np.asarray(traces, dtype=np.float64)
+    for requirement, colorname in zip(get_requirement_list(requirements),
+                                      colornames):
+        if not requirement.reqtype:
+            continue
+        worst = get_worst_point(xdata, traces, requirement, tolerance)
+        if worst is None:
+            continue
+        margin, trace, point = worst
+        add_margin_annotation(tikzplot, colorname, requirement, margin,
+                              xdata[point], traces[trace, point], unity)
+
+
+## Annotate the worst margin of the traces of many networks to every
+# requirement. Networks on different frequency grids are searched on
+# their own frequency points like by check_compliance, the traces are
+# never resampled.
+# @param tikzplot TikzExport::ClassTikzExport object, the requirement
+# colors must be added
+# @param networks List of Network Objects from scikit-rf,
+# ClassTouchstoneReader, ClassLazyNetwork or ClassSparaExtract objects
+# @param indexes List of S-Parameter tuples or 'D'
+# @param requirements ClassRequirements object or list of them,
+# requirements without type are skipped
+# @param colornames Names of the requirement colors in the order of
+# @parname{requirements}
+# @param frequnit Unit of the frequency values - String default 'GHz'
+# @param unity Unit of the y data - String 'dB' or 'deg'
+# @param tolerance Allowed deviation of an 'is' requirement -
+# default None uses the reqscale of the requirement
+def add_network_margin_annotations(tikzplot, networks, indexes,
+                                   requirements, colornames, frequnit='GHz',
+                                   unity='dB', tolerance=None):
+    extracts = [get_extract(network) for network in networks]
+    groups = get_grid_groups(extracts, indexes, unity)
+    for requirement, colorname in zip(get_requirement_list(requirements),
+                                      colornames):
+        if not requirement.reqtype:
+            continue
+        # (margin, x value, y value) of the worst point of all grids
+        worst = None
+        for members in groups:
+            xdata = extracts[members[0]].get_xdata(frequnit)
+            traces = np.array([extracts[i].get_traces(indexes, unity)
+                               for i in members]).reshape(-1, len(xdata))
+            point = get_worst_point(xdata, traces, requirement, tolerance)
+            if point is not None and (worst is None or point[0] < worst[0]):
+                margin, trace, point = point
+                worst = (margin, xdata[point], traces[trace, point])
+        if worst is not None:
+            add_margin_annotation(tikzplot, colorname, requirement, *worst,
+                                  unity=unity)
+
+
+## Annotate one margin to a requirement
+# @param tikzplot TikzExport::ClassTikzExport object, the requirement
+# color must be added
+# @param colorname Name of the requirement color
+# @param requirement ClassRequirements object
+# @param margin Margin to annotate
+# @param xvalue X value of the point with the margin
+# @param yvalue Y value of the point with the margin
+# @param unity Unit of the y data - String 'dB' or 'deg'
+def add_margin_annotation(tikzplot, colorname, requirement, margin, xvalue,
+                          yvalue, unity='dB'):
+    # the pin points away from the allowed range
+    tikzplot.addannotation(
+        colorname, xvalue, yvalue, 'Margin %.2f %s' % (margin, unity),
+        '270' if requirement.reqtype == 'min' else '90')
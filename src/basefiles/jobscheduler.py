@@ -0,0 +1,155 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package jobscheduler
+# Provides the #jobscheduler::ClassJobScheduler to run independent jobs
+# on a pool of worker processes.
+#
+# The Tikz creation is CPU bound Python code, so threads are serialized
+# by the global interpreter lock. Processes run really in parallel.
+#
+# The results are polled, so Ctrl-C reaches the main process, and a job
+# whose worker process dies, for example killed by the OOM killer, is
+# reported as failed instead of waiting for it forever.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import multiprocessing
+import os
+import traceback
+
+
+## Interval in seconds to check the worker processes while waiting
+pollinterval = 0.5
+
+## Process IDs of the workers which started the jobs indexed by job
+# number, shared by all worker processes of a run (see init_worker)
+__startedpids = None
+
+
+## Initialize a worker process
+# @param startedpids Shared array for the process IDs of the jobs
+# @param initializer Function of ClassJobScheduler called once or None
+# @param initargs Tuple of arguments for @parname{initializer}
+def init_worker(startedpids, initializer, initargs):
+    global __startedpids
+    __startedpids = startedpids
+    if initializer is not None:
+        initializer(*initargs)
+
+
+## Run one job and catch its exception,
+# so the traceback of the worker process is not lost
+# @param function Module level function of the job
+# @param args Tuple of arguments for @parname{function}
+# @param index Number of the job to record its worker process -
+# default None in the main process
+# @return Tuple (True, result) or (False, formatted traceback)
+def run_job(function, args, index=None):
+    if index is not None and __startedpids is not None:
+        __startedpids[index] = os.getpid()
+    try:
+        return True, function(*args)
+    except Exception:
+        return False, traceback.format_exc()
+
+
+## @class ClassJobScheduler
+# Collects jobs and runs them on a process pool
+class ClassJobScheduler(object):
+
+    ## Constructor
+    # @param workers Number of worker processes -
+    # default None uses one per CPU, 1 runs all jobs in this process
+    # @param initializer Function called once in every worker process,
+    # for example to set up process wide caches - default None
+    # @param initargs Tuple of arguments for @parname{initializer}
+    def __init__(self, workers=None, initializer=None, initargs=()):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        self.workers = workers
+        self.initializer = initializer
+        self.initargs = initargs
+        # Jobs as (name, function, args) in the order they were added
+        self.__jobs = []
+        ## Failed jobs of the last run as (name, formatted traceback)
+        self.failures = []
+
+    ## Add a job
+    # @param name Name of the job shown in the failure report
+    # @param function Module level function, it has to be picklable
+    # @param args Arguments for @parname{function}, they have to be picklable
+    def add(self, name, function, *args):
+        self.__jobs.append((name, function, args))
+
+    ## Run all added jobs and wait for every one of them
+    # @return List of the job results in the order the jobs were added,
+    # None for failed jobs
+    def run(self):
+        jobs = self.__jobs
+        self.__jobs = []
+        if self.workers == 1 or len(jobs) < 2:
+            if self.initializer is not None:
+                self.initializer(*self.initargs)
+            outcomes = [run_job(function, args) for _, function, args in jobs]
+        else:
+            startedpids = multiprocessing.RawArray('l', len(jobs))
+            pool = multiprocessing.Pool(
+                min(self.workers, len(jobs)), init_worker,
+                (startedpids, self.initializer, self.initargs))
+            try:
+                pending = [pool.apply_async(run_job, (function, args, index))
+                           for index, (_, function, args) in enumerate(jobs)]
+                pool.close()
+                outcomes = self.__wait(pending, startedpids)
+            finally:
+                pool.terminate()
+                pool.join()
+
+        results = []
+        self.failures = []
+        for (name, _, _), (success, result) in zip(jobs, outcomes):
+            if success:
+                results.append(result)
+            else:
+                results.append(None)
+                self.failures.append((name, result))
+        return results
+
+    ## Wait for the results of all jobs on the pool
+    # @param pending List of AsyncResult objects of the jobs
+    # @param startedpids Shared array with the process IDs of the workers
+    # which started the jobs, 0 for jobs not started yet
+    # @return List of run_job tuples in the order of @parname{pending}
+    def __wait(self, pending, startedpids):
+        outcomes = [None] * len(pending)
+        waiting = list(range(len(pending)))
+        while waiting:
+            # a blocking get() without timeout can not be interrupted
+            pending[waiting[0]].wait(pollinterval)
+            alive = set(process.pid
+                        for process in multiprocessing.active_children())
+            stillwaiting = []
+            for index in waiting:
+                pid = startedpids[index]
+                if not pending[index].ready() and pid and pid not in alive:
+                    # give a result sent just before the exit time to arrive
+                    pending[index].wait(pollinterval)
+                    if not pending[index].ready():
+                        outcomes[index] = (False, 'Worker process %d of the '
+                                           'job died\n' % pid)
+                        continue
+                if pending[index].ready():
+                    outcomes[index] = pending[index].get()
+                else:
+                    stillwaiting.append(index)
+            waiting = stillwaiting
+        return outcomes
+
+    ## Print all failures of the last run
+    def print_failures(self):
+        for name, trace in self.failures:
+            print('Job ' + name + ' failed:\n' + trace)
@@ -0,0 +1,122 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package lazynetwork
+# Provides the #lazynetwork::ClassLazyNetwork, a handle of a Touchstone
+# file which defers parsing until data is requested.
+#
+# Only the header of the file and its first and last frequency record
+# are read on creation, so scanning folders with many files and using
+# only the name, for example in the header of a Tikz file, is nearly free.
+#
+# The handle is accepted by #sparaextract::ClassSparaExtract and thereby
+# by the design scripts. Traces are memory-mapped from the binary store of
+# the #networkcache if the file content is stored there, otherwise read
+# column wise by a #touchstonereader::ClassTouchstoneReader and stored
+# there, so later runs do not parse the file again. They are cached in
+# the handle.
+# The full scikit-rf Network is parsed via the #networkcache only if
+# the full S-Matrix or any other Network property is requested, and
+# for files the reader does not support.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import os
+from touchstonereader import ClassTouchstoneReader
+import numpy as np
+from networkcache import load_network, load_traces, save_traces
+
+
+## @class ClassLazyNetwork
+# Touchstone file parsed on first access to its data
+class ClassLazyNetwork(object):
+
+    ## Constructor, reads only the header and the frequency range
+    # @param touchstone Path of the Touchstone file
+    def __init__(self, touchstone):
+        self.filename = touchstone
+        self.name = os.path.splitext(os.path.basename(touchstone))[0]
+        # Full Network, parsed on first access
+        self.__network = None
+        # Complex traces already read indexed by S-Parameter tuple
+        self.__columns = {}
+        # Frequency vector in Hz of the stored traces
+        self.__f = None
+        try:
+            self.reader = ClassTouchstoneReader(touchstone)
+            self.nports = self.reader.nports
+            self.fstart, self.fstop = self.reader.get_frequency_range()
+        except ValueError:
+            # Touchstone version 2 and other files the reader
+            # does not support are parsed completely
+            self.reader = None
+            network = self.get_network()
+            self.nports = network.nports
+            self.fstart, self.fstop = network.f[0], network.f[-1]
+
+    ## Return the full Network, parsed only on the first call
+    # @return Network Object from scikit-rf named like the file
+    def get_network(self):
+        if self.__network is None:
+            self.__network = load_network(self.filename)
+        return self.__network
+
+    ## Return the frequency vector
+    # @return NumPy array with the frequency values in Hz
+    def get_frequency(self):
+        if self.__network is not None or self.reader is None:
+            return self.get_network().f
+        if self.__f is None:
+            self.__f = load_traces(self.filename, [])[0]
+        if self.__f is not None:
+            return self.__f
+        try:
+            return self.reader.get_frequency()
+        except ValueError:
+            self.reader = None
+            return self.get_network().f
+
+    ## Return the requested S-Parameters, only traces not read yet are
+    # loaded from the store or read from the file in one pass
+    # @param indexes List of S-Parameter tuples (m,n) starting at 1
+    # @return Dictionary of complex NumPy arrays indexed by the tuples
+    def read(self, indexes):
+        indexes = [tuple(index) for index in indexes]
+        missing = [index for index in indexes if index not in self.__columns]
+        if missing and self.__network is None:
+            f, stored = load_traces(self.filename, missing)
+            if stored:
+                self.__f = f
+                self.__columns.update(stored)
+                missing = [index for index in missing
+                           if index not in self.__columns]
+        if missing and self.__network is None and self.reader is not None:
+            try:
+                columns = self.reader.read(missing)
+            except ValueError:
+                # for example noise parameters, the full Network is parsed
+                self.reader = None
+            else:
+                self.__columns.update(columns)
+                f = self.reader.get_frequency()
+                save_traces(self.filename, f, np.full(
+                    (len(f), self.nports), self.reader.z0, dtype=complex),
+                    columns)
+        for index in missing:
+            if index not in self.__columns:
+                # column view of the full S-Matrix
+                self.__columns[index] = self.get_network().s[
+                    :, int(index[0]) - 1, int(index[1]) - 1]
+        return dict((index, self.__columns[index]) for index in indexes)
+
+    ## Forward all other Network properties, for example s or s_db,
+    # to the full Network
+    # @param name Name of the property
+    # @return Property of the full Network
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get_network(), name)
@@ -0,0 +1,222 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package networkcache
+# Provides the process wide #networkcache::ClassNetworkCache
+# for parsed Touchstone files.
+#
+# The same measurement is often placed in several folders of
+# touchstoneinput as a copy or a symlink. The cache parses every file
+# content only once, identified by the hash of the content.
+# A file which is already known by its path, modification time and size
+# is not even hashed again.
+#
+# If a cache directory is set with #networkcache::set_cache_dir, parsed
+# Networks are also kept in a #networkstore::ClassNetworkStore, so later
+# runs load them without parsing. Single traces are memory-mapped from
+# the store with #networkcache::load_traces without creating a Network,
+# traces read from the text file are stored with
+# #networkcache::save_traces.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+import skrf as rf
+from networkstore import ClassNetworkStore
+from tikzhelpers import get_file_hash
+from profiler import stage
+
+
+## @class ClassNetworkCache
+# Least recently used cache of scikit-rf Networks
+# limited by the memory of the S-Parameter data.
+class ClassNetworkCache(object):
+
+    ## Constructor
+    # @param maxbytes Memory budget of all cached Networks in bytes -
+    # default 1 GiB
+    # @param store ClassNetworkStore to persist parsed Networks in -
+    # default None keeps them only in memory
+    def __init__(self, maxbytes=1 << 30, store=None):
+        self.maxbytes = maxbytes
+        self.store = store
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Networks indexed by content hash, least recently used first
+        self.__networks = OrderedDict()
+        # Memory of each cached Network indexed by content hash
+        self.__sizes = {}
+        # (mtime, size, content hash) indexed by real path
+        self.__files = {}
+        # The config scripts may run in multiple threads
+        self.__lock = threading.RLock()
+
+    ## Return the content hash of a file if known
+    # and its modification time and size did not change
+    # @param realpath Real path of the Touchstone file
+    # @return Content hash of the file or None
+    def __get_known_hash(self, realpath):
+        stat = os.stat(realpath)
+        fileinfo = self.__files.get(realpath)
+        if fileinfo is None or \
+                fileinfo[0:2] != (stat.st_mtime, stat.st_size):
+            return None
+        return fileinfo[2]
+
+    ## Remember the content hash of a file
+    # @param realpath Real path of the Touchstone file
+    # @param contenthash Content hash of the file
+    def __set_hash(self, realpath, contenthash):
+        stat = os.stat(realpath)
+        self.__files[realpath] = (stat.st_mtime, stat.st_size, contenthash)
+
+    ## Remove the least recently used Networks until
+    # the memory budget is met, the newest Network is always kept
+    def __evict(self):
+        while self.nbytes > self.maxbytes and len(self.__networks) > 1:
+            contenthash = next(iter(self.__networks))
+            del self.__networks[contenthash]
+            self.nbytes -= self.__sizes.pop(contenthash)
+
+    ## Return the content hash of a Touchstone file, hashed only if
+    # neither this cache nor the store knows the unchanged file
+    # @param realpath Real path of the Touchstone file
+    # @param name Name of the file for the profiler
+    # @return Content hash of the file
+    def __get_content_hash(self, realpath, name):
+        with self.__lock:
+            contenthash = self.__get_known_hash(realpath)
+            if contenthash is None and self.store is not None:
+                # valid by modification time and size without hashing
+                contenthash = self.store.get_hash(realpath)
+            if contenthash is None:
+                with stage('hash', file=name):
+                    contenthash = get_file_hash(realpath)
+                if self.store is not None:
+                    self.store.set_hash(realpath, contenthash)
+            self.__set_hash(realpath, contenthash)
+            return contenthash
+
+    ## Return the Network of a Touchstone file
+    # @param touchstone Path of the Touchstone file
+    # @return Network Object from scikit-rf named like @parname{touchstone}.\n
+    # Warning: The S-Parameter data is shared with all other requests
+    # of the same content and must not be changed in place.
+    def get_network(self, touchstone):
+        realpath = os.path.realpath(touchstone)
+        name = os.path.splitext(os.path.basename(touchstone))[0]
+        with self.__lock:
+            contenthash = self.__get_content_hash(realpath, name)
+            network = self.__networks.pop(contenthash, None)
+            if network is None:
+                self.misses += 1
+                if self.store is not None:
+                    with stage('load', file=name):
+                        network = self.store.load(contenthash, name)
+                if network is None:
+                    with stage('parse', file=name):
+                        network = rf.Network(realpath)
+                    if self.store is not None:
+                        with stage('store', file=name):
+                            self.store.save(network, contenthash)
+                self.__sizes[contenthash] = \
+                    network.s.nbytes + network.f.nbytes
+                self.nbytes += self.__sizes[contenthash]
+            else:
+                self.hits += 1
+            # (re)insert as most recently used
+            self.__networks[contenthash] = network
+            self.__evict()
+        # every caller gets its own Network object with the name of the
+        # requested file, the data arrays are shared
+        network = copy.copy(network)
+        network.name = name
+        return network
+
+    ## Return single traces of a Touchstone file memory-mapped from the
+    # store, without parsing the file or creating a Network
+    # @param touchstone Path of the Touchstone file
+    # @param indexes List of S-Parameter tuples (m,n) starting at 1
+    # @return Tuple (frequency vector in Hz, dictionary of read only
+    # complex NumPy arrays indexed by the tuples) or (None, {}) if no store
+    # is set or the content is not stored
+    def get_traces(self, touchstone, indexes):
+        if self.store is None:
+            return None, {}
+        realpath = os.path.realpath(touchstone)
+        name = os.path.splitext(os.path.basename(touchstone))[0]
+        contenthash = self.__get_content_hash(realpath, name)
+        with stage('load', file=name, traces=len(indexes)):
+            return self.store.get_traces(contenthash, indexes)
+
+    ## Keep single traces read from a Touchstone file in the store
+    # @param touchstone Path of the Touchstone file
+    # @param f Frequency vector in Hz
+    # @param z0 Complex port impedances of shape (frequency points, ports)
+    # @param traces Dictionary of complex NumPy arrays indexed by
+    # S-Parameter tuples (m,n) starting at 1
+    def save_traces(self, touchstone, f, z0, traces):
+        if self.store is None:
+            return
+        realpath = os.path.realpath(touchstone)
+        name = os.path.splitext(os.path.basename(touchstone))[0]
+        contenthash = self.__get_content_hash(realpath, name)
+        with stage('store', file=name, traces=len(traces)):
+            self.store.save_traces(contenthash, f, z0, traces)
+
+    ## Remove all Networks from the cache
+    def clear(self):
+        with self.__lock:
+            self.__networks.clear()
+            self.__sizes.clear()
+            self.__files.clear()
+            self.nbytes = 0
+
+
+## Cache shared by all config scripts of the process
+networkcache = ClassNetworkCache()
+
+
+## Persist all Networks parsed by the process wide #networkcache
+# @param cachedir Directory for the binary cache files -
+# None keeps the Networks only in memory
+def set_cache_dir(cachedir):
+    if cachedir is None:
+        networkcache.store = None
+    else:
+        networkcache.store = ClassNetworkStore(cachedir)
+
+
+## Read a Touchstone file via the process wide #networkcache
+# @param touchstone Path of the Touchstone file
+# @return Network Object from scikit-rf
+def load_network(touchstone):
+    return networkcache.get_network(touchstone)
+
+
+## Read single traces of a Touchstone file from the store of the process
+# wide #networkcache
+# @param touchstone Path of the Touchstone file
+# @param indexes List of S-Parameter tuples (m,n) starting at 1
+# @return Tuple (frequency vector in Hz, dictionary of complex NumPy arrays
+# indexed by the tuples) or (None, {}) if the traces are not stored
+def load_traces(touchstone, indexes):
+    return networkcache.get_traces(touchstone, indexes)
+
+
+## Keep single traces read from a Touchstone file in the store of the
+# process wide #networkcache, without a store nothing is kept
+# @param touchstone Path of the Touchstone file
+# @param f Frequency vector in Hz
+# @param z0 Complex port impedances of shape (frequency points, ports)
+# @param traces Dictionary of complex NumPy arrays indexed by
+# S-Parameter tuples (m,n) starting at 1
+def save_traces(touchstone, f, z0, traces):
+    networkcache.save_traces(touchstone, f, z0, traces)
@@ -0,0 +1,223 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package networkstore
+# Provides the #networkstore::ClassNetworkStore, a persistent binary cache
+# of parsed Touchstone files.
+#
+# The cache directory contains per Touchstone file content:
+#  - <contenthash>.npy with the complex S-Matrix in the raw NumPy format,
+#    which can be memory-mapped
+#  - <contenthash>_s<m>_<n>.npy with single complex traces, stored for
+#    files of which only some traces were read by a
+#    #lazynetwork::ClassLazyNetwork
+#  - <contenthash>.npz with the frequency vector and the port impedances
+#
+# Single traces are memory-mapped by get_traces as column views, so only
+# the plotted traces are read from the disk. A Network loaded by load
+# holds a copy of the full S-Matrix.
+#
+# and per Touchstone file path:
+#  - <pathhash>.json with the modification time, size and content hash
+#    of the file, so unchanged files are not even hashed again
+#
+# Copies of one measurement in several folders share the same data files.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import skrf as rf
+
+
+## Create a scikit-rf Network from its data arrays without parsing
+# @param f Frequency vector in Hz
+# @param s Complex S-Matrix of shape (frequency points, ports, ports)
+# @param z0 Complex port impedances of shape (frequency points, ports)
+# @param name Name of the Network
+# @return Network Object from scikit-rf
+def create_network(f, s, z0, name):
+    network = rf.Network()
+    network.frequency = rf.Frequency.from_f(f, unit='hz')
+    network.s = s
+    network.z0 = z0
+    network.name = name
+    return network
+
+
+## @class ClassNetworkStore
+# Binary cache directory for parsed Networks
+class ClassNetworkStore(object):
+
+    ## Constructor
+    # @param cachedir Directory to keep the cache files in,
+    # created if not existent
+    def __init__(self, cachedir):
+        self.cachedir = cachedir
+        if not os.path.isdir(cachedir):
+            os.makedirs(cachedir)
+
+    ## Return the path of a file in the cache directory
+    # @param key Hash of the content or of the real path
+    # @param extension File extension including the dot
+    # @return Full path of the cache file
+    def __get_path(self, key, extension):
+        return os.path.join(self.cachedir, key + extension)
+
+    ## Return the path of a single trace in the cache directory
+    # @param contenthash Content hash of the Touchstone file
+    # @param index S-Parameter tuple (m,n) starting at 1
+    # @return Full path of the cache file
+    def __get_trace_path(self, contenthash, index):
+        return self.__get_path(contenthash, '_s%d_%d.npy' % (
+            int(index[0]), int(index[1])))
+
+    ## Return the path of the file information of a Touchstone file
+    # @param touchstone Path of the Touchstone file
+    # @return Full path of the cache file
+    def __get_info_path(self, touchstone):
+        realpath = os.path.realpath(touchstone)
+        return self.__get_path(
+            hashlib.sha1(realpath.encode('utf-8')).hexdigest(), '.json')
+
+    ## Save a file atomically, so concurrent readers never see
+    # a partially written file
+    # @param filename Path of the file
+    # @param writefunction Function called with the open file
+    # to write the content
+    # @param mode Mode to open the temporary file with - String default 'wb'
+    def __save_atomic(self, filename, writefunction, mode='wb'):
+        tmphandle, tmpname = tempfile.mkstemp(
+            suffix=os.path.splitext(filename)[1], dir=self.cachedir)
+        try:
+            with os.fdopen(tmphandle, mode) as tmpfile:
+                writefunction(tmpfile)
+            os.rename(tmpname, filename)
+        except Exception:
+            os.remove(tmpname)
+            raise
+
+    ## Return the stored content hash of a Touchstone file,
+    # if its modification time and size did not change
+    # @param touchstone Path of the Touchstone file
+    # @return Content hash or None
+    def get_hash(self, touchstone):
+        infofile = self.__get_info_path(touchstone)
+        if not os.path.isfile(infofile):
+            return None
+        stat = os.stat(touchstone)
+        try:
+            with open(infofile, 'r') as infohandle:
+                fileinfo = json.load(infohandle)
+        except ValueError:
+            # damaged entry, hash again
+            return None
+        if (fileinfo['mtime'], fileinfo['size']) != \
+                (stat.st_mtime, stat.st_size):
+            return None
+        return str(fileinfo['contenthash'])
+
+    ## Store the content hash of a Touchstone file
+    # @param touchstone Path of the Touchstone file
+    # @param contenthash Content hash of the file
+    def set_hash(self, touchstone, contenthash):
+        stat = os.stat(touchstone)
+        fileinfo = {'mtime': stat.st_mtime, 'size': stat.st_size,
+                    'contenthash': contenthash}
+        self.__save_atomic(self.__get_info_path(touchstone),
+                           lambda infohandle: json.dump(fileinfo, infohandle),
+                           'w')
+
+    ## Return the S-Matrix of a file content memory-mapped from the cache
+    # @param contenthash Content hash of the Touchstone file
+    # @return Read only NumPy array of shape (frequency points, ports, ports)
+    # or None if the content is not cached
+    def get_sdata(self, contenthash):
+        sfile = self.__get_path(contenthash, '.npy')
+        if not (os.path.isfile(sfile) and
+                os.path.isfile(self.__get_path(contenthash, '.npz'))):
+            return None
+        return np.load(sfile, mmap_mode='r')
+
+    ## Return single traces of a file content memory-mapped from the cache,
+    # without creating a Network
+    # @param contenthash Content hash of the Touchstone file
+    # @param indexes List of S-Parameter tuples (m,n) starting at 1
+    # @return Tuple (frequency vector in Hz, dictionary of read only
+    # complex NumPy arrays indexed by the tuples), traces not cached are
+    # missing in the dictionary, (None, {}) if the content is not cached
+    def get_traces(self, contenthash, indexes):
+        try:
+            with np.load(self.__get_path(contenthash, '.npz')) as meta:
+                f = meta['f']
+        except (IOError, ValueError, KeyError):
+            # not cached or damaged entry
+            return None, {}
+        sdata = self.get_sdata(contenthash)
+        traces = {}
+        for index in indexes:
+            tracefile = self.__get_trace_path(contenthash, index)
+            if sdata is not None:
+                # column view, only this trace is read from the disk
+                traces[index] = sdata[:, int(index[0]) - 1, int(index[1]) - 1]
+            elif os.path.isfile(tracefile):
+                try:
+                    traces[index] = np.load(tracefile, mmap_mode='r')
+                except (IOError, ValueError):
+                    # damaged entry, read again
+                    pass
+        return f, traces
+
+    ## Load a Network from the cache, the Network holds a copy of the
+    # full S-Matrix, use get_traces to read single traces
+    # @param contenthash Content hash of the Touchstone file
+    # @param name Name of the Network
+    # @return Network Object from scikit-rf
+    # or None if the content is not cached
+    def load(self, contenthash, name):
+        sdata = self.get_sdata(contenthash)
+        if sdata is None:
+            return None
+        try:
+            with np.load(self.__get_path(contenthash, '.npz')) as meta:
+                return create_network(meta['f'], sdata, meta['z0'], name)
+        except (IOError, ValueError, KeyError):
+            # damaged entry, parse again
+            return None
+
+    ## Save single traces read from a Touchstone file to the cache
+    # @param contenthash Content hash of the Touchstone file
+    # @param f Frequency vector in Hz
+    # @param z0 Complex port impedances of shape (frequency points, ports)
+    # @param traces Dictionary of complex NumPy arrays indexed by
+    # S-Parameter tuples (m,n) starting at 1
+    def save_traces(self, contenthash, f, z0, traces):
+        for index, trace in traces.items():
+            self.__save_atomic(
+                self.__get_trace_path(contenthash, index),
+                lambda tracefile: np.save(tracefile,
+                                          np.ascontiguousarray(trace)))
+        # traces first, the metadata file makes them visible
+        metafile = self.__get_path(contenthash, '.npz')
+        if not os.path.isfile(metafile):
+            self.__save_atomic(
+                metafile, lambda meta: np.savez(meta, f=f, z0=z0))
+
+    ## Save a parsed Network to the cache
+    # @param network Network Object from scikit-rf
+    # @param contenthash Content hash of the Touchstone file
+    # the Network was parsed from
+    def save(self, network, contenthash):
+        # S-Matrix first, the metadata file marks a complete entry
+        self.__save_atomic(
+            self.__get_path(contenthash, '.npy'),
+            lambda sfile: np.save(sfile, np.ascontiguousarray(network.s)))
+        self.__save_atomic(
+            self.__get_path(contenthash, '.npz'),
+            lambda metafile: np.savez(metafile, f=network.f, z0=network.z0))
@@ -0,0 +1,191 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package profiler
+# Provides the opt-in #profiler::ClassProfiler recording the wall time,
+# the CPU time and the memory of the stages of a Tikz creation.
+#
+# Profiling is enabled by the environment variable TIKZPROFILE=1
+# or by #profiler::enable_profiling, for example by
+# makeprojecttikz.py --profile. Disabled stages cost nearly nothing.
+#
+# The recorded stages are written in the Chrome trace event format,
+# which can be opened in chrome://tracing or https://ui.perfetto.dev
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:
+    # not available on Windows, the memory is not recorded
+    resource = None
+
+
+## Environment variable enabling the profiling
+profileenv = 'TIKZPROFILE'
+
+
+## Return the CPU time of the process
+# @return User and system time in seconds
+def get_cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+## Return the current memory of the process
+# @return Resident set size in kB or None if unknown,
+# only available on Linux
+def get_current_rss():
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            pages = int(statm.read().split()[1])
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+    return pages * (os.sysconf('SC_PAGE_SIZE') // 1024)
+
+
+## Return the peak memory of the process over its whole lifetime,
+# which is the same for all stages after the largest one
+# @return Peak resident set size in kB or None if unknown
+def get_process_peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # macOS reports bytes instead of kB
+        peak //= 1024
+    return peak
+
+
+## @class ClassProfiler
+# Records stages as Chrome trace events
+class ClassProfiler(object):
+
+    ## Constructor
+    # @param enabled Record stages - default False
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        # Recorded trace events
+        self.__events = []
+        # Stages may be recorded by multiple threads
+        self.__lock = threading.Lock()
+
+    ## Context manager recording one stage
+    # @param name Name of the stage, for example 'parse'
+    # @param category Category of the stage, for example 'file' or 'plot'
+    # @param args Further information shown with the stage,
+    # for example the file name
+    @contextmanager
+    def stage(self, name, category='stage', **args):
+        if not self.enabled:
+            yield
+            return
+        start = time.time()
+        cpustart = get_cpu_time()
+        rssstart = get_current_rss()
+        try:
+            yield
+        finally:
+            end = time.time()
+            rssend = get_current_rss()
+            args['cpu_ms'] = round((get_cpu_time() - cpustart) * 1e3, 3)
+            args['rss_kb'] = rssend
+            args['rss_delta_kb'] = None if rssend is None \
+                else rssend - rssstart
+            args['process_peak_rss_kb'] = get_process_peak_rss()
+            event = {
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': int(start * 1e6), 'dur': int((end - start) * 1e6),
+                'pid': os.getpid(), 'tid': threading.current_thread().ident,
+                'args': args}
+            with self.__lock:
+                self.__events.append(event)
+
+    ## Return and forget all recorded events,
+    # so a worker process can hand them to the process writing the trace
+    # @return List of trace events
+    def pop_events(self):
+        with self.__lock:
+            events = self.__events
+            self.__events = []
+            return events
+
+    ## Add events recorded by another process
+    # @param events List from pop_events of the other process
+    def add_events(self, events):
+        with self.__lock:
+            self.__events.extend(events)
+
+    ## Write all recorded events to a Chrome trace file
+    # @param filename Path of the trace file
+    def write_trace(self, filename):
+        with self.__lock:
+            events = sorted(self.__events, key=lambda event: event['ts'])
+        with open(filename, 'w') as tracefile:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                      tracefile)
+
+    ## Print the summed wall and CPU time per stage, the largest memory
+    # growth during one call of the stage and the largest memory at its end
+    def print_summary(self):
+        with self.__lock:
+            events = list(self.__events)
+        stages = {}
+        for event in events:
+            wall, cpu, delta, rss, count = stages.get(
+                event['name'], (0, 0, 0, 0, 0))
+            stages[event['name']] = (
+                wall + event['dur'] / 1e6, cpu + event['args']['cpu_ms'] / 1e3,
+                max(delta, event['args']['rss_delta_kb'] or 0),
+                max(rss, event['args']['rss_kb'] or 0), count + 1)
+        print('%-28s%8s%12s%12s%14s%14s' %
+              ('stage', 'count', 'wall', 'cpu', 'rss growth', 'rss'))
+        for name in sorted(stages, key=lambda name: -stages[name][0]):
+            wall, cpu, delta, rss, count = stages[name]
+            print('%-28s%8d%11.3fs%11.3fs%11.1f MB%11.1f MB' %
+                  (name, count, wall, cpu, delta / 1024.0, rss / 1024.0))
+
+
+## Profiler shared by the whole process
+profiler = ClassProfiler(os.environ.get(profileenv, '') not in ('', '0'))
+
+
+## Enable the process wide #profiler
+# @param enabled Record stages - default True
+def enable_profiling(enabled=True):
+    profiler.enabled = enabled
+
+
+## Record one stage with the process wide #profiler
+# @param name Name of the stage
+# @param category Category of the stage - default 'stage'
+# @param args Further information shown with the stage
+# @return Context manager
+def stage(name, category='stage', **args):
+    return profiler.stage(name, category, **args)
+
+
+## Decorator recording every call of a function as stage
+# named like the function
+# @param category Category of the stage
+# @return Decorator
+def profiled(category='stage'):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            with profiler.stage(function.__name__, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
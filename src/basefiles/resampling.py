@@ -0,0 +1,112 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package resampling
+# Provides the resampling of traces measured on different frequency grids
+# to a common grid.
+#
+# The linear interpolation between a source and a target grid is
+# described by a #resampling::ClassInterpolationPlan with one index and
+# one weight array. A plan is built only once per pair of grids and
+# applied to all traces of every network with the same grid in one
+# vectorized operation.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from profiler import stage
+
+
+## @class ClassInterpolationPlan
+# Linear interpolation from a source grid to a target grid
+class ClassInterpolationPlan(object):
+
+    ## Constructor, computes the index and weight arrays
+    # @param source Increasing NumPy array with the source grid
+    # @param target NumPy array with the target grid, values outside of
+    # @parname{source} get the value of the nearest end point
+    def __init__(self, source, target):
+        source = np.asarray(source, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        if len(source) < 2:
+            raise ValueError('Variable source must contain at least two points!')
+        self.npoints = len(source)
+        # left neighbour of every target point and its weight
+        self.indexes = np.clip(np.searchsorted(source, target, side='right')
+                               - 1, 0, len(source) - 2)
+        left = source[self.indexes]
+        self.weights = np.clip(
+            (target - left) / (source[self.indexes + 1] - left), 0, 1)
+
+    ## Interpolate data given on the source grid
+    # @param data NumPy array with the source grid along @parname{axis},
+    # for example traces of shape (traces, points)
+    # @param axis Axis of the frequency points - default -1
+    # @return NumPy array with the target grid along @parname{axis}
+    def apply(self, data, axis=-1):
+        data = np.asarray(data)
+        if data.shape[axis] != self.npoints:
+            raise ValueError('The data does not match the source grid of the plan!')
+        shape = [1] * data.ndim
+        shape[axis] = len(self.weights)
+        weights = self.weights.reshape(shape)
+        return np.take(data, self.indexes, axis=axis) * (1 - weights) + \
+            np.take(data, self.indexes + 1, axis=axis) * weights
+
+
+## Plans already built indexed by the keys of their grids,
+# least recently used first
+plancache = OrderedDict()
+
+## Maximum number of cached plans
+maxplans = 64
+
+
+## Return an identifying key of a grid
+# @param grid NumPy array
+# @return Tuple of the length and the hash of the values
+def get_grid_key(grid):
+    grid = np.ascontiguousarray(grid, dtype=np.float64)
+    return len(grid), hashlib.sha1(grid.tobytes()).hexdigest()
+
+
+## Return the interpolation plan between two grids,
+# built only on the first request
+# @param source Increasing NumPy array with the source grid
+# @param target NumPy array with the target grid
+# @return ClassInterpolationPlan object
+def get_interpolation_plan(source, target):
+    key = (get_grid_key(source), get_grid_key(target))
+    plan = plancache.pop(key, None)
+    if plan is None:
+        with stage('plan', points=len(target)):
+            plan = ClassInterpolationPlan(source, target)
+        while len(plancache) >= maxplans:
+            plancache.popitem(last=False)
+    # (re)insert as most recently used
+    plancache[key] = plan
+    return plan
+
+
+## Return a common grid of several grids
+# @param grids List of increasing NumPy arrays
+# @return The first grid if all grids are equal, else an equidistant grid
+# over the overlapping range with as many points as the densest grid has
+# in this range
+def get_common_grid(grids):
+    first = np.asarray(grids[0])
+    if all(len(grid) == len(first) and np.allclose(grid, first)
+           for grid in grids[1:]):
+        return first
+    start = max(grid[0] for grid in grids)
+    stop = min(grid[-1] for grid in grids)
+    if start >= stop:
+        raise ValueError('The frequency grids do not overlap!')
+    npoints = max(np.count_nonzero((grid >= start) & (grid <= stop))
+                  for grid in grids)
+    return np.linspace(start, stop, max(npoints, 2))
@@ -0,0 +1,307 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package sparaextract
+# Provides the #sparaextract::ClassSparaExtract to extract the traces
+# of a scikit-rf Network as NumPy arrays.
+#
+# The dB and degree representations of the full S-Matrix are computed
+# only once per network. Every requested trace is a column view
+# into these arrays, so no data is copied per frequency point.
+#
+# For a #touchstonereader::ClassTouchstoneReader only the requested
+# traces are read from the file and converted, so the full S-Matrix
+# is never held in memory. A #lazynetwork::ClassLazyNetwork is read the
+# same way and parses the full S-Matrix only if it is requested.
+#
+# The #sparaextract::ClassSparaStack stacks the traces of many networks
+# on a common frequency grid, for example to plot the envelope of a
+# production lot instead of one curve per unit. Networks measured on
+# different grids are resampled to the common grid with the cached
+# interpolation plans of #resampling.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import numpy as np
+from skrf import Network
+from tikzhelpers import get_frequnits
+from touchstonereader import ClassTouchstoneReader
+from lazynetwork import ClassLazyNetwork
+from resampling import get_common_grid, get_grid_key, get_interpolation_plan
+from profiler import stage
+
+
+## @class ClassSparaExtract
+# Extraction layer between a scikit-rf Network and the design scripts.
+class ClassSparaExtract(object):
+
+    ## Possible units of the extracted y data with the name of the
+    # corresponding scikit-rf Network property
+    __unities = {
+        'dB': 's_db',
+        'deg': 's_deg'
+    }
+
+    ## Constructor
+    # @param network Network Object from scikit-rf,
+    # ClassTouchstoneReader reading only the requested traces or
+    # ClassLazyNetwork reading the requested traces on first access
+    def __init__(self, network):
+        self.network = network
+        self.name = network.name
+        self.nports = network.nports
+        self.reader = None
+        if type(network) is ClassTouchstoneReader:
+            self.reader = network
+            self.network = None
+        elif type(network) is ClassLazyNetwork:
+            # traces are read like by a reader,
+            # the full S-Matrix is still available
+            self.reader = network
+        # Scaled frequency vectors indexed by frequnit
+        self.__xdata = {}
+        # Full S-Matrix arrays indexed by unity
+        self.__sdata = {}
+        # Complex traces read by the reader indexed by S-Parameter tuple
+        self.__columns = {}
+        # Already extracted traces indexed by (index, unity)
+        self.__traces = {}
+
+    ## Return the frequency vector scaled to @parname{frequnit}.\n
+    # A reader reads the frequency vector together with the traces,
+    # call get_traces first so the file is read only once.
+    # @param frequnit The unit of the frequency values - String default 'GHz'
+    # @return NumPy array with the frequency values
+    def get_xdata(self, frequnit='GHz'):
+        if frequnit not in self.__xdata:
+            if self.reader is not None:
+                f = self.reader.get_frequency()
+            else:
+                f = self.network.f
+            self.__xdata[frequnit] = f / get_frequnits()[frequnit]
+        return self.__xdata[frequnit]
+
+    ## Return the full S-Matrix in the given unity,
+    # computed only on the first call, not available for a
+    # ClassTouchstoneReader
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return NumPy array of shape (frequency points, ports, ports)
+    def get_sdata(self, unity='dB'):
+        if unity not in self.__unities:
+            raise ValueError('Innapropriate Unit for Y-Data in unity variable!')
+        if self.network is None:
+            raise TypeError('The full S-Matrix of ' + self.name +
+                            ' is not read by a ClassTouchstoneReader!')
+        if unity not in self.__sdata:
+            with stage('extraction', unity=unity, network=self.name):
+                self.__sdata[unity] = getattr(self.network,
+                                              self.__unities[unity])
+        return self.__sdata[unity]
+
+    ## Return the y data of one trace
+    # @param index S-Parameter tuple (m,n) starting at 1 or 'D' for
+    # the directivity S31 - (S21 + S32) in dB
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return NumPy array with one value per frequency point
+    def get_trace(self, index, unity='dB'):
+        key = (index, unity)
+        if key in self.__traces:
+            return self.__traces[key]
+        if unity not in self.__unities:
+            raise ValueError('Innapropriate Unit for Y-Data in unity variable!')
+        if type(index) is tuple and self.reader is not None:
+            self.__read_columns([index])
+            column = self.__columns[index]
+            with stage('extraction', unity=unity, network=self.name):
+                if unity == 'dB':
+                    trace = 20 * np.log10(np.abs(column))
+                else:
+                    trace = np.angle(column, deg=True)
+        elif type(index) is tuple:
+            # column view, no data is copied
+            trace = self.get_sdata(unity)[:, int(index[0]) - 1,
+                                          int(index[1]) - 1]
+        elif index == 'D':
+            trace = self.get_trace((3, 1)) - \
+                (self.get_trace((2, 1)) + self.get_trace((3, 2)))
+        else:
+            raise TypeError("Innapropriate Type for indexes element must be S-Param tuple or a known String!")
+        self.__traces[key] = trace
+        return trace
+
+    ## Return the y data of multiple traces
+    # @param indexes List of S-Parameter tuples or 'D'
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return List of NumPy arrays in the order of @parname{indexes}
+    def get_traces(self, indexes, unity='dB'):
+        if self.reader is not None:
+            # read all missing traces in one pass over the file
+            columns = []
+            for index in indexes:
+                if index == 'D':
+                    columns.extend([(3, 1), (2, 1), (3, 2)])
+                elif type(index) is tuple:
+                    columns.append(index)
+            self.__read_columns(columns)
+        return [self.get_trace(index, unity) for index in indexes]
+
+    ## Read the complex traces not read yet by the reader
+    # @param indexes List of S-Parameter tuples
+    def __read_columns(self, indexes):
+        missing = [index for index in indexes if index not in self.__columns]
+        if missing:
+            self.__columns.update(self.reader.read(missing))
+
+
+## Return the extraction layer of a Network for a design script
+# @param network Network Object from scikit-rf, ClassTouchstoneReader,
+# ClassLazyNetwork or ClassSparaExtract, which is returned unchanged so
+# its traces are shared by several plots
+# @return ClassSparaExtract object
+def get_extract(network):
+    if type(network) is ClassSparaExtract:
+        return network
+    if type(network) in (Network, ClassTouchstoneReader, ClassLazyNetwork):
+        return ClassSparaExtract(network)
+    raise TypeError("Wrong data type for sparam! Must be skrf Network, ClassTouchstoneReader, ClassLazyNetwork or ClassSparaExtract.")
+
+
+## @class ClassSparaStack
+# Stacks the traces of many networks on a common frequency grid into
+# one array, so statistics over a whole production lot are single
+# NumPy reductions instead of loops over the networks.
+# Networks with another grid are resampled linearly to the common grid.
+class ClassSparaStack(object):
+
+    ## Constructor
+    # @param networks List of Network Objects from scikit-rf,
+    # ClassTouchstoneReader, ClassLazyNetwork or ClassSparaExtract objects
+    def __init__(self, networks):
+        if not networks:
+            raise ValueError('Variable networks must not be empty!')
+        self.extracts = [get_extract(network) for network in networks]
+        self.names = [extract.name for extract in self.extracts]
+        # Common frequency grid in Hz
+        self.__grid = None
+        # Stacked traces indexed by (indexes, unity)
+        self.__traces = {}
+
+    ## Return the number of stacked networks
+    def __len__(self):
+        return len(self.extracts)
+
+    ## Check if all networks share the frequency grid of the first one
+    # @return True if the traces can be stacked without resampling
+    def has_common_grid(self):
+        xdata = self.extracts[0].get_xdata('Hz')
+        for extract in self.extracts[1:]:
+            other = extract.get_xdata('Hz')
+            if len(other) != len(xdata) or not np.allclose(other, xdata):
+                return False
+        return True
+
+    ## Return the common frequency vector, the grid of the networks if
+    # they share one, else an equidistant grid over the overlapping range
+    # (see resampling::get_common_grid)
+    # @param frequnit The unit of the frequency values - String default 'GHz'
+    # @return NumPy array with the frequency values
+    def get_xdata(self, frequnit='GHz'):
+        if self.has_common_grid():
+            return self.extracts[0].get_xdata(frequnit)
+        if self.__grid is None:
+            self.__grid = get_common_grid(
+                [extract.get_xdata('Hz') for extract in self.extracts])
+        return self.__grid / get_frequnits()[frequnit]
+
+    ## Stack data of all networks and resample it to the common grid.
+    # Networks sharing a grid are resampled together by one cached
+    # interpolation plan in one vectorized operation.
+    # @param getdata Function returning the data of an extract with the
+    # frequency points along @parname{axis}
+    # @param axis Axis of the frequency points in the data of one network
+    # @return NumPy array with the data of all networks along the first axis
+    def __stack(self, getdata, axis):
+        data = [getdata(extract) for extract in self.extracts]
+        if self.has_common_grid():
+            return np.array(data)
+        grid = self.get_xdata('Hz')
+        groups = {}
+        for i, extract in enumerate(self.extracts):
+            groups.setdefault(get_grid_key(extract.get_xdata('Hz')),
+                              []).append(i)
+        stacked = None
+        with stage('resample', networks=len(self.extracts),
+                   grids=len(groups)):
+            for members in groups.values():
+                source = self.extracts[members[0]].get_xdata('Hz')
+                resampled = get_interpolation_plan(source, grid).apply(
+                    np.array([data[i] for i in members]), axis + 1)
+                if stacked is None:
+                    stacked = np.empty((len(data),) + resampled.shape[1:],
+                                       dtype=resampled.dtype)
+                stacked[members] = resampled
+        return stacked
+
+    ## Return the full S-Matrices of all networks in one array,
+    # not available for networks read by a ClassTouchstoneReader
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return NumPy array of shape (networks, frequency points, ports, ports)
+    def get_sdata(self, unity='dB'):
+        return self.__stack(lambda extract: extract.get_sdata(unity), 0)
+
+    ## Return the y data of some traces of all networks in one array,
+    # only the requested traces are stacked
+    # @param indexes List of S-Parameter tuples or 'D'
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return NumPy array of shape (networks, indexes, frequency points)
+    def get_traces(self, indexes, unity='dB'):
+        key = (tuple(indexes), unity)
+        if key not in self.__traces:
+            with stage('stack', unity=unity, networks=len(self.extracts)):
+                self.__traces[key] = self.__stack(
+                    lambda extract: extract.get_traces(indexes, unity), 1)
+        return self.__traces[key]
+
+    ## Return the envelope of some traces over all networks
+    # @param indexes List of S-Parameter tuples or 'D'
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return Tuple (minimum, maximum, mean) of NumPy arrays of shape
+    # (indexes, frequency points)
+    def get_envelope(self, indexes, unity='dB'):
+        traces = self.get_traces(indexes, unity)
+        return traces.min(axis=0), traces.max(axis=0), traces.mean(axis=0)
+
+    ## Return percentiles of some traces over all networks,
+    # all percentiles are computed in one pass
+    # @param indexes List of S-Parameter tuples or 'D'
+    # @param percentiles List of percentiles between 0 and 100
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return NumPy array of shape (percentiles, indexes, frequency points)
+    def get_percentiles(self, indexes, percentiles, unity='dB'):
+        with stage('percentiles', networks=len(self.extracts)):
+            return np.percentile(self.get_traces(indexes, unity),
+                                 percentiles, axis=0)
+
+    ## Return the statistical bands of some traces over all networks
+    # @param indexes List of S-Parameter tuples or 'D'
+    # @param mode 'minmax' for the range and the mean or 'percentiles'
+    # for the range, the 5th to 95th percentile and the median
+    # @param unity Unit of the y data - String 'dB' or 'deg'
+    # @return Tuple (bands, center): bands is a list of (name, lower, upper)
+    # from the outer to the inner band, center is a tuple (name, values).
+    # All values are arrays of shape (indexes, frequency points).
+    def get_bands(self, indexes, mode='minmax', unity='dB'):
+        if mode == 'minmax':
+            lower, upper, meantrace = self.get_envelope(indexes, unity)
+            return [('Range', lower, upper)], ('Mean', meantrace)
+        if mode == 'percentiles':
+            lower, plower, median, pupper, upper = self.get_percentiles(
+                indexes, [0, 5, 50, 95, 100], unity)
+            return [('Range', lower, upper),
+                    ('5th to 95th percentile', plower, pupper)], \
+                ('Median', median)
+        raise ValueError('Unknown envelope mode ' + str(mode) +
+                         '! Must be minmax or percentiles')
@@ -10,6 +10,16 @@
 # @author lukasl93
 
 import os
+import time
+import hashlib
+import tempfile
+from glob import glob
+import numpy as np
+
+
+## Format of single numbers in the Tikz code like axis limits and paths,
+# the same on all Python versions like str() of Python 2
+numberformat = '%.12g'
 
 
 ## Dictionary to calculate data in the given unit from Hz
@@ -30,42 +40,248 @@ def mean(numbers):
     return float(sum(numbers)) / max(len(numbers), 1)
 
 
+## Calculate the statistics of many traces in one vectorized reduction
+# @param traces List of arrays with the y values of each trace or
+# array of shape (traces, points)
+# @return Tuple (minima, maxima, lower means, higher means) of lists with
+# one value per trace, the means are taken over the first and the second
+# half of the points
+def get_trace_stats(traces):
+    if not len(traces):
+        return [], [], [], []
+    lengths = set(len(trace) for trace in traces)
+    if len(lengths) > 1:
+        # traces of different lengths are reduced one by one
+        stats = [get_trace_stats([trace]) for trace in traces]
+        return tuple([stat[i][0] for stat in stats] for i in range(4))
+    npoints = lengths.pop()
+    if not npoints:
+        raise ValueError('Variable traces must not contain empty traces!')
+    data = np.asarray(traces, dtype=np.float64).reshape(-1, npoints)
+    half = npoints // 2
+    if half:
+        lmeans = data[:, :half].mean(axis=1)
+    else:
+        lmeans = np.zeros(data.shape[0])
+    hmeans = data[:, half:].mean(axis=1)
+    return (list(data.min(axis=1)), list(data.max(axis=1)),
+            list(lmeans), list(hmeans))
+
+
+## Calculate the y axis range and the legend position of a plot
+# @param min_values Minima of all traces and requirements
+# @param max_values Maxima of all traces and requirements
+# @param lmeans Means of the first half of all traces and requirements
+# @param hmeans Means of the second half of all traces and requirements
+# @param lowerlimit Lower values are cut off due to non validity of
+# measurement values for S-Parameters - default -40
+# @return Tuple (lower y value, upper y value, index of the legend position
+# in TikzExport::ClassTikzExport::get_legendpositions)
+def get_axis_layout(min_values, max_values, lmeans, hmeans, lowerlimit=-40):
+    max_value = max(max_values)
+    min_value = min(min_values)
+    if lowerlimit is not None and min_value < lowerlimit:
+        min_value = lowerlimit
+
+    # range to add above and below the graph in y direction
+    yaddr = int((max_value - min_value) * 0.1)
+    if yaddr < 0.5:
+        yaddr = 0.5
+
+    # value of the middle of the y axis
+    ymid = min_value + (max_value - min_value) / 2.0
+    # chose quarter of the plot for the legendposition
+    # where the graphs have the minimum mean distance
+    # to the middle of the plot
+    # 1 | 0
+    # ----- plotmiddle
+    # 2 | 3
+    legenddec = [max(hmeans) - ymid, max(lmeans) - ymid,
+                 ymid - min(lmeans), ymid - min(hmeans)]
+    return min_value - yaddr, max_value + yaddr, \
+        legenddec.index(min(legenddec))
+
+
+## Format a single number for the Tikz code with #numberformat
+# @param value Number
+# @return String with the formatted number
+def format_number(value):
+    return numberformat % value
+
+
 ## Create a pathstring from ClassData2D list
-# @param data ClassData2D list
+# @param data ClassData2D list or ClassGraphData
 # @return Tikz pathstring for Requirement type indicators
 def get_path_data_string(data):
-    returnstring = '(' + str(data[0].xvalue) + ',' + str(data[0].yvalue) + ')'
-    for i in range(1, len(data), 1):
-        returnstring += \
-            '--(' + str(data[i].xvalue) + ',' + str(data[i].yvalue) + ')'
-    return returnstring
+    return '--'.join(
+        '(' + format_number(date.xvalue) + ',' + format_number(date.yvalue) +
+        ')' for date in data)
 
 
-def createImportFile(filename, content):
+## Return the date written to the header of the Tikz files
+# @return Date String in the format '2017-03-29' of the environment variable
+# SOURCE_DATE_EPOCH (seconds since 1970 in UTC) for reproducible builds,
+# the current date if it is not set
+def get_header_date():
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return time.strftime('%Y-%m-%d', time.gmtime(int(epoch)))
+    return time.strftime('%Y-%m-%d', time.localtime())
+
+
+## Return the files matching a pattern in a stable order, which does not
+# depend on the file system like the order of glob
+# @param pattern Glob pattern
+# @return Sorted list of paths
+def get_sorted_glob(pattern):
+    return sorted(glob(pattern))
+
+
+## Format x and y arrays into the rows of a Tikz data table in one pass
+# @param xdata Array or list with the x values
+# @param ydata Array or list with the y values,
+# same length as @parname{xdata}
+# @param numformat printf style format of the y values - String default '%.6g'
+# @param separator Separator between x and y value - String default tab
+# @param lineend Lineend of each row - String default Latex linefeed
+# @param xnumformat printf style format of the x values - String default
+# #numberformat, so dense frequency sweeps keep distinct x values
+# @return String with one row per point, each row starting with a newline
+def format_table_data(xdata, ydata, numformat='%.6g', separator='\t',
+                      lineend=r'\\', xnumformat=numberformat):
+    xdata = np.asarray(xdata, dtype=np.float64)
+    ydata = np.asarray(ydata, dtype=np.float64)
+    if len(xdata) != len(ydata):
+        raise ValueError('Variables xdata and ydata must have the same length!')
+    # interleave x and y to apply one format string to all values at once
+    values = np.empty(2 * len(xdata), dtype=np.float64)
+    values[0::2] = xdata
+    values[1::2] = ydata
+    rowformat = '\n' + xnumformat + separator.replace('%', '%%') + \
+        numformat + lineend.replace('%', '%%')
+    return (rowformat * len(xdata)) % tuple(values.tolist())
+
+
+## Reduce traces to a point budget keeping their visual shape.
+# The inner points are split into buckets and of each bucket only the
+# minimum and the maximum are kept in their original order, so no peak or
+# notch gets lost. The first and the last point are always kept.
+# All traces are processed at once.
+# @param xdata Array with the x values of all traces
+# @param ydata Array of shape (traces, points) or (points,) with the y values
+# @param maxpoints Maximum number of points per trace,
+# at least 4 - None keeps all points
+# @return Tuple (xdata, ydata) of arrays with the shape of @parname{ydata}
+# and the reduced number of points
+def decimate_minmax(xdata, ydata, maxpoints=None):
+    xdata = np.asarray(xdata)
+    ydata = np.asarray(ydata)
+    npoints = ydata.shape[-1]
+    if maxpoints is None or npoints <= maxpoints:
+        return np.broadcast_to(xdata, ydata.shape), ydata
+    if maxpoints < 4:
+        raise ValueError('Variable maxpoints must be at least 4!')
+    traces = ydata.reshape(-1, npoints)
+    inner = npoints - 2
+    # two points per bucket of equal size, the last bucket is padded
+    # with its last value which never moves the first minimum or maximum
+    bucketsize = -(-inner // ((maxpoints - 2) // 2))
+    nbuckets = -(-inner // bucketsize)
+    buckets = np.empty((traces.shape[0], nbuckets * bucketsize))
+    buckets[:, :inner] = traces[:, 1:-1]
+    buckets[:, inner:] = traces[:, -2:-1]
+    buckets = buckets.reshape(traces.shape[0], nbuckets, bucketsize)
+    offsets = 1 + bucketsize * np.arange(nbuckets)
+    imin = offsets + np.argmin(buckets, axis=2)
+    imax = offsets + np.argmax(buckets, axis=2)
+    indexes = np.empty((traces.shape[0], 2 * nbuckets + 2), dtype=np.intp)
+    indexes[:, 0] = 0
+    indexes[:, 1:-1:2] = np.minimum(imin, imax)
+    indexes[:, 2:-1:2] = np.maximum(imin, imax)
+    indexes[:, -1] = npoints - 1
+    rows = np.arange(traces.shape[0])[:, np.newaxis]
+    shape = ydata.shape[:-1] + (indexes.shape[1],)
+    return xdata[indexes].reshape(shape), \
+        traces[rows, indexes].reshape(shape)
+
+
+## Calculate the hash of the content of a file
+# @param filename Path of the file
+# @return SHA-1 hexdigest of the file content
+def get_file_hash(filename):
+    filehash = hashlib.sha1()
+    with open(filename, 'rb') as hashfile:
+        for block in iter(lambda: hashfile.read(1 << 20), b''):
+            filehash.update(block)
+    return filehash.hexdigest()
+
+
+## Return the full path of an output file
+# @param filename Name of the file relative to the basefiles folder
+# or full path of the file
+# @return Full path of the file
+def getOutputPath(filename):
     if not os.path.isabs(filename):
-        importfile = open(
-            os.path.join(os.path.dirname(__file__), filename), 'a')
-    elif os.path.isabs(filename):
-        if os.path.isdir(os.path.dirname(filename)):
-            importfile = open(filename, 'a')
-        else:
-            raise IOError('Path not existent. Please create the Folders and run again!\nPath: ' + filename)
+        return os.path.join(os.path.dirname(__file__), filename)
+    elif os.path.isdir(os.path.dirname(filename)):
+        return filename
     else:
-        raise ValueError('Variable filename contains no valid type, value or whatever!')
+        raise IOError('Path not existent. Please create the Folders and run again!\nPath: ' + filename)
+
+
+## Return the options of TikzExport::ClassTikzExport for the Tikz files
+# of a result directory
+# @param resultdir Directory of the Tikz files
+# @param datafolder Subfolder of @parname{resultdir} for the shared .dat
+# files of the graphs - None embeds the data in the Tikz files
+# @param texdir Path of @parname{resultdir} as seen from the Latex
+# document - String default 'tikz' as in the \\instikz command
+# @return Dictionary of keyword arguments of ClassTikzExport
+def get_export_options(resultdir, datafolder=None, texdir='tikz'):
+    if datafolder is None:
+        return {}
+    return {'datadir': os.path.join(resultdir, datafolder),
+            'dataprefix': texdir + '/' + datafolder}
+
+
+## Open a file to write the created output to
+# @param filename Name of the file relative to the basefiles folder
+# or full path of the file
+# @param mode Mode to open the file with - String default 'w'
+# @return Opened file object
+def openOutputFile(filename, mode='w'):
+    return open(getOutputPath(filename), mode)
+
+
+def createImportFile(filename, content):
+    importfile = openOutputFile(filename, 'a')
     importfile.write(content)
     importfile.close()
 
 
 def clearImportFile(filename):
-    if not os.path.isabs(filename):
-        importfile = open(
-            os.path.join(os.path.dirname(__file__), filename), 'w')
-    elif os.path.isabs(filename):
-        if os.path.isdir(os.path.dirname(filename)):
-            importfile = open(filename, 'w')
-        else:
-            raise IOError('Path not existent. Please create the Folders and run again!\nPath: ' + filename)
-    else:
-        raise ValueError('Variable filename contains no valid type, value or whatever!')
+    importfile = openOutputFile(filename, 'w')
     importfile.write('')
     importfile.close()
+
+
+## Write an import file at once with the Tex code of all jobs sorted
+# by a stable key, so the file does not depend on the job order.
+# The file is replaced atomically and only if its content changed.
+# @param filename Name of the file relative to the basefiles folder
+# or full path of the file
+# @param teximports List of (sort key, Tex code) tuples
+def writeImportFile(filename, teximports):
+    filename = getOutputPath(filename)
+    content = ''.join(teximport for _, teximport in sorted(teximports))
+    if os.path.isfile(filename):
+        with open(filename, 'r') as importfile:
+            if importfile.read() == content:
+                return
+    tmphandle, tmpname = tempfile.mkstemp(
+        suffix='.tex', dir=os.path.dirname(filename))
+    with os.fdopen(tmphandle, 'w') as tmpfile:
+        tmpfile.write(content)
+    # mkstemp creates the file readable for the owner only
+    os.chmod(tmpname, 0o644)
+    os.rename(tmpname, filename)
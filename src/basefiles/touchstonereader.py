@@ -0,0 +1,256 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package touchstonereader
+# Provides the #touchstonereader::ClassTouchstoneReader, a memory-mapped
+# reader for Touchstone (version 1) files of any size.
+#
+# The file is memory-mapped and parsed in chunks, only the columns of the
+# requested S-Parameters are kept. The memory needed is therefore
+# proportional to the selected traces and not to the full S-Matrix,
+# which allows plotting single traces of sweeps with millions of points
+# and many ports.
+#
+# The reader offers name and nports like a scikit-rf Network and is
+# accepted by #sparaextract::ClassSparaExtract and thereby by the
+# design scripts.
+#
+# @date Created on 18.10.2026\n
+#      Last edited 18.10.2026 by lukasl93
+#
+# @author lukasl93
+
+import mmap
+import os
+import re
+import numpy as np
+from profiler import stage
+
+
+## Multiplier of the frequency units of the option line to Hz
+frequnits = {
+    'HZ': 1e0,
+    'KHZ': 1e3,
+    'MHZ': 1e6,
+    'GHZ': 1e9
+}
+
+## Comments in the data section of a Touchstone file
+commentpattern = re.compile(b'![^\n]*')
+
+## Touchstone files with this extension are read by the reader
+touchstonepattern = re.compile(r'\.s(\d+)p$', re.IGNORECASE)
+
+
+## @class ClassTouchstoneReader
+# Reads selected S-Parameters of a Touchstone file chunk by chunk
+class ClassTouchstoneReader(object):
+
+    ## Constructor, reads only the header of the file
+    # @param touchstone Path of the Touchstone file, the extension .s<n>p
+    # defines the number of ports
+    # @param chunksize Bytes parsed at once - default 16 MiB
+    def __init__(self, touchstone, chunksize=1 << 24):
+        match = touchstonepattern.search(touchstone)
+        if match is None:
+            raise ValueError('Unknown Touchstone extension of ' + touchstone +
+                             '! Must be .s<n>p')
+        self.filename = touchstone
+        self.name = os.path.splitext(os.path.basename(touchstone))[0]
+        self.nports = int(match.group(1))
+        self.chunksize = chunksize
+        # Defaults of the option line
+        self.frequnit = 'GHZ'
+        self.format = 'MA'
+        self.z0 = 50.0
+        # Frequency vector in Hz, known after the first read
+        self.__f = None
+        # Byte offset of the first data line
+        self.__dataoffset = self.__read_header()
+
+    ## Parse the comments and the option line
+    # @return Byte offset of the first data line
+    def __read_header(self):
+        offset = 0
+        with open(self.filename, 'rb') as touchstone:
+            for line in touchstone:
+                content = line.split(b'!')[0].strip()
+                if content.startswith(b'['):
+                    raise ValueError('Touchstone version 2 keywords are not supported in ' + self.filename)
+                if content.startswith(b'#'):
+                    options = str(content[1:].decode('ascii')).upper().split()
+                    for i, option in enumerate(options):
+                        if option in frequnits:
+                            self.frequnit = option
+                        elif option in ('RI', 'MA', 'DB'):
+                            self.format = option
+                        elif option == 'R' and i + 1 < len(options):
+                            self.z0 = float(options[i + 1])
+                        elif option in ('Y', 'Z', 'H', 'G'):
+                            raise ValueError('Only S-Parameters are supported in ' + self.filename)
+                elif content:
+                    return offset
+                offset += len(line)
+        return offset
+
+    ## Return the position of an S-Parameter in a frequency record
+    # @param index S-Parameter tuple (m,n) starting at 1
+    # @return Index of the S-Parameter in the records without frequency
+    def __get_position(self, index):
+        m, n = int(index[0]), int(index[1])
+        if not (1 <= m <= self.nports and 1 <= n <= self.nports):
+            raise IndexError('S-Parameter ' + str(index) + ' not in ' +
+                             self.name + ' with ' + str(self.nports) +
+                             ' ports')
+        if self.nports == 2:
+            # 2-ports are written column wise: S11 S21 S12 S22
+            return (n - 1) * 2 + (m - 1)
+        return (m - 1) * self.nports + (n - 1)
+
+    ## Convert the value pairs of the file format to complex values
+    # @param first Real part, magnitude or magnitude in dB
+    # @param second Imaginary part or angle in degree
+    # @return Complex NumPy array
+    def __get_complex(self, first, second):
+        if self.format == 'RI':
+            return first + 1j * second
+        if self.format == 'DB':
+            first = 10 ** (first / 20.0)
+        return first * np.exp(1j * np.deg2rad(second))
+
+    ## Parse the values of a part of the data section
+    # @param chunk Bytes of complete lines
+    # @return NumPy array with all values of @parname{chunk}
+    def __parse_values(self, chunk):
+        if b'!' in chunk:
+            chunk = commentpattern.sub(b'', chunk)
+        try:
+            values = np.fromstring(chunk.decode('ascii'), sep=' ')
+        except ValueError:
+            # raised by newer NumPy versions at an invalid value
+            raise ValueError('Invalid value in the data of ' + self.filename)
+        # older NumPy versions stop silently at the first invalid value,
+        # so the values are compared to the number of words
+        if chunk:
+            space = np.frombuffer(chunk, dtype=np.uint8) <= 32
+            nwords = np.count_nonzero(space[:-1] & ~space[1:]) + \
+                (not space[0])
+        else:
+            nwords = 0
+        if values.size != nwords:
+            raise ValueError('Invalid value in the data of ' + self.filename)
+        return values
+
+    ## Return the first and the last frequency of the file,
+    # only the first and the last frequency record are parsed.
+    # Raises a ValueError for 2-ports with noise parameters, whose last
+    # record is not a frequency record.
+    # @param tailsize Bytes read at the end of the file at first -
+    # default 4 KiB, increased until the last record is complete
+    # @return Tuple (start frequency, stop frequency) in Hz
+    def get_frequency_range(self, tailsize=1 << 12):
+        if self.__f is not None:
+            return self.__f[0], self.__f[-1]
+        recordlength = 1 + 2 * self.nports ** 2
+        with open(self.filename, 'rb') as touchstone:
+            size = os.fstat(touchstone.fileno()).st_size
+            touchstone.seek(self.__dataoffset)
+            first = self.__parse_values(touchstone.readline())
+            while True:
+                start = max(size - tailsize, self.__dataoffset)
+                touchstone.seek(start)
+                tail = touchstone.read(size - start)
+                if start > self.__dataoffset:
+                    # complete lines only
+                    tail = tail[tail.find(b'\n') + 1:] \
+                        if b'\n' in tail else b''
+                values = self.__parse_values(tail)
+                if values.size >= recordlength or \
+                        start == self.__dataoffset:
+                    break
+                tailsize *= 4
+        if not first.size or values.size < recordlength:
+            raise ValueError('No data in ' + self.filename)
+        if self.nports == 2:
+            # the noise parameters of 2-ports follow the S-Parameters
+            # with 5 values per line, a frequency record is one line
+            lines = [line for line in
+                     commentpattern.sub(b'', tail).splitlines()
+                     if line.strip()]
+            if self.__parse_values(lines[-1]).size != recordlength:
+                raise ValueError('Noise parameters in ' + self.filename +
+                                 ' are not supported')
+        return first[0] * frequnits[self.frequnit], \
+            values[-recordlength] * frequnits[self.frequnit]
+
+    ## Return the frequency vector, the file is read once if not known yet
+    # @return NumPy array with the frequency values in Hz
+    def get_frequency(self):
+        if self.__f is None:
+            self.read([])
+        return self.__f
+
+    ## Read the requested S-Parameters in one pass over the file
+    # @param indexes List of S-Parameter tuples (m,n) starting at 1
+    # @return Dictionary of complex NumPy arrays indexed by the tuples
+    def read(self, indexes):
+        indexes = list(set(tuple(index) for index in indexes))
+        positions = [self.__get_position(index) for index in indexes]
+        recordlength = 1 + 2 * self.nports ** 2
+        # column of the first value of every S-Parameter in a record
+        columns = np.array([1 + 2 * position for position in positions],
+                           dtype=int)
+        f = []
+        traces = [[] for _ in indexes]
+        # values of an incomplete record at the end of a chunk
+        remainder = np.empty(0)
+
+        with stage('stream', file=self.name, traces=len(indexes)):
+            with open(self.filename, 'rb') as touchstone:
+                size = os.fstat(touchstone.fileno()).st_size
+                if size <= self.__dataoffset:
+                    raise ValueError('No data in ' + self.filename)
+                data = mmap.mmap(touchstone.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+                try:
+                    start = self.__dataoffset
+                    while start < size:
+                        end = min(start + self.chunksize, size)
+                        if end < size:
+                            # complete lines only
+                            end = data.rfind(b'\n', start, end) + 1
+                            if end <= start:
+                                end = data.find(b'\n', start + self.chunksize)
+                                end = size if end < 0 else end + 1
+                        chunk = data[start:end]
+                        if hasattr(data, 'madvise'):
+                            # parsed pages need not stay resident
+                            data.madvise(mmap.MADV_DONTNEED,
+                                         start - start % mmap.PAGESIZE,
+                                         end - start + start % mmap.PAGESIZE)
+                        start = end
+                        values = self.__parse_values(chunk)
+                        if remainder.size:
+                            values = np.concatenate((remainder, values))
+                        nrecords = values.size // recordlength
+                        remainder = values[nrecords * recordlength:]
+                        records = values[:nrecords * recordlength].reshape(
+                            nrecords, recordlength)
+                        f.append(records[:, 0].copy())
+                        for trace, column in zip(traces, columns):
+                            trace.append(self.__get_complex(
+                                records[:, column], records[:, column + 1]))
+                finally:
+                    data.close()
+
+        if remainder.size:
+            raise ValueError('Incomplete frequency record at the end of ' +
+                             self.filename + ', noise parameters are not supported')
+        f = np.concatenate(f)
+        if np.any(f[1:] <= f[:-1]):
+            # a noise block starts with a frequency not above the last one
+            raise ValueError('Frequencies not increasing in ' +
+                             self.filename + ', noise parameters are not supported')
+        self.__f = f * frequnits[self.frequnit]
+        return dict((index, np.concatenate(trace))
+                    for index, trace in zip(indexes, traces))
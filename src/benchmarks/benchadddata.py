@@ -0,0 +1,80 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package benchadddata
+#
+# Benchmark of the data section formatting of
+# #TikzExport::ClassTikzExport::adddata.
+#
+# Compares the former per point formatting with str()
+# against the bulk formatting by #tikzhelpers::format_table_data
+# on traces with #npoints points.
+#
+# @date Created on 18.10.2026\n
+# Last edited on 18.10.2026
+#
+# @author lukasl93
+
+import io
+import os
+import sys
+import time
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
+
+from ClassDataStructs import ClassData2D, ClassGraphData
+from TikzExport import ClassTikzExport
+
+
+## Former implementation of adddata: str() and concatenation per point
+# @param data List of ClassData2D points
+# @return Formatted data section
+def legacy_adddata(data):
+    datastring = ''
+    for date in data:
+        datastring += '\n' + str(date.xvalue) + '\t' + \
+            str(date.yvalue) + r'\\'
+    return datastring + '\n};'
+
+
+## Run the benchmark and print the results
+# @param npoints Number of points of the benchmark trace
+# @param numformat Number format of the bulk formatter
+def benchadddata(npoints, numformat='%.6g'):
+    xdata = np.linspace(0.4, 6, npoints)
+    ydata = -20 + 10 * np.sin(xdata * 7.3)
+
+    print('Trace with ' + str(npoints) + ' points')
+
+    start = time.time()
+    data = [ClassData2D(xval, yval) for xval, yval in zip(xdata, ydata)]
+    legacy = legacy_adddata(data)
+    legacytime = time.time() - start
+    print('  str() per point:      %8.3f s, %6.1f MB' %
+          (legacytime, len(legacy) / 1e6))
+
+    start = time.time()
+    buff = io.StringIO() if sys.version_info[0] > 2 else io.BytesIO()
+    tikzplot = ClassTikzExport(buff, numformat)
+    tikzplot.adddata(ClassGraphData(xdata, ydata))
+    bulktime = time.time() - start
+    print('  bulk %-16s %8.3f s, %6.1f MB' %
+          ("'" + numformat + "':", bulktime, len(buff.getvalue()) / 1e6))
+    print('  speedup:              %8.1f x' % (legacytime / bulktime))
+
+
+## @cond Prevents doxygen from scanning the following
+if __name__ == '__main__':
+    ## Number of points of the benchmark trace
+    npoints = 1000000
+
+    # Support command line argument for the number of points
+    if len(sys.argv) == 1:
+        pass
+    elif len(sys.argv) == 2:
+        npoints = int(sys.argv[1])
+    else:
+        print("Usage: python2 benchadddata.py (<npoints>)")
+
+    benchadddata(npoints)
+## @endcond Prevents doxygen from scanning the code above
@@ -0,0 +1,270 @@
+#!/usr/bin/python2
+# -*- coding: utf-8 -*-
+
+## @package benchpipeline
+#
+# Benchmark of the stages from a Touchstone file to the Tikz file and the
+# import file on synthetic Touchstone files.
+#
+# For every combination of port count and point count a synthetic
+# Touchstone file is created and the stages are timed separately:
+#  - parse: reading the file with scikit-rf
+#  - extraction: dB traces of all S-Parameters via ClassSparaExtract
+#  - assembly: ClassTikzExport sections of all traces in memory
+#  - write: writing the assembled Tikz file
+#  - design: complete spara_db_2tikz call as used by the config scripts
+#  - import: assembly and writing of an import file
+#
+# The results are appended to a JSON history together with the git commit,
+# so regressions show up per commit.
+#
+# The history is local to the machine and not part of the repository,
+# because the timings of different machines can not be compared.
+# It starts empty on a clean checkout, so run the benchmark once on the
+# baseline commit before measuring a change, or pass a shared file
+# with --history.
+#
+# @date Created on 18.10.2026\n
+# Last edited on 18.10.2026
+#
+# @author lukasl93
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import skrf as rf
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'designscripts'))
+
+from TikzExport import ClassTikzExport
+from ClassDataStructs import ClassGraphData
+from sparaextract import ClassSparaExtract
+from tikzhelpers import writeImportFile
+from spara_db_2tikz import spara_db_2tikz
+
+
+## Default history file, local to the machine and ignored by git
+historyfile = os.path.join(os.path.dirname(__file__), 'benchhistory.json')
+
+## Number of frequency points generated and written at once
+chunkpoints = 10000
+
+
+## Create a synthetic Touchstone file in the RI format
+# with smooth, frequency dependent S-Parameters
+# @param filename Path of the file, the extension must match @parname{nports}
+# @param nports Number of ports
+# @param npoints Number of frequency points
+# @param fstart Start frequency in GHz - default 0.4
+# @param fstop Stop frequency in GHz - default 6
+def create_touchstone(filename, nports, npoints, fstart=0.4, fstop=6):
+    ports = np.arange(1, nports + 1)
+    distance = np.abs(ports[:, np.newaxis] - ports[np.newaxis, :])
+    # matching around -15 dB, coupling falling with the port distance
+    level = -15 - 10 * distance
+    delay = 0.1 * (1 + distance)
+    ripple = 1 + ports[:, np.newaxis] + ports[np.newaxis, :]
+
+    # one record per frequency, every matrix row starts a new line
+    # with at most four values per line, 2-ports use one line
+    pairs = ['%.9g %.9g'] * nports
+    if nports <= 2:
+        rows = [' '.join(pairs * nports)]
+    else:
+        rows = [' '.join(pairs[start:start + 4])
+                for _ in range(nports) for start in range(0, nports, 4)]
+    recordformat = '%.9g ' + '\n'.join(rows) + '\n'
+
+    frequencies = np.linspace(fstart, fstop, npoints)
+    with open(filename, 'w') as touchstone:
+        touchstone.write('! Synthetic ' + str(nports) + '-port with ' +
+                         str(npoints) + ' points\n# GHz S RI R 50\n')
+        for start in range(0, npoints, chunkpoints):
+            freq = frequencies[start:start + chunkpoints]
+            f = freq[:, np.newaxis, np.newaxis]
+            sdata = 10 ** ((level + 3 * np.sin(2 * np.pi * f / ripple)) /
+                           20.0) * np.exp(-2j * np.pi * f * delay)
+            if nports == 2:
+                # 2-ports are written column wise: S11 S21 S12 S22
+                sdata = sdata.transpose(0, 2, 1)
+            values = np.empty((len(freq), 1 + 2 * nports * nports))
+            values[:, 0] = freq
+            values[:, 1::2] = sdata.real.reshape(len(freq), -1)
+            values[:, 2::2] = sdata.imag.reshape(len(freq), -1)
+            touchstone.write((recordformat * len(freq)) %
+                             tuple(values.ravel().tolist()))
+
+
+## Return the current git commit of the repository
+# @return Tuple (commit hash, True if the work tree has changes)
+# or (None, None) outside of a git repository
+def get_git_commit():
+    repodir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=repodir).decode().strip()
+        changes = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=repodir).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(changes)
+
+
+## Run all stages on one Touchstone file
+# @param touchstone Path of the Touchstone file
+# @param workdir Directory for the created Tikz and import files
+# @param maxpoints Point budget of the design stage, None keeps all points
+# @return Dictionary of the stage durations in seconds
+def benchstages(touchstone, workdir, maxpoints):
+    stages = {}
+
+    start = time.time()
+    network = rf.Network(touchstone)
+    stages['parse'] = time.time() - start
+
+    start = time.time()
+    extract = ClassSparaExtract(network)
+    indexes = [(m, n) for m in range(1, network.nports + 1)
+               for n in range(1, network.nports + 1)]
+    xdata = extract.get_xdata('GHz')
+    traces = extract.get_traces(indexes)
+    stages['extraction'] = time.time() - start
+
+    start = time.time()
+    tikzplot = ClassTikzExport()
+    tikzplot.addheader(filenames=network.name, date='2017-05-21')
+    for i in range(len(indexes)):
+        tikzplot.addcolor('color' + str(i), tikzplot.get_collist()[
+            i % len(tikzplot.get_collist())])
+    tikzplot.addconf(str(xdata[0]), str(xdata[-1]), '-60', '0')
+    for i in range(len(indexes)):
+        tikzplot.addplot('color' + str(i))
+        tikzplot.adddata(ClassGraphData(xdata, traces[i]))
+        tikzplot.addlegend(str(indexes[i][0]) + str(indexes[i][1]))
+    tikzplot.addfooter()
+    stages['assembly'] = time.time() - start
+
+    start = time.time()
+    tikzplot.createTikzFile(os.path.join(workdir, 'assembly.tikz'))
+    stages['write'] = time.time() - start
+
+    start = time.time()
+    spara_db_2tikz(network, 'GHz', indexes,
+                   filename=os.path.join(workdir, 'design.tikz'),
+                   maxpoints=maxpoints)
+    stages['design'] = time.time() - start
+
+    start = time.time()
+    teximports = [
+        ('dut%04d' % i, r'\instikz{dut%04d_ALL}{dut%04d - All S-Parameters}'
+         % (i, i) + '\n\n') for i in range(1000, 0, -1)]
+    writeImportFile(os.path.join(workdir, 'importpictures.tex'), teximports)
+    stages['import'] = time.time() - start
+
+    return stages
+
+
+## Run the benchmark for all combinations of ports and points
+# @param ports List of port counts
+# @param points List of point counts
+# @param repeat Number of runs per combination, the fastest run counts
+# @param maxpoints Point budget of the design stage, None keeps all points
+# @return List of dictionaries with nports, npoints and the stage durations
+def benchpipeline(ports, points, repeat=1, maxpoints=1000):
+    workdir = tempfile.mkdtemp()
+    cases = []
+    try:
+        for nports in ports:
+            for npoints in points:
+                touchstone = os.path.join(
+                    workdir, 'bench.s' + str(nports) + 'p')
+                create_touchstone(touchstone, nports, npoints)
+                runs = [benchstages(touchstone, workdir, maxpoints)
+                        for _ in range(repeat)]
+                stages = dict((stage, min(run[stage] for run in runs))
+                              for stage in runs[0])
+                cases.append({'nports': nports, 'npoints': npoints,
+                              'stages': stages})
+                os.remove(touchstone)
+    finally:
+        shutil.rmtree(workdir)
+    return cases
+
+
+## Print the results compared to the last run in the history
+# @param cases Result of benchpipeline
+# @param history List of former runs
+def print_results(cases, history):
+    stagenames = ['parse', 'extraction', 'assembly', 'write', 'design',
+                  'import']
+    print('%-16s' % 'ports x points' +
+          ''.join('%12s' % stage for stage in stagenames))
+    for case in cases:
+        previous = None
+        for run in reversed(history):
+            for oldcase in run['cases']:
+                if (oldcase['nports'], oldcase['npoints']) == \
+                        (case['nports'], case['npoints']):
+                    previous = oldcase['stages']
+                    break
+            if previous is not None:
+                break
+        print('%-16s' % ('%d x %d' % (case['nports'], case['npoints'])) +
+              ''.join('%11.3fs' % case['stages'][stage]
+                      for stage in stagenames))
+        if previous is not None:
+            print('%-16s' % '  vs. last run' + ''.join(
+                '%11.0f%%' % (100.0 * (case['stages'][stage] -
+                                       previous[stage]) /
+                              max(previous[stage], 1e-9))
+                for stage in stagenames))
+
+
+## @cond Prevents doxygen from scanning the following
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Tikz creation on synthetic Touchstone files')
+    parser.add_argument('--ports', type=int, nargs='+', default=[2, 4, 16],
+                        help='port counts, default 2 4 16')
+    parser.add_argument('--points', type=int, nargs='+',
+                        default=[1000, 100000],
+                        help='point counts, default 1000 100000')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='runs per case, the fastest counts')
+    parser.add_argument('--maxpoints', type=int, default=1000,
+                        help='point budget of the design stage')
+    parser.add_argument('--history', default=historyfile,
+                        help='JSON history file, local to the machine - '
+                        'default benchhistory.json next to this script')
+    parser.add_argument('--no-history', action='store_true',
+                        help='do not append the results to the history')
+    args = parser.parse_args()
+
+    history = []
+    if os.path.isfile(args.history):
+        with open(args.history, 'r') as historyhandle:
+            history = json.load(historyhandle)
+
+    cases = benchpipeline(args.ports, args.points, args.repeat,
+                          args.maxpoints)
+    print_results(cases, history)
+
+    if not args.no_history:
+        commit, dirty = get_git_commit()
+        history.append({
+            'commit': commit, 'dirty': dirty,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__, 'skrf': rf.__version__,
+            'cases': cases})
+        with open(args.history, 'w') as historyhandle:
+            json.dump(history, historyhandle, indent=1, sort_keys=True)
+## @endcond Prevents doxygen from scanning the code above
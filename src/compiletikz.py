@@ -0,0 +1,192 @@
+#!/usr/bin/python2
+# -*- coding: utf-8
+#
+## @package compiletikz
+#
+# Script to compile every .tikz file in #latexdir/tikz to its own PDF
+# in #latexdir/tikzpictures.
+#
+# Every figure is compiled in a standalone document with the figure
+# preamble of dummy.tex on a pool of worker processes. The figure preamble
+# is the part of the preamble between the lines
+# '% Begin of the figure preamble' and '% End of the figure preamble'.
+# A figure whose .tikz file and preamble did not change since the last
+# build is not compiled again.
+# The \\instikz command of dummy.tex includes the ready PDFs, so the
+# document itself compiles without any Tikz code. The PDF of a figure is
+# deleted before it is compiled again, so a figure which fails to compile
+# is included from its .tikz file and never as an outdated PDF.
+#
+# @date Created on 18.10.2026\n
+# Last edited on 18.10.2026
+#
+# @author lukasl93
+
+import argparse
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from glob import glob
+from string import Template
+sys.path.append(os.path.join(os.path.dirname(__file__), 'basefiles'))
+from tikzhelpers import get_file_hash
+from buildmanifest import get_build_manifest, pop_manifest_updates, \
+    merge_manifest_updates
+from jobscheduler import ClassJobScheduler
+
+
+## First line of the figure preamble in the Latex document
+preamblebegin = '% Begin of the figure preamble'
+
+## Line after the figure preamble in the Latex document
+preambleend = '% End of the figure preamble'
+
+## Document class of the standalone documents
+documentclass = '\\documentclass[11pt]{standalone}\n'
+
+## Figure sizes of the standalone documents
+sizetemplate = Template(r'''\newlength\figureheight
+\newlength\figurewidth
+\setlength\figureheight{$figureheight}
+\setlength\figurewidth{$figurewidth}
+''')
+
+## Body of the standalone documents
+documenttemplate = Template(r'''\begin{document}
+\input{$tikzfile}
+\end{document}
+''')
+
+
+## Compile one Tikz file to a PDF
+# @param latexdir Directory of the Latex document
+# @param tikzfile Path of the Tikz file relative to @parname{latexdir}
+# @param pdffile Path of the resulting PDF
+# @param preamble Preamble of the standalone document
+# @param fingerprint Fingerprint to record for @parname{pdffile}
+# @param pdflatex Name or path of the pdflatex executable
+# @return Fingerprints of the compiled PDF as from pop_manifest_updates
+def compile_figure(latexdir, tikzfile, pdffile, preamble, fingerprint,
+                   pdflatex='pdflatex'):
+    name = os.path.splitext(os.path.basename(pdffile))[0]
+    # compile in a directory next to the PDF, so it is moved atomically
+    tmpdir = tempfile.mkdtemp(dir=os.path.dirname(pdffile))
+    try:
+        texfile = os.path.join(tmpdir, name + '.tex')
+        with io.open(texfile, 'w', encoding='utf-8') as texhandle:
+            texhandle.write(preamble + documenttemplate.substitute(
+                {'tikzfile': tikzfile.replace(os.sep, '/')}))
+        process = subprocess.Popen(
+            [pdflatex, '-interaction=nonstopmode', '-halt-on-error',
+             '-output-directory', tmpdir, texfile],
+            cwd=latexdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0].decode('utf-8', 'replace')
+        if process.returncode != 0:
+            raise RuntimeError('pdflatex failed for ' + tikzfile + ':\n' +
+                               '\n'.join(output.splitlines()[-20:]))
+        os.rename(os.path.join(tmpdir, name + '.pdf'), pdffile)
+    finally:
+        shutil.rmtree(tmpdir)
+    print('Compiled: ' + name + ' ...')
+    manifest = get_build_manifest(os.path.dirname(pdffile))
+    manifest.update(pdffile, fingerprint)
+    return pop_manifest_updates()
+
+
+## Read the figure preamble of a Latex document
+# @param texfile Path of the Latex document
+# @return Lines between #preamblebegin and #preambleend without comments
+def get_figure_preamble(texfile):
+    with io.open(texfile, 'r', encoding='utf-8') as texhandle:
+        lines = texhandle.read().splitlines()
+    try:
+        begin = [line.strip() for line in lines].index(preamblebegin)
+        end = [line.strip() for line in lines].index(preambleend)
+    except ValueError:
+        raise ValueError('No figure preamble in ' + texfile + '! Mark it with the lines ' + preamblebegin + ' and ' + preambleend)
+    return ''.join(line + '\n' for line in lines[begin + 1:end]
+                   if line.strip() and not line.lstrip().startswith('%'))
+
+
+## Compile all Tikz files of a Latex document which changed
+# @param latexdir Directory of the Latex document with the folders
+# tikz and tikzpictures
+# @param workers Number of worker processes - default None uses one per CPU
+# @param figurewidth Latex length of \\figurewidth - default '13.75cm'
+# @param figureheight Latex length of \\figureheight - default '7cm'
+# @param pdflatex Name or path of the pdflatex executable
+# @param texfile Latex document in @parname{latexdir} with the figure
+# preamble - default 'dummy.tex'
+# @return Number of failed figures
+def compiletikz(latexdir, workers=None, figurewidth='13.75cm',
+                figureheight='7cm', pdflatex='pdflatex', texfile='dummy.tex'):
+    pdfdir = os.path.join(latexdir, 'tikzpictures')
+    if not os.path.isdir(pdfdir):
+        os.makedirs(pdfdir)
+    preamble = documentclass + \
+        get_figure_preamble(os.path.join(latexdir, texfile)) + \
+        sizetemplate.substitute(
+            {'figurewidth': figurewidth, 'figureheight': figureheight})
+    preamblehash = hashlib.sha1(preamble.encode('utf-8')).hexdigest()
+    manifest = get_build_manifest(pdfdir)
+    scheduler = ClassJobScheduler(workers)
+
+    for tikzfile in sorted(glob(os.path.join(latexdir, 'tikz', '*.tikz'))):
+        name = os.path.splitext(os.path.basename(tikzfile))[0]
+        pdffile = os.path.join(pdfdir, name + '.pdf')
+        fingerprint = hashlib.sha1(
+            (get_file_hash(tikzfile) + preamblehash).encode()).hexdigest()
+        if manifest.is_uptodate(pdffile, fingerprint):
+            print('Up to date: ' + name + ' ...')
+        else:
+            # the document uses the Tikz file until the new PDF is ready
+            if os.path.isfile(pdffile):
+                os.remove(pdffile)
+            manifest.remove(pdffile)
+            scheduler.add(name, compile_figure, latexdir,
+                          os.path.relpath(tikzfile, latexdir), pdffile,
+                          preamble, fingerprint, pdflatex)
+
+    for result in scheduler.run():
+        if result is not None:
+            merge_manifest_updates(result)
+    get_build_manifest(pdfdir).save()
+
+    scheduler.print_failures()
+    return len(scheduler.failures)
+
+
+## @cond Prevents doxygen from scanning the following
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compile all changed Tikz files to PDFs')
+    # Directory of the Latex document
+    parser.add_argument(
+        'latexdir', nargs='?',
+        default=os.path.join(os.path.dirname(__file__), '..', 'LatexTest'))
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='number of worker processes, default one per CPU')
+    parser.add_argument('--figurewidth', default='13.75cm',
+                        help='Latex length of \\figurewidth')
+    parser.add_argument('--figureheight', default='7cm',
+                        help='Latex length of \\figureheight')
+    parser.add_argument('--pdflatex', default='pdflatex',
+                        help='pdflatex executable')
+    parser.add_argument('--texfile', default='dummy.tex',
+                        help='Latex document with the figure preamble')
+    args = parser.parse_args()
+
+    failures = compiletikz(os.path.abspath(args.latexdir), args.jobs,
+                           args.figurewidth, args.figureheight, args.pdflatex,
+                           args.texfile)
+    if failures:
+        print(str(failures) + ' figures failed')
+        sys.exit(1)
+
+    print("All done")
+## @endcond Prevents doxygen from scanning the code above
@@ -18,55 +18,80 @@
 
 import os
 import sys
-import threading
-from glob import glob
 from string import Template
-import skrf as rf
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'designscripts'))
 
 from spara_db_2tikz import spara_db_2tikz
-from tikzhelpers import createImportFile, clearImportFile
+from tikzhelpers import writeImportFile, get_export_options, \
+    get_sorted_glob
+from networkcache import load_network
+from buildmanifest import get_build_manifest
+from profiler import stage
 
 
-def fulltouchstone2tikz(sourcedir, resultdir):
+## Maximum number of points per trace in the Tikz files, longer traces are
+# reduced keeping their minima and maxima - None keeps all points
+maxpoints = 1000
+
+## Subfolder of the result directory for the data of the traces as .dat
+# files shared by all Tikz files, pgfplots reads them faster than data
+# embedded in the Tikz files - None embeds the data
+datafolder = None
+
+
+## Create the Tikz file of the complete S-Matrix of one Touchstone file
+# @param touchstone Path of the Touchstone file
+# @param resultdir Export resulting Tikz files to this directory
+# @return Tex code to import the created picture
+def fulltouchstone2tikz_file(touchstone, resultdir):
     # Create a tex file to plot all created pictures when included
     importtemplate = Template(r'\instikz{$tikzfilename}{$desc}' + '\n')
-    teximport = ''
 
-    touchstone_list = glob(os.path.join(sourcedir, "*.s*p"))
+    # Skip plots whose inputs and definitions did not change
+    manifest = get_build_manifest(resultdir)
 
-    if not touchstone_list:
-        print('No touchstone files found in ' + sourcedir + '! Skipping...')
-        return
+    name = os.path.splitext(os.path.basename(touchstone))[0]
+    tikzfile = os.path.join(resultdir, name + '_ALL.tikz')
+    fingerprint = manifest.get_fingerprint([touchstone], spara_db_2tikz,
+                                           maxpoints, datafolder)
 
-    for touchstone in touchstone_list:
+    if manifest.is_uptodate(tikzfile, fingerprint):
+        print('Up to date: ' + name + '_ALL ...')
+    else:
         # read Touchstone files
-        netw = rf.Network(touchstone)
+        netw = load_network(touchstone)
         print('Now processing: ' + netw.name + ' ...')
 
         # export tikz files
-        spara_db_2tikz(
-            netw, 'GHz',
-            filename=os.path.join(resultdir, netw.name + '_ALL.tikz'))
-        teximport += importtemplate.substitute({
-            'tikzfilename': netw.name + '_ALL',
-            'desc': netw.name.replace('_', ' ') + ' - All S-Parameters'})
-        teximport += '\n'
-
-    createImportFile(os.path.join(resultdir, 'completepictures.tex'), teximport)
-    print('Done!')
+        with stage('plot', 'plot', tikz=name + '_ALL'):
+            spara_db_2tikz(netw, 'GHz', filename=tikzfile,
+                           maxpoints=maxpoints,
+                           exportoptions=get_export_options(resultdir,
+                                                            datafolder))
+        manifest.update(tikzfile, fingerprint, datafolder)
+    return importtemplate.substitute({
+        'tikzfilename': name + '_ALL',
+        'desc': name.replace('_', ' ') + ' - All S-Parameters'}) + '\n'
+
+
+## Create Tikz files of the complete S-Matrix
+# @param sourcedir Search for Touchstone files in this directory
+# @param resultdir Export resulting Tikz files to this directory
+def fulltouchstone2tikz(sourcedir, resultdir):
+    touchstone_list = get_sorted_glob(os.path.join(sourcedir, "*.s*p"))
 
+    if not touchstone_list:
+        print('No touchstone files found in ' + sourcedir + '! Skipping...')
 
-## Class for multi threading support
-class threadfulltouchstone2tikz(threading.Thread):
-    def __init__(self, sourcedir, resultdir):
-        threading.Thread.__init__(self)
-        self.sourcedir = sourcedir
-        self.resultdir = resultdir
+    teximports = [
+        (os.path.basename(touchstone),
+         fulltouchstone2tikz_file(touchstone, resultdir))
+        for touchstone in touchstone_list]
 
-    def run(self):
-        fulltouchstone2tikz(self.sourcedir, self.resultdir)
+    writeImportFile(os.path.join(resultdir, 'completepictures.tex'),
+                    teximports)
+    print('Done!')
 
 
 ## @cond Prevents doxygen from scanning the following
@@ -88,9 +113,8 @@ if __name__ == '__main__':
     else:
         print("Usage: python2 completetouchstone2tikz.py <sourcedir> <resultdir>")
 
-    clearImportFile(os.path.join(resultdir, 'completepictures.tex'))
-
     # Call the main function provided by this package
     fulltouchstone2tikz(sourcedir, resultdir)
+    get_build_manifest(resultdir).save()
 
 ## @endcond Prevents doxygen from scanning the code above
@@ -0,0 +1,143 @@
+#!/usr/bin/python2
+# -*- coding: utf-8
+
+## @package compliancetouchstone2report
+#
+# Script to check all .s*p files in #sourcedir against the Matching,
+# Coupling and Isolation requirements of the project, for example for
+# the screening of a production lot.
+#
+# Every requirement is checked for the traces of all Touchstone files on
+# the same frequency grid at once (see compliance::check_compliance).
+# Files on other grids are checked on their own frequency points. Only the
+# checked traces are read from the files, so thousands of files can be
+# screened.
+#
+# The allowed deviation of the 'is' requirements is their reqscale, which
+# is the band drawn around them in the plots of the other config scripts.
+#
+# The worst margin of every file, S-Parameter and requirement is written
+# to a CSV and a JSON report in #resultdir.
+#
+# @date Created on 18.10.2026\n
+# Last edited on 18.10.2026
+#
+# @author lukasl93
+
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
+
+from ClassDataStructs import ClassRequirements
+from sparaextract import get_extract
+from touchstonereader import ClassTouchstoneReader
+from compliance import check_compliance, get_failed_networks, \
+    write_compliance_report
+from tikzhelpers import get_sorted_glob
+from profiler import stage
+
+
+## Function to check Touchstone files against the requirements
+# @param sourcedir Directory with the .s*p Touchstone files to be checked
+# @param resultdir Directory to place the reports in
+# @param compname Label of the check, is used in the report naming
+# @return List of the names of the failed Touchstone files
+def compliance2report(sourcedir, resultdir, compname=''):
+
+    ## Define all Requirements for the Project
+    requirement11 = ClassRequirements(r'Requirements Matching ($S_{11}$)',
+                                      'max', '')
+    requirement11.set_data(0.4, 6, -20)
+
+    requirement22 = ClassRequirements(r'Requirements Matching ($S_{22}$)',
+                                      'max', '')
+    requirement22.set_data(0.4, 6, -15)
+
+    requirement33 = ClassRequirements(r'Requirements Matching ($S_{33}$)',
+                                      'max', '')
+    requirement33.set_data(0.4, 6, -15)
+
+    requirement32 = ClassRequirements(r'Requirements Isolation ($S_{32}$)',
+                                      'max', '')
+    requirement32.set_data(0.4, 6, -20)
+
+    requirement21 = ClassRequirements(r'Requirements Coupling ($S_{21}$)',
+                                      'is', '', reqscale=0.2)
+    requirement21.set_data(0.4, 6, -6)
+
+    requirement31 = ClassRequirements(r'Requirements Coupling ($S_{31}$)',
+                                      'is', '', reqscale=0.2)
+    requirement31.set_data(0.4, 6, -6)
+
+    # Checks of all Touchstone files: (index, requirements)
+    checks = [
+        ((1, 1), requirement11),
+        ((2, 2), requirement22),
+        ((3, 3), requirement33),
+        ((2, 1), requirement21),
+        ((3, 1), requirement31),
+        ((3, 2), requirement32)
+    ]
+
+    touchstone_list = get_sorted_glob(os.path.join(sourcedir, "*.s*p"))
+
+    if not touchstone_list:
+        print('No touchstone files foand in ' + sourcedir + '! Skipping...')
+        return []
+
+    print('Now reading ' + str(len(touchstone_list)) + ' Touchstone files ...')
+    extracts = []
+    for touchstone in touchstone_list:
+        extract = get_extract(ClassTouchstoneReader(touchstone))
+        # read all checked traces of a file in one pass
+        extract.get_traces([index for index, _ in checks])
+        extracts.append(extract)
+
+    results = []
+    for index, requirements in checks:
+        results += check_compliance(extracts, [index], requirements)
+
+    for extension in ('.csv', '.json'):
+        with stage('report', 'report', report=compname + extension):
+            write_compliance_report(
+                os.path.join(resultdir, compname + 'Compliance' + extension),
+                results)
+
+    failed = get_failed_networks(results)
+    print(str(len(touchstone_list) - len(failed)) + ' of ' +
+          str(len(touchstone_list)) + ' Touchstone files passed')
+    for name in failed:
+        print('Failed: ' + name)
+    return failed
+
+
+## @cond Prevents doxygen from scanning the following
+if __name__ == '__main__':
+    # Source directory with .s*p files
+    sourcedir = os.path.join(os.path.dirname(__file__), '..',
+                             '..', 'touchstoneinput', 'singlecomppic')
+
+    # Result directory for the reports
+    resultdir = os.path.join(os.path.dirname(__file__),
+                             '..', '..', 'LatexTest', 'tikz')
+
+    compname = 'Test'
+
+    # Support command line arguments for input and output directory
+    if len(sys.argv) == 1:
+        pass
+    elif len(sys.argv) == 3:
+        sourcedir = sys.argv[1]
+        resultdir = sys.argv[2]
+    elif len(sys.argv) == 4:
+        sourcedir = sys.argv[1]
+        resultdir = sys.argv[2]
+        compname = sys.argv[3]
+    else:
+        print("Usage: python2 compliancetouchstone2report.py <sourcedir> <resultdir> (<compname>)")
+
+    # Call the main function provided by this package,
+    # the exit status tells a calling script if all files passed
+    sys.exit(1 if compliance2report(sourcedir, resultdir, compname) else 0)
+## @endcond Prevents doxygen from scanning the code above
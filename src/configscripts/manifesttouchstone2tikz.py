@@ -0,0 +1,318 @@
+#!/usr/bin/python2
+# -*- coding: utf-8
+
+## @package manifesttouchstone2tikz
+#
+# Script to export the plots defined in a JSON plot manifest
+# (example see plotmanifest.json) from the .s*p files in #sourcedir.
+#
+# The manifest contains named requirements and a list of plot
+# definitions. Every plot definition names
+#  - "design": the design function, one of #designs
+#  - "sources": a glob pattern of Touchstone files relative to #sourcedir
+#  - "per": "file" creates one plot per Touchstone file, "folder" one per
+#    folder of Touchstone files and "all" one of all Touchstone files -
+#    default "file" for spara_db_2tikz and "folder" else
+#  - "output": the Tikz file name without extension, ${name} is replaced by
+#    the name of the Touchstone file or folder, also in the "caption"
+#  - "indexes": list of S-Parameter index pairs, [] plots all
+#  - "descriptions", "requirements", "caption", "importfile" and further
+#    optional design options ("frequnit", "unity", "maxpoints",
+#    "annotate" and "envelope" of the comparison designs)
+#  - "datafolder": subfolder of #resultdir for the data of the traces as
+#    shared .dat files - default null embeds the data in the Tikz files
+#
+# The plots are compiled into a job graph: plots sharing Touchstone files
+# are placed in the same job, which loads every network once and extracts
+# every trace once for all of its plots.
+#
+# Resulting .tikz files are exported to #resultdir.
+#
+# @date Created on 18.10.2026\n
+# Last edited on 18.10.2026
+#
+# @author lukasl93
+
+import json
+import os
+import sys
+from string import Template
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'designscripts'))
+
+from spara_db_2tikz import spara_db_2tikz
+from comp_spara_db_2tikz import comp_spara_db_2tikz
+from comp_mult_spara_db_2tikz import comp_mult_spara_db_2tikz
+from ClassDataStructs import ClassRequirements
+from sparaextract import get_extract
+from tikzhelpers import writeImportFile, get_export_options, \
+    get_sorted_glob
+from lazynetwork import ClassLazyNetwork
+from buildmanifest import get_build_manifest
+from profiler import stage
+
+
+## Design functions usable in a plot manifest indexed by name
+designs = {
+    'spara_db_2tikz': spara_db_2tikz,
+    'comp_spara_db_2tikz': comp_spara_db_2tikz,
+    'comp_mult_spara_db_2tikz': comp_mult_spara_db_2tikz
+}
+
+## Default options of a plot definition
+plotdefaults = {
+    'indexes': [],
+    'descriptions': None,
+    'requirements': [],
+    'caption': '',
+    'importfile': 'importmanifestpictures.tex',
+    'frequnit': 'GHz',
+    'unity': 'dB',
+    'maxpoints': 1000,
+    'annotate': False,
+    'datafolder': None,
+    'envelope': False
+}
+
+
+## Convert the unicode strings of the json module to str in Python 2,
+# which the Tikz export expects
+# @param value Value read by the json module
+# @return Value with str instead of unicode strings
+def get_native_strings(value):
+    if isinstance(value, dict):
+        return dict((get_native_strings(key), get_native_strings(item))
+                    for key, item in value.items())
+    if isinstance(value, list):
+        return [get_native_strings(item) for item in value]
+    if sys.version_info[0] < 3 and isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+## Read a plot manifest
+# @param filename Path of the JSON manifest file
+# @return Dictionary with the "requirements" and "plots" definitions
+def load_plot_manifest(filename):
+    with open(filename, 'r') as manifestfile:
+        manifest = get_native_strings(json.load(manifestfile))
+    manifest.setdefault('requirements', {})
+    for definition in manifest.get('plots', []):
+        if definition.get('design') not in designs:
+            raise ValueError('Unknown design ' +
+                             str(definition.get('design')) + ' in ' +
+                             filename + '! Must be one of ' +
+                             ', '.join(sorted(designs)))
+        for requirement in definition.get('requirements', []):
+            if requirement not in manifest['requirements']:
+                raise ValueError('Unknown requirement ' + requirement +
+                                 ' in ' + filename + '!')
+    return manifest
+
+
+## Create a requirement from its manifest definition
+# @param definition Dictionary with the arguments of ClassRequirements
+# ("legend", "reqtype", "style", "color", "reqscale") and either "data"
+# with the arguments of ClassRequirements::set_data or "points" with a list
+# of [x, y] points
+# @return ClassRequirements object
+def create_requirement(definition):
+    requirement = ClassRequirements(
+        definition.get('legend', 'Requirements'),
+        definition.get('reqtype', ''), definition.get('style', '- . .'),
+        definition.get('color', '0.63500,0.07800,0.18400'),
+        definition.get('reqscale', 1))
+    if 'data' in definition:
+        requirement.set_data(*definition['data'])
+    elif 'points' in definition:
+        requirement.set_comp_data(definition['points'])
+    return requirement
+
+
+## Compile a plot manifest into a job graph
+# @param manifest Dictionary from load_plot_manifest
+# @param sourcedir Directory the source patterns are relative to
+# @return List of jobs, every job is a list of plots sharing
+# Touchstone files. A plot is a dictionary with the resolved definition.
+def compile_job_graph(manifest, sourcedir):
+    plots = []
+    for order, definition in enumerate(manifest['plots']):
+        touchstone_list = get_sorted_glob(
+            os.path.join(sourcedir, definition['sources']))
+        per = definition.get(
+            'per', 'file' if definition['design'] == 'spara_db_2tikz'
+            else 'folder')
+        groups = {}
+        for touchstone in touchstone_list:
+            if per == 'file':
+                name = os.path.splitext(os.path.basename(touchstone))[0]
+            elif per == 'folder':
+                name = os.path.basename(os.path.dirname(touchstone))
+            else:
+                name = ''
+            groups.setdefault(name, []).append(touchstone)
+
+        for name in sorted(groups):
+            plot = dict(plotdefaults)
+            plot.update(definition)
+            plot['sources'] = groups[name]
+            plot['indexes'] = [
+                tuple(index) if isinstance(index, list) else index
+                for index in plot['indexes']]
+            if plot['descriptions'] is None:
+                if definition['design'] == 'spara_db_2tikz':
+                    plot['descriptions'] = ['']
+                else:
+                    plot['descriptions'] = [
+                        ' - ' + os.path.splitext(os.path.basename(
+                            touchstone))[0].replace('_', ' ')
+                        for touchstone in groups[name]]
+            plot['requirements'] = [
+                manifest['requirements'][requirement]
+                for requirement in plot['requirements']]
+            plot['output'] = Template(
+                definition['output']).safe_substitute({'name': name})
+            plot['caption'] = Template(plot['caption']).safe_substitute(
+                {'name': name.replace('_', ' ')})
+            plot['sortkey'] = (name, order)
+            plots.append(plot)
+
+    # plots sharing a Touchstone file belong to the same job
+    jobs = []
+    jobsources = []
+    for plot in plots:
+        sources = set(plot['sources'])
+        joined = [plot]
+        for i in reversed(range(len(jobs))):
+            if jobsources[i] & sources:
+                joined = jobs.pop(i) + joined
+                sources |= jobsources.pop(i)
+        jobs.append(joined)
+        jobsources.append(sources)
+    return jobs
+
+
+## Create the Tikz files of one job of the job graph
+# @param plots List of plots from compile_job_graph
+# @param resultdir Export resulting Tikz files to this directory
+# @return List of (import file, sort key, Tex code) tuples to import
+# all pictures of the job
+def plots2tikz(plots, resultdir):
+    importtemplate = Template(r'\instikz{$tikzfilename}{$desc}' + '\n')
+    teximports = []
+
+    # Skip plots whose inputs and definitions did not change
+    manifest = get_build_manifest(resultdir)
+    # Plots of the job to create with their Tikz file and fingerprint
+    outdated = []
+    for plot in plots:
+        design = designs[plot['design']]
+        tikzfile = os.path.join(resultdir, plot['output'] + '.tikz')
+        fingerprint = manifest.get_fingerprint(
+            plot['sources'], design, json.dumps(plot, sort_keys=True))
+        if manifest.is_uptodate(tikzfile, fingerprint):
+            print('Up to date: ' + plot['output'] + ' ...')
+        else:
+            outdated.append((plot, tikzfile, fingerprint))
+        teximports.append((plot['importfile'], plot['sortkey'],
+                           importtemplate.substitute({
+                               'tikzfilename': plot['output'],
+                               'desc': plot['caption']})))
+
+    # Networks with their extracted traces shared by all plots of the job,
+    # the traces of all plots to create are read in one pass per file
+    extracts = {}
+    for plot, _, _ in outdated:
+        for touchstone in plot['sources']:
+            if touchstone not in extracts:
+                extracts[touchstone] = get_extract(
+                    ClassLazyNetwork(touchstone))
+                print('Now reading: ' + extracts[touchstone].name + ' ...')
+    for touchstone, extract in extracts.items():
+        extract.get_traces([index for plot, _, _ in outdated
+                            if touchstone in plot['sources']
+                            for index in plot['indexes']])
+
+    for plot, tikzfile, fingerprint in outdated:
+        design = designs[plot['design']]
+        networks = [extracts[touchstone] for touchstone in plot['sources']]
+        requirements = [create_requirement(requirement)
+                        for requirement in plot['requirements']]
+        if len(requirements) == 1:
+            requirements = requirements[0]
+        print('Now creating Tikzplot ' + plot['output'] + ' ...')
+        exportoptions = get_export_options(resultdir, plot['datafolder'])
+        with stage('plot', 'plot', tikz=plot['output']):
+            if design is spara_db_2tikz:
+                spara_db_2tikz(
+                    networks[0], plot['frequnit'], plot['indexes'],
+                    plot['descriptions'], requirements=requirements,
+                    unity=plot['unity'], filename=tikzfile,
+                    maxpoints=plot['maxpoints'],
+                    annotate=plot['annotate'],
+                    exportoptions=exportoptions)
+            elif design is comp_spara_db_2tikz:
+                comp_spara_db_2tikz(
+                    networks, plot['frequnit'], plot['indexes'][0],
+                    plot['descriptions'], requirements=requirements,
+                    filename=tikzfile, maxpoints=plot['maxpoints'],
+                    envelope=plot['envelope'],
+                    annotate=plot['annotate'],
+                    exportoptions=exportoptions)
+            else:
+                comp_mult_spara_db_2tikz(
+                    networks, plot['frequnit'], plot['indexes'],
+                    plot['descriptions'], requirements=requirements,
+                    filename=tikzfile, maxpoints=plot['maxpoints'],
+                    envelope=plot['envelope'],
+                    annotate=plot['annotate'],
+                    exportoptions=exportoptions)
+        manifest.update(tikzfile, fingerprint, plot['datafolder'])
+    return teximports
+
+
+## Create the Tikz files of all plots of a plot manifest
+# @param manifestfile Path of the JSON manifest file
+# @param sourcedir Directory the source patterns are relative to
+# @param resultdir Export resulting Tikz files to this directory
+def manifest2tikz(manifestfile, sourcedir, resultdir):
+    teximports = {}
+    for plots in compile_job_graph(load_plot_manifest(manifestfile),
+                                   sourcedir):
+        for importfile, sortkey, teximport in plots2tikz(plots, resultdir):
+            teximports.setdefault(importfile, []).append((sortkey, teximport))
+
+    for importfile, entries in teximports.items():
+        writeImportFile(os.path.join(resultdir, importfile), entries)
+    print('Done!')
+
+
+## @cond Prevents doxygen from scanning the following
+if __name__ == '__main__':
+    # Plot manifest
+    manifestfile = os.path.join(os.path.dirname(__file__),
+                                'plotmanifest.json')
+
+    # Source directory with .s*p files
+    sourcedir = os.path.join(os.path.dirname(__file__), '..',
+                             '..', 'touchstoneinput')
+
+    # Result directory for tikz files
+    resultdir = os.path.join(os.path.dirname(__file__),
+                             '..', '..', 'LatexTest', 'tikz')
+
+    # Support command line arguments for manifest, input and output directory
+    if len(sys.argv) == 1:
+        pass
+    elif len(sys.argv) == 4:
+        manifestfile = sys.argv[1]
+        sourcedir = sys.argv[2]
+        resultdir = sys.argv[3]
+    else:
+        print("Usage: python2 manifesttouchstone2tikz.py <manifestfile> <sourcedir> <resultdir>")
+
+    # Call the main function provided by this package
+    manifest2tikz(manifestfile, sourcedir, resultdir)
+    get_build_manifest(resultdir).save()
+
+## @endcond Prevents doxygen from scanning the code above
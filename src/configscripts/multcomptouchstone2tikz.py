@@ -19,21 +19,34 @@
 
 import os
 import sys
-import threading
-from glob import glob
 from string import Template
-import skrf as rf
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'designscripts'))
 from comp_mult_spara_db_2tikz import comp_mult_spara_db_2tikz
 from ClassDataStructs import ClassRequirements
-from tikzhelpers import createImportFile, clearImportFile
+from tikzhelpers import writeImportFile, get_export_options, \
+    get_sorted_glob
+from lazynetwork import ClassLazyNetwork
+from sparaextract import get_extract
+from buildmanifest import get_build_manifest
+from profiler import stage
+
+
+## Maximum number of points per trace in the Tikz files, longer traces are
+# reduced keeping their minima and maxima - None keeps all points
+maxpoints = 1000
+
+## Subfolder of the result directory for the data of the traces as .dat
+# files shared by all Tikz files, pgfplots reads them faster than data
+# embedded in the Tikz files - None embeds the data
+datafolder = None
 
 
 ## Function to create comparison tikz plots
 # @param sourcedir Directory with .s*p Touchstone files to be compared
 # @param resultdir Directory to place the resulting .tikz files in
 # @param compname Label of the comparison, is used in the tikzfile naming
+# @return Tex code to import all created pictures
 def multcomparisons2tikz(sourcedir, resultdir, compname=''):
     # Define all Requirements for the Project
     requirement11 = ClassRequirements(r'Requirements $S_{11}$', 'max', '')
@@ -53,83 +66,80 @@ def multcomparisons2tikz(sourcedir, resultdir, compname=''):
     requirement21.set_data(0.4, 6, -6)
 
 
+    # Comparison plots created from all Touchstone files:
+    # (name suffix, indexes, requirements, plot title, caption)
+    plots = [
+        ('Comparison_ANP11', [(1, 1)], requirement11, 'Matching S11',
+         'Comparison of the Matching at Port 1 ($S_{11}$)'),
+        ('Comparison_ANP22_33', [(2, 2), (3, 3)], requirement22,
+         'Matching S22 and S33',
+         'Comparison of the Matching at Port 2 ($S_{22}$) and Port 3 ($S_{33}$)'),
+        ('Comparison_KOP21_31', [(2, 1), (3, 1)], requirement21,
+         'Coupling S21 and S31',
+         'Comparison of the Coupling between Port 1 and 2 ($S_{21}$) and Port 1 and 3 ($S_{31}$)'),
+        ('Comparison_ISO32', [(3, 2)], requirement32, 'Isolation S32',
+         'Comparison of the Isolation between Port 2 and 3 ($S_{32}$)')
+    ]
+
     # Create a tex file to plot all created pictures when included
     importtemplate = Template(r'\instikz{$tikzfilename}{$desc}' + '\n')
     teximport = ''
 
-    touchstone_list = glob(os.path.join(sourcedir, "*.s*p"))
+    touchstone_list = get_sorted_glob(os.path.join(sourcedir, "*.s*p"))
 
     if not touchstone_list:
         print('No touchstone files found in ' + sourcedir + '! Skipping...')
-        return
-
-    # Full list of networks
+        return ''
+
+    networkdesc = [
+        ' - ' + os.path.splitext(os.path.basename(touchstone))[0].replace(
+            '_', ' ') for touchstone in touchstone_list]
+
+    # Skip plots whose inputs and definitions did not change
+    manifest = get_build_manifest(resultdir)
+
+    # Plots to create with their Tikz file and fingerprint
+    outdated = []
+    for plot in plots:
+        suffix, indexes, requirements, title, caption = plot
+        tikzfile = os.path.join(resultdir, compname + suffix + '.tikz')
+        fingerprint = manifest.get_fingerprint(
+            touchstone_list, comp_mult_spara_db_2tikz,
+            indexes, networkdesc, requirements, maxpoints, datafolder)
+        if manifest.is_uptodate(tikzfile, fingerprint):
+            print('Up to date: ' + compname + suffix + ' ...')
+        else:
+            outdated.append((plot, tikzfile, fingerprint))
+        teximport += importtemplate.substitute({
+            'tikzfilename': compname + suffix, 'desc': caption})
+
+    # Open the Touchstone files only if a plot has to be created and read
+    # the traces of all these plots in one pass per file
     networks = []
-    networkdesc = []
-
-    for touchstone in touchstone_list:
-        # read Touchstone files
-        netw = rf.Network(touchstone)
-        print('Now reading: ' + netw.name + ' ...')
-        networks.append(netw)
-        networkdesc.append(' - ' + netw.name.replace('_', ' '))
+    if outdated:
+        for touchstone in touchstone_list:
+            netw = get_extract(ClassLazyNetwork(touchstone))
+            print('Now reading: ' + netw.name + ' ...')
+            netw.get_traces([index for plot, _, _ in outdated
+                             for index in plot[1]])
+            networks.append(netw)
 
     # export tikz files
-    print('Now creating Tikzplot for Matching S11 ...')
-    comp_mult_spara_db_2tikz(
-        networks, 'GHz', [(1, 1)], networkdesc, requirements=requirement11,
-        filename=os.path.join(resultdir, compname + 'Comparison_ANP11.tikz'))
-    teximport += importtemplate.substitute({
-        'tikzfilename': compname + 'Comparison_ANP11',
-        'desc': 'Comparison of the Matching at Port 1 ($S_{11}$)'})
-
-    print('Now creating Tikzplot for Matching S22 and S33 ...')
-    comp_mult_spara_db_2tikz(
-        networks, 'GHz', [(2, 2), (3, 3)], networkdesc,
-        requirements=requirement22,
-        filename=os.path.join(resultdir,
-                              compname + 'Comparison_ANP22_33.tikz')
-    )
-    teximport += importtemplate.substitute({
-        'tikzfilename': compname + 'Comparison_ANP22_33',
-        'desc': 'Comparison of the Matching at Port 2 ($S_{22}$) and Port 3 ($S_{33}$)'})
-
-    print('Now creating Tikzplot for Coupling S21 and S31 ...')
-    comp_mult_spara_db_2tikz(
-        networks, 'GHz', [(2, 1), (3, 1)], networkdesc,
-        requirements=requirement21,
-        filename=os.path.join(resultdir,
-                              compname + 'Comparison_KOP21_31.tikz')
-    )
-    teximport += importtemplate.substitute({
-        'tikzfilename': compname + 'Comparison_KOP21_31',
-        'desc': 'Comparison of the Coupling between Port 1 and 2 ($S_{21}$) and Port 1 and 3 ($S_{31}$)'})
-
-    print('Now creating Tikzplot for Isolation S32 ...')
-    comp_mult_spara_db_2tikz(
-        networks, 'GHz', [(3, 2)], networkdesc, requirements=requirement32,
-        filename=os.path.join(resultdir, compname + 'Comparison_ISO32.tikz'))
-    teximport += importtemplate.substitute({
-        'tikzfilename': compname + 'Comparison_ISO32',
-        'desc': 'Comparison of the Isolation between Port 2 and 3 ($S_{32}$)'})
+    for (suffix, indexes, requirements, title, _), tikzfile, fingerprint \
+            in outdated:
+        print('Now creating Tikzplot for ' + title + ' ...')
+        with stage('plot', 'plot', tikz=compname + suffix):
+            comp_mult_spara_db_2tikz(
+                networks, 'GHz', indexes, networkdesc,
+                requirements=requirements, filename=tikzfile,
+                maxpoints=maxpoints,
+                exportoptions=get_export_options(resultdir, datafolder))
+        manifest.update(tikzfile, fingerprint, datafolder)
 
     teximport += '\n'
 
-    createImportFile(os.path.join(resultdir, 'importmultcomppictures.tex'),
-                     teximport)
     print('Done!')
-
-
-## Class for multi threading support
-class threadmultcomparisons2tikz(threading.Thread):
-    def __init__(self, sourcedir, resultdir, compname):
-        threading.Thread.__init__(self)
-        self.sourcedir = sourcedir
-        self.resultdir = resultdir
-        self.compname = compname
-
-    def run(self):
-        multcomparisons2tikz(self.sourcedir, self.resultdir, self.compname)
+    return teximport
 
 
 ## @cond Prevents doxygen from scanning the following
@@ -157,8 +167,9 @@ if __name__ == '__main__':
     else:
         print("Usage: python2 comptouchstone2tikz.py <sourcedir> <resultdir> (<compname>)")
 
-    clearImportFile(os.path.join(resultdir, 'importmultcomppictures.tex'))
-
     # Call the main function provided by this package
-    multcomparisons2tikz(sourcedir, resultdir, compname)
+    teximport = multcomparisons2tikz(sourcedir, resultdir, compname)
+    writeImportFile(os.path.join(resultdir, 'importmultcomppictures.tex'),
+                    [(compname, teximport)])
+    get_build_manifest(resultdir).save()
 ## @endcond Prevents doxygen from scanning the code above
@@ -18,22 +18,33 @@
 
 import os
 import sys
-import threading
-from glob import glob
 from string import Template
-import skrf as rf
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'designscripts'))
 
-from spara_db_2tikz import spara_db_2tikz
+from spara_db_2tikz import spara_db_2tikz, spara_db_2tikz_batch
 from ClassDataStructs import ClassRequirements
-from tikzhelpers import createImportFile, clearImportFile
+from tikzhelpers import writeImportFile, get_export_options, \
+    get_sorted_glob
+from lazynetwork import ClassLazyNetwork
+from buildmanifest import get_build_manifest
+from profiler import stage
 
 
-## Create Tikz files
-# @param sourcedir Search for Touchstone files in this directory
-# @param resultdir Export resulting Tikz files to this directory
-def touchstone2tikz(sourcedir, resultdir):
+## Maximum number of points per trace in the Tikz files, longer traces are
+# reduced keeping their minima and maxima - None keeps all points
+maxpoints = 1000
+
+## Subfolder of the result directory for the data of the traces as .dat
+# files shared by all Tikz files, pgfplots reads them faster than data
+# embedded in the Tikz files - None embeds the data
+datafolder = None
+
+
+## Define all plots created for every Touchstone file
+# @return List of (name suffix, indexes, legend descriptions, requirements,
+# caption)
+def get_plots():
     # Define all Requirements for the Project
     requirement11 = ClassRequirements(r'Requirements $S_{11}$', 'max', '')
     requirement11.set_data(0.4, 6, -20)
@@ -51,61 +62,85 @@ def touchstone2tikz(sourcedir, resultdir):
         'is', '', reqscale=0.2)
     requirement21.set_data(0.4, 6, -6)
 
+    # Plots created for every Touchstone file:
+    # (name suffix, indexes, legend descriptions, requirements, caption)
+    return [
+        ('_ANP', [(1, 1), (2, 2), (3, 3)],
+         [' - Matching Port 1', ' - Matching Port 2', ' - Matching Port 3'],
+         [requirement11, requirement22], ' - Matching'),
+        ('_KOP', [(2, 1), (3, 1)],
+         [' - Coupling Port 1 to 2', ' - Coupling Port 1 to 3'],
+         requirement21, ' - Coupling'),
+        ('_ISO', [(3, 2)], [' - Isolation between Port 2 and 3'],
+         requirement32, ' - Isolation')
+    ]
+
+
+## Create Tikz files of one Touchstone file
+# @param touchstone Path of the Touchstone file
+# @param resultdir Export resulting Tikz files to this directory
+# @return Tex code to import all created pictures
+def touchstone2tikz_file(touchstone, resultdir):
     # Create a tex file to plot all created pictures when included
     importtemplate = Template(r'\instikz{$tikzfilename}{$desc}' + '\n')
     teximport = ''
 
-    touchstone_list = glob(os.path.join(sourcedir, "*.s*p"))
-
-    if not touchstone_list:
-        print('No touchstone files found in ' + sourcedir + '! Skipping...')
-        return
+    # Skip plots whose inputs and definitions did not change
+    manifest = get_build_manifest(resultdir)
+
+    name = os.path.splitext(os.path.basename(touchstone))[0]
+    # plots to be created, all rendered from one extraction of the network
+    figures = []
+    fingerprints = []
+
+    # export tikz files
+    for suffix, indexes, descriptions, requirements, caption in get_plots():
+        tikzfile = os.path.join(resultdir, name + suffix + '.tikz')
+        fingerprint = manifest.get_fingerprint(
+            [touchstone], spara_db_2tikz,
+            indexes, descriptions, requirements, maxpoints, datafolder)
+        if manifest.is_uptodate(tikzfile, fingerprint):
+            print('Up to date: ' + name + suffix + ' ...')
+        else:
+            figures.append({'indexes': indexes,
+                            'descriptions': descriptions,
+                            'requirements': requirements,
+                            'filename': tikzfile})
+            fingerprints.append((tikzfile, fingerprint))
+        teximport += importtemplate.substitute({
+            'tikzfilename': name + suffix,
+            'desc': name.replace('_', ' ') + caption})
 
-    for touchstone in touchstone_list:
-        # read Touchstone files
-        netw = rf.Network(touchstone)
+    # read Touchstone files only if a plot has to be created
+    if figures:
+        netw = ClassLazyNetwork(touchstone)
         print('Now processing: ' + netw.name + ' ...')
+        with stage('plot', 'plot', tikz=name, figures=len(figures)):
+            spara_db_2tikz_batch(
+                netw, figures, 'GHz', maxpoints=maxpoints,
+                exportoptions=get_export_options(resultdir, datafolder))
+        for tikzfile, fingerprint in fingerprints:
+            manifest.update(tikzfile, fingerprint, datafolder)
+    return teximport + '\n'
 
-        # export tikz files
-        spara_db_2tikz(
-            netw, 'GHz', [(1, 1), (2, 2), (3, 3)],
-            [' - Matching Port 1', ' - Matching Port 2', ' - Matching Port 3'],
-            requirements=[requirement11, requirement22],
-            filename=os.path.join(resultdir, netw.name + '_ANP.tikz'))
-        teximport += importtemplate.substitute({
-            'tikzfilename': netw.name + '_ANP',
-            'desc': netw.name.replace('_', ' ') + ' - Matching'})
-        spara_db_2tikz(
-            netw, 'GHz', [(2, 1), (3, 1)],
-            [' - Coupling Port 1 to 2', ' - Coupling Port 1 to 3'],
-            requirements=requirement21,
-            filename=os.path.join(resultdir, netw.name + '_KOP.tikz'))
-        teximport += importtemplate.substitute({
-            'tikzfilename': netw.name + '_KOP',
-            'desc': netw.name.replace('_', ' ') + ' - Coupling'})
-        spara_db_2tikz(
-            netw, 'GHz', [(3, 2)], [' - Isolation between Port 2 and 3'],
-            requirements=requirement32,
-            filename=os.path.join(resultdir, netw.name + '_ISO.tikz'))
-        teximport += importtemplate.substitute({
-            'tikzfilename': netw.name + '_ISO',
-            'desc': netw.name.replace('_', ' ') + ' - Isolation'})
-        teximport += '\n'
 
-    createImportFile(os.path.join(resultdir, 'importallpictures.tex'),
-                     teximport)
-    print('Done!')
+## Create Tikz files
+# @param sourcedir Search for Touchstone files in this directory
+# @param resultdir Export resulting Tikz files to this directory
+def touchstone2tikz(sourcedir, resultdir):
+    touchstone_list = get_sorted_glob(os.path.join(sourcedir, "*.s*p"))
 
+    if not touchstone_list:
+        print('No touchstone files found in ' + sourcedir + '! Skipping...')
 
-## Class for multi threading support
-class threadtouchstone2tikz(threading.Thread):
-    def __init__(self, sourcedir, resultdir):
-        threading.Thread.__init__(self)
-        self.sourcedir = sourcedir
-        self.resultdir = resultdir
+    teximports = [
+        (os.path.basename(touchstone),
+         touchstone2tikz_file(touchstone, resultdir))
+        for touchstone in touchstone_list]
 
-    def run(self):
-        touchstone2tikz(self.sourcedir, self.resultdir)
+    writeImportFile(os.path.join(resultdir, 'importallpictures.tex'),
+                    teximports)
+    print('Done!')
 
 
 ## @cond Prevents doxygen from scanning the following
@@ -127,9 +162,8 @@ if __name__ == '__main__':
     else:
         print("Usage: python2 singletouchstone2tikz.py <sourcedir> <resultdir>")
 
-    clearImportFile(os.path.join(resultdir, 'importallpictures.tex'))
-
     # Call the main function provided by this package
     touchstone2tikz(sourcedir, resultdir)
+    get_build_manifest(resultdir).save()
 
 ## @endcond Prevents doxygen from scanning the code above
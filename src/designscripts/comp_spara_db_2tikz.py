@@ -19,18 +19,24 @@
 #
 # @author lukasl93
 
-from skrf import Network
 # import sys
 # import os
 # sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
 from TikzExport import ClassTikzExport
-from ClassDataStructs import ClassData2D, ClassRequirements
-from tikzhelpers import mean, get_frequnits
+from ClassDataStructs import ClassGraphData, ClassRequirements
+from sparaextract import get_extract, ClassSparaStack
+from compliance import add_network_margin_annotations, \
+    get_requirement_list
+from tikzhelpers import get_trace_stats, get_axis_layout, \
+    decimate_minmax, format_number
 
 
 ## Create Comparison Sparameter plot from multiple networks
 # @param networks Contains a list of the full Sparameterset
 # of the DUT in a Network Object from scikit-rf
+# or in a sparaextract::ClassSparaExtract, a
+# touchstonereader::ClassTouchstoneReader or a
+# lazynetwork::ClassLazyNetwork reads only the plotted traces
 # @param frequnit The unit of the frequency to be plotted -
 # String default 'GHz'
 # @param index Tuple with the Parametersets to be plotted -\n
@@ -49,19 +55,51 @@ from tikzhelpers import mean, get_frequnits
 # Must be in the same order as the @parname{indexes} array.
 # If not passed a sequence of predefined colors is used.
 # Example: ['0.00000,0.44700,0.74100','0.85000,0.32500,0.09800']
+# @param maxpoints Maximum number of points per trace, larger traces are
+# reduced to their minima and maxima per section of the frequency range
+# (see tikzhelpers::decimate_minmax) - Default None keeps all points
+# @param envelope False plots one curve per network. True or 'minmax'
+# plots the band between the minimum and the maximum of all networks and
+# their mean, 'percentiles' additionally the band between the 5th and the
+# 95th percentile and the median instead of the mean. The size of the
+# Tikz file then does not depend on the number of networks, for example
+# for production lots - Default False\n
+# Networks measured on different frequency grids are resampled to a
+# common grid over their overlapping range.
+# @param annotate Mark the worst margin of the traces to every requirement
+# with its value (see compliance::add_network_margin_annotations) - Default False
+# @param exportoptions Keyword arguments of TikzExport::ClassTikzExport,
+# for example {'datadir': ..., 'dataprefix': ...} to write the data of
+# the graphs to shared .dat files (see tikzhelpers::get_export_options) -
+# Default {} embeds the data in the Tikz file
 def comp_spara_db_2tikz(networks, frequnit='GHz', index=(1, 1),
                         descriptions=[''], requirements=[],
-                        filename='test.tikz', linestyles=[], colors=[]):
-    if not type(networks[0]) is Network:
-        raise TypeError(
-            "Wrong data type for sparam! Must be skrf Network.")
+                        filename='test.tikz', linestyles=[], colors=[],
+                        maxpoints=None, envelope=False,
+                        annotate=False, exportoptions={}):
+    # dB arrays are computed only once per network,
+    # passed ClassSparaExtract objects share them with other plots
+    extracts = [get_extract(network) for network in networks]
+    for extract in extracts:
+        # a reader reads the trace and the frequency vector in one pass
+        extract.get_traces([index])
+    # traces of all networks in one array if they share the frequency grid,
+    # for the envelope they are resampled to a common grid else
+    stack = ClassSparaStack(extracts)
+    if envelope or stack.has_common_grid():
+        traces = stack.get_traces([index])[:, 0]
+    else:
+        traces = [extract.get_trace(index) for extract in extracts]
+    if envelope:
+        # statistical bands of all networks computed in one pass,
+        # with a legend entry per band and one for the center graph
+        bands, center = stack.get_bands(
+            [index], 'minmax' if envelope is True else envelope)
+        ncurves = len(bands) + 1
+    else:
+        ncurves = len(networks)
     networknames = ''
     colornames = []
-    max_values = []
-    min_values = []
-    # Used for legend positioning in the right quarter
-    lmeans = []     # lower mean values
-    hmeans = []     # higher mean values
     # default options for yaxis label and thick graphs
     addopt = r'ylabel style={rotate=-90}'
     # additional options for graph settings
@@ -70,9 +108,9 @@ def comp_spara_db_2tikz(networks, frequnit='GHz', index=(1, 1),
     # show all sparams and adjust legend to matrix format
     if index:
         # if indexes list is very long use multicolum in legend
-        if len(networks) + len(requirements) > 5:
+        if ncurves + len(requirements) > 5:
             addopt += r',legend columns=2,/tikz/column 2/.style={column sep=5pt}'
-        elif len(networks) + len(requirements) > 11:
+        elif ncurves + len(requirements) > 11:
             addopt += r',legend columns=3,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt}'
         else:
             pass
@@ -85,162 +123,179 @@ def comp_spara_db_2tikz(networks, frequnit='GHz', index=(1, 1),
         # if not (networks.index(network) + 1) % 3:
         #     networknames += '\n% '
 
-    # create a new tikzplot
-    tikzplot = ClassTikzExport()
-    # add the header to the tikzfile with the current date
-    tikzplot.addheader(filenames=networknames)
-    # Temporary solution because i = networks.index(network)
-    # causes an error, whyever ...
-    i = 0
-    for network in networks:
-        # i = networks.index(network)
-        # define a color for each graph to be added
-        colornames.append('colorNetw' + str(i))
-        # Use colors if given else use own defaults
-        if len(colors) == len(networks):
-            tikzplot.addcolor(colornames[i], colors[i])
-        else:
-            tikzplot.addcolor(
-                colornames[i],
-                tikzplot.get_collist()[i % len(tikzplot.get_collist())]
-            )
-
-        element = \
-            [s[int(index[0]) - 1][int(index[1]) - 1] for s in network.s_db]
-        # required for graph y boundaries
-        max_values.append(max(element))
-        min_values.append(min(element))
-        # required for optimal legend positioning
-        lmeans.append(mean(element[0:len(element) / 2]))
-        hmeans.append(mean(element[len(element) / 2:len(element)]))
+    # check the requirements before the file is created
+    if requirements:
+        get_requirement_list(requirements)
+
+    # create a new tikzplot, which writes all sections to the file directly
+    tikzplot = ClassTikzExport(**exportoptions)
+    tikzplot.openTikzFile(filename)
+    try:
+        # add the header to the tikzfile with the current date
+        tikzplot.addheader(filenames=networknames)
+        if envelope:
+            tikzplot.addcolor('colorBand', (colors or tikzplot.get_collist())[0])
+            tikzplot.addcolor('colorMean', (colors or tikzplot.get_collist())[0])
+        # Colors of all graphs, added in one call
+        graphcolors = []
         # Temporary solution because i = networks.index(network)
         # causes an error, whyever ...
-        i += 1
+        i = 0
+        for network in ([] if envelope else networks):
+            # i = networks.index(network)
+            # define a color for each graph to be added
+            colornames.append('colorNetw' + str(i))
+            # Use colors if given else use own defaults
+            if len(colors) == len(networks):
+                graphcolors.append((colornames[i], colors[i]))
+            else:
+                graphcolors.append((
+                    colornames[i],
+                    tikzplot.get_collist()[i % len(tikzplot.get_collist())]
+                ))
+            # Temporary solution because i = networks.index(network)
+            # causes an error, whyever ...
+            i += 1
+        tikzplot.addcolors(graphcolors)
 
-    if requirements:
-        if type(requirements) is ClassRequirements:
-            tikzplot.addcolor('requirement', requirements.graphcolor)
-            max_values.append(max(requirements.data).yvalue)
-            min_values.append(min(requirements.data).yvalue)
-            lmeans.append(max(requirements.data).yvalue)
-            hmeans.append(max(requirements.data).yvalue)
+        # required for graph y boundaries and for optimal legend positioning
+        # in the right quarter by the lower and higher mean values
+        min_values, max_values, lmeans, hmeans = get_trace_stats(traces)
+
+        if requirements:
+            if type(requirements) is ClassRequirements:
+                tikzplot.addcolor('requirement', requirements.graphcolor)
+                max_values.append(requirements.data.get_max().yvalue)
+                min_values.append(requirements.data.get_min().yvalue)
+                lmeans.append(requirements.data.get_max().yvalue)
+                hmeans.append(requirements.data.get_max().yvalue)
+            else:
+                for requirement in requirements:
+                    if not type(requirement) is ClassRequirements:
+                        raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
+                    tikzplot.addcolor(
+                        'requirement' + str(requirements.index(requirement)),
+                        requirement.graphcolor
+                    )
+                    max_values.append(requirement.data.get_max().yvalue)
+                    min_values.append(requirement.data.get_min().yvalue)
+                    lmeans.append(requirement.data.get_max().yvalue)
+                    hmeans.append(requirement.data.get_max().yvalue)
+
+        # y axis range and legend position of all traces and requirements,
+        # values below -40 dB are cut off
+        ymin, ymax, legendposind = get_axis_layout(
+            min_values, max_values, lmeans, hmeans)
+
+        # Add plot optimized for S-Paramter plotting
+        if envelope:
+            axisxdata = stack.get_xdata(frequnit)
         else:
-            for requirement in requirements:
-                if not type(requirement) is ClassRequirements:
-                    raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
-                tikzplot.addcolor(
-                    'requirement' + str(requirements.index(requirement)),
-                    requirement.graphcolor
-                )
-                max_values.append(max(requirement.data).yvalue)
-                min_values.append(min(requirement.data).yvalue)
-                lmeans.append(max(requirement.data).yvalue)
-                hmeans.append(max(requirement.data).yvalue)
-
-    max_value = max(max_values)
-    min_value = min(min_values)
-
-    # Values below -40 dB will be cut off
-    # due to non validity of measurement values for S-Parameters
-    if min_value < -40:
-        min_value = -40
-
-    # range to add above and below the graph in y direction
-    yaddr = int((max_value - min_value) * 0.1)
-    if yaddr < 0.5:
-        yaddr = 0.5
-
-    # value of the middle of the y axis
-    ymid = min_value + (max_value - min_value) / 2
-    # chose quarter of the plot for the legendposition where the graphs
-    # have the minimum mean distance to the middle of the plot
-    # 1 | 0
-    # ----- plotmiddle
-    # 2 | 3
-    legenddec = \
-        [max(hmeans) - ymid, max(lmeans) - ymid,
-            ymid - min(lmeans), ymid - min(hmeans)]
-    legendposind = legenddec.index(min(legenddec))
-
-    # Add plot optimized for S-Paramter plotting
-    tikzplot.addconf(
-        str(min(network.f) / get_frequnits()[frequnit]),
-        str(max(network.f) / get_frequnits()[frequnit]),
-        str(min_value - yaddr), str(max_value + yaddr),
-        xunit=frequnit, yunit='dB', addoptions=addopt,
-        legendpos=tikzplot.get_legendpositions()[legendposind][0],
-        legendanchor=tikzplot.get_legendpositions()[legendposind][1])
-
-    # Temporary solution because i = networks.index(network)
-    # causes an error, whyever ...
-    i = 0
-    # Add all the graphs to the plot
-    for network in networks:
-        # i = networks.index(network)
-        # Use linestyles if given else use own default
-        if len(linestyles) == len(networks):
-            tikzplot.addplot(colornames[i], linestyles[i],
+            axisxdata = extracts[-1].get_xdata(frequnit)
+        tikzplot.addconf(
+            format_number(axisxdata.min()), format_number(axisxdata.max()),
+            format_number(ymin), format_number(ymax),
+            xunit=frequnit, yunit='dB', addoptions=addopt,
+            legendpos=tikzplot.get_legendpositions()[legendposind][0],
+            legendanchor=tikzplot.get_legendpositions()[legendposind][1])
+
+        if envelope:
+            # Add the bands of all networks from the outer to the inner band
+            # and the center graph
+            xdata = stack.get_xdata(frequnit)
+            for k, (name, lower, upper) in enumerate(bands):
+                tikzplot.addband(
+                    'colorBand',
+                    ClassGraphData(*decimate_minmax(xdata, lower[0], maxpoints),
+                                   xunit=frequnit),
+                    ClassGraphData(*decimate_minmax(xdata, upper[0], maxpoints),
+                                   xunit=frequnit),
+                    opacity='%g' % (0.2 * (k + 1)), bandname='band' + str(k))
+                tikzplot.addlegend(str(index[0]) + str(index[1]), ' - ' + name +
+                                   ' of ' + str(len(networks)) + ' networks')
+            tikzplot.addplot('colorMean', (linestyles or [''])[0],
                              addoptions=graphopt)
-        else:
-            tikzplot.addplot(
-                colornames[i],
-                tikzplot.get_linestyles()
-                [i % len(tikzplot.get_linestyles())],
-                addoptions=graphopt
-            )
-        # Transform data to required format
-        data = []
-        for m in range(0, len(network.f), 1):
-            data.append(
-                ClassData2D(
-                    network.f[m] / get_frequnits()[frequnit],
-                    network.s_db[m][int(index[0]) - 1][int(index[1]) - 1]
-                )
-            )
-        # Add data to plot
-        tikzplot.adddata(data)
-        # Add legend with description if given
-        try:
-            tikzplot.addlegend(str(index[0]) + str(index[1]),
-                               descriptions[i])
-        except IndexError:
-            tikzplot.addlegend(str(index[0]) + str(index[1]))
+            tikzplot.adddata(ClassGraphData(
+                *decimate_minmax(xdata, center[1][0], maxpoints), xunit=frequnit))
+            tikzplot.addlegend(str(index[0]) + str(index[1]), ' - ' + center[0] +
+                               ' of ' + str(len(networks)) + ' networks')
+
         # Temporary solution because i = networks.index(network)
         # causes an error, whyever ...
-        i += 1
+        i = 0
+        # Add all the graphs to the plot in one call
+        graphs = []
+        for network in ([] if envelope else networks):
+            # i = networks.index(network)
+            # Use linestyles if given else use own default
+            if len(linestyles) == len(networks):
+                linestyle = linestyles[i]
+            else:
+                linestyle = tikzplot.get_linestyles()[
+                    i % len(tikzplot.get_linestyles())]
+            # Add legend with description if given
+            if i < len(descriptions):
+                legend = (str(index[0]) + str(index[1]), descriptions[i])
+            else:
+                legend = (str(index[0]) + str(index[1]),)
+            # Add data to plot, the trace is already extracted
+            graphs.append((colornames[i], linestyle, graphopt, ClassGraphData(
+                *decimate_minmax(extracts[i].get_xdata(frequnit),
+                                 traces[i], maxpoints),
+                xunit=frequnit), legend))
+            # Temporary solution because i = networks.index(network)
+            # causes an error, whyever ...
+            i += 1
+        tikzplot.addgraphs(graphs)
 
-    # Add requirements if given:
-    if requirements:
-        if type(requirements) is ClassRequirements:
-            tikzplot.addplot('requirement', requirements.linestyle,
-                             addoptions='ultra thick')
-            tikzplot.adddata(requirements.data)
-            tikzplot.addlegend(label=requirements.legendentry)
-            # filter empty string, beacuse then nothing is to do
-            if requirements.reqtype:
-                tikzplot.add_req_type_ind(requirements, 'requirement')
-        else:
-            for requirement in requirements:
-                if not type(requirement) is ClassRequirements:
-                    raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
-                tikzplot.addplot(
-                    'requirement' + str(requirements.index(requirement)),
-                    requirement.linestyle, addoptions='ultra thick'
-                )
-                tikzplot.adddata(requirement.data)
-                tikzplot.addlegend(label=requirement.legendentry)
-
-            for requirement in requirements:
+        # Add requirements if given:
+        if requirements:
+            if type(requirements) is ClassRequirements:
+                tikzplot.addplot('requirement', requirements.linestyle,
+                                 addoptions='ultra thick')
+                tikzplot.adddata(requirements.data)
+                tikzplot.addlegend(label=requirements.legendentry)
                 # filter empty string, beacuse then nothing is to do
-                if requirement.reqtype:
-                    tikzplot.add_req_type_ind(
-                        requirement,
-                        'requirement' + str(
-                            requirements.index(requirement))
+                if requirements.reqtype:
+                    tikzplot.add_req_type_ind(requirements, 'requirement')
+            else:
+                for requirement in requirements:
+                    if not type(requirement) is ClassRequirements:
+                        raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
+                    tikzplot.addplot(
+                        'requirement' + str(requirements.index(requirement)),
+                        requirement.linestyle, addoptions='ultra thick'
                     )
+                    tikzplot.adddata(requirement.data)
+                    tikzplot.addlegend(label=requirement.legendentry)
+
+                for requirement in requirements:
+                    # filter empty string, beacuse then nothing is to do
+                    if requirement.reqtype:
+                        tikzplot.add_req_type_ind(
+                            requirement,
+                            'requirement' + str(
+                                requirements.index(requirement))
+                        )
+
+        # Mark the worst margin to every requirement
+        if requirements and annotate:
+            if type(requirements) is ClassRequirements:
+                reqcolornames = ['requirement']
+            else:
+                reqcolornames = ['requirement' + str(i)
+                                 for i in range(len(requirements))]
+            # the worst point is searched on the own frequency points of
+            # every network like in the compliance report
+            add_network_margin_annotations(tikzplot, extracts, [index],
+                                           requirements, reqcolornames,
+                                           frequnit)
 
-    # Final thing to add to the Tikzpicture before export
-    tikzplot.addfooter()
-    # Export generated Tikzcode to file
-    # in folder where this Classfile is located
-    tikzplot.createTikzFile(filename)
+        # Final thing to add to the Tikzpicture before export
+        tikzplot.addfooter()
+        # Finish the export of the generated Tikzcode to file
+        # in folder where this Classfile is located
+        tikzplot.createTikzFile(filename)
+    finally:
+        # removes the incomplete file if the export failed
+        tikzplot.closeTikzFile()
@@ -19,18 +19,23 @@
 #
 # @author lukasl93
 
-from skrf import Network
 # import sys
 # import os
 # sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'basefiles'))
 from TikzExport import ClassTikzExport
-from ClassDataStructs import ClassData2D, ClassRequirements
-from tikzhelpers import mean, get_frequnits
+from ClassDataStructs import ClassGraphData, ClassRequirements
+from sparaextract import get_extract
+from compliance import add_margin_annotations, get_requirement_list
+from tikzhelpers import get_trace_stats, get_axis_layout, \
+    decimate_minmax, format_number
 
 
 ## Create Sparameter plot from the given Data
 # @param network Contains the full Sparameterset of the DUT
 # in a Network Object from scikit-rf
+# or in a sparaextract::ClassSparaExtract, a
+# touchstonereader::ClassTouchstoneReader or a
+# lazynetwork::ClassLazyNetwork reads only the plotted traces
 # @param frequnit The unit of the frequency to be plotted -
 # String default 'GHz'
 # @param indexes Tuple array with the Parametersets to be plotted -\n
@@ -50,234 +55,240 @@ from tikzhelpers import mean, get_frequnits
 # Must be in the same order as the @parname{indexes} array.
 # If not passed a sequence of predefined colors is used.
 # Example: ['0.00000,0.44700,0.74100','0.85000,0.32500,0.09800']
+# @param maxpoints Maximum number of points per trace, larger traces are
+# reduced to their minima and maxima per section of the frequency range
+# (see tikzhelpers::decimate_minmax) - Default None keeps all points
+# @param annotate Mark the worst margin of the traces to every requirement
+# with its value (see compliance::add_margin_annotations) - Default False
+# @param exportoptions Keyword arguments of TikzExport::ClassTikzExport,
+# for example {'datadir': ..., 'dataprefix': ...} to write the data of
+# the graphs to shared .dat files (see tikzhelpers::get_export_options) -
+# Default {} embeds the data in the Tikz file
 def spara_db_2tikz(network, frequnit='GHz', indexes=[],
                    descriptions=[''], requirements=[], unity='dB',
-                   filename='test.tikz', linestyles=[], colors=[]):
-    if not type(network) is Network:
-        raise TypeError("Wrong data type for sparam! Must be skrf Network.")
-    colornames = []
-    max_values = []
-    min_values = []
-    # Used for legend positioning in the right quarter
-    lmeans = []     # lower mean values
-    hmeans = []     # higher mean values
-    # default options for yaxis label and thick graphs
-    addopt = r'ylabel style={rotate=-90}'
-    # additional options for graph settings
-    graphopt = r''
-    # if supplied with an empty indexes list:
-    # show all sparams and adjust legend to matrix format
-    if not indexes:
-        indexes = [(m, n) for m in range(1, network.nports + 1, 1) for n in range(1, network.nports + 1, 1)]
-        if len(indexes) == 4:
-            addopt += r',legend columns=2,/tikz/column 2/.style={column sep=5pt}'
-        elif len(indexes) == 9:
-            addopt += r',legend columns=3,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt}'
-        elif len(indexes) == 16:
-            addopt += r',legend columns=4,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt},/tikz/column 6/.style={column sep=5pt}'
-        elif len(indexes) > 16:
-            addopt += r',legend columns=5,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt},/tikz/column 6/.style={column sep=5pt},/tikz/column 8/.style={column sep=5pt}'
-    # if indexes list is very long use multicolum in legend
-    else:
-        if len(indexes) + len(requirements) > 5:
-            addopt += r',legend columns=2,/tikz/column 2/.style={column sep=5pt}'
-        elif len(indexes) + len(requirements) > 11:
-            addopt += r',legend columns=3,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt}'
+                   filename='test.tikz', linestyles=[], colors=[],
+                   maxpoints=None, annotate=False, exportoptions={}):
+    spara_db_2tikz_batch(
+        network, [{'indexes': indexes, 'descriptions': descriptions,
+                   'requirements': requirements, 'filename': filename,
+                   'linestyles': linestyles, 'colors': colors}],
+        frequnit=frequnit, unity=unity, maxpoints=maxpoints,
+        annotate=annotate, exportoptions=exportoptions)
 
-    # create a new tikzplot
-    tikzplot = ClassTikzExport()
-    # add the header to the tikzfile with the current date
-    tikzplot.addheader(filenames=network.name)
-    for i in range(0, len(indexes), 1):
-        # define a color for each graph to be added
-        if type(indexes[i]) is tuple:
-            colornames.append(
-                'colorS' + str(indexes[i][0]) + str(indexes[i][1]))
-        elif indexes[i] == 'D':
-            colornames.append(
-                'colorS' + indexes[i])
-        else:
-            raise TypeError("Innapropriate Type for indexes element must be S-Param tuple or a known String!")
-        # Use colors if given else use own defaults
-        if len(colors) == len(indexes):
-            tikzplot.addcolor(colornames[i], colors[i])
-        else:
-            tikzplot.addcolor(
-                colornames[i],
-                tikzplot.get_collist()[i % len(tikzplot.get_collist())])
-        if type(indexes[i]) is tuple:
-            if unity == 'dB':
-                element = \
-                    [s[int(indexes[i][0]) - 1][int(indexes[i][1]) - 1]
-                        for s in network.s_db]
-            elif unity == 'deg':
-                element = \
-                    [s[int(indexes[i][0]) - 1][int(indexes[i][1]) - 1]
-                        for s in network.s_deg]
-            else:
-                raise ValueError('Innapropriate Unit for Y-Data in unity variable!')
-        elif indexes[i] == 'D':
-            element = [s[(3) - 1][(1) - 1] -
-                       (s[(2) - 1][(1) - 1] +
-                        s[(3) - 1][(2) - 1])
-                       for s in network.s_db]
-        else:
-            raise TypeError("Innapropriate Type for indexes element must be S-Param tuple or a known String!")
-        # required for graph y boundaries
-        max_values.append(max(element))
-        min_values.append(min(element))
-        # required for optimal legend positioning
-        lmeans.append(mean(element[0: len(element) / 2]))
-        hmeans.append(mean(element[len(element) / 2: len(element)]))
 
-    if requirements:
-        if type(requirements) is ClassRequirements:
-            tikzplot.addcolor('requirement', requirements.graphcolor)
-            max_values.append(max(requirements.data).yvalue)
-            min_values.append(min(requirements.data).yvalue)
-            lmeans.append(max(requirements.data).yvalue)
-            hmeans.append(max(requirements.data).yvalue)
+## Create several Sparameter plots of one network, the traces of all
+# plots are extracted, reduced and evaluated only once
+# @param network Contains the full Sparameterset of the DUT
+# in a Network Object from scikit-rf
+# or in a sparaextract::ClassSparaExtract, a
+# touchstonereader::ClassTouchstoneReader or a
+# lazynetwork::ClassLazyNetwork reads the traces of all plots in one pass
+# @param figures List of dictionaries, one per plot, with the keys
+# 'indexes', 'descriptions', 'requirements', 'filename', 'linestyles' and
+# 'colors' of spara_db_2tikz; missing keys get the defaults of
+# spara_db_2tikz.\n
+# Example [{'indexes': [(1,1)], 'filename': 'S11.tikz'}]
+# @param frequnit The unit of the frequency to be plotted -
+# String default 'GHz'
+# @param unity Unit of the y data of all plots - String 'dB' or 'deg'
+# @param maxpoints Maximum number of points per trace, see spara_db_2tikz
+# @param annotate Mark the worst margins in all plots, see spara_db_2tikz
+# @param exportoptions Keyword arguments of TikzExport::ClassTikzExport
+# for all plots, see spara_db_2tikz
+def spara_db_2tikz_batch(network, figures, frequnit='GHz', unity='dB',
+                         maxpoints=None, annotate=False, exportoptions={}):
+    # dB and degree arrays are computed only once for all traces,
+    # a passed ClassSparaExtract shares them with other plots
+    extract = get_extract(network)
+    # plots without indexes show all sparams
+    allsparams = [(m, n) for m in range(1, network.nports + 1, 1) for n in range(1, network.nports + 1, 1)]
+    allindexes = []
+    for figure in figures:
+        for index in figure.get('indexes') or allsparams:
+            if index not in allindexes:
+                allindexes.append(index)
+    # all traces of all plots at once, so a reader reads the file only once
+    # together with the frequency vector
+    alltraces = extract.get_traces(allindexes, unity)
+    xdata = extract.get_xdata(frequnit)
+    # required for graph y boundaries and for optimal legend positioning
+    # in the right quarter by the lower and higher mean values
+    allstats = get_trace_stats(alltraces)
+    # Reduce all traces at once to the point budget
+    allplotxdata, allplotydata = decimate_minmax(
+        xdata, alltraces, maxpoints)
+
+    for figure in figures:
+        indexes = figure.get('indexes', [])
+        descriptions = figure.get('descriptions', [''])
+        requirements = figure.get('requirements', [])
+        filename = figure.get('filename', 'test.tikz')
+        linestyles = figure.get('linestyles', [])
+        colors = figure.get('colors', [])
+        colornames = []
+        # default options for yaxis label and thick graphs
+        addopt = r'ylabel style={rotate=-90}'
+        # additional options for graph settings
+        graphopt = r''
+        # if supplied with an empty indexes list:
+        # show all sparams and adjust legend to matrix format
+        if not indexes:
+            indexes = allsparams
+            if len(indexes) == 4:
+                addopt += r',legend columns=2,/tikz/column 2/.style={column sep=5pt}'
+            elif len(indexes) == 9:
+                addopt += r',legend columns=3,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt}'
+            elif len(indexes) == 16:
+                addopt += r',legend columns=4,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt},/tikz/column 6/.style={column sep=5pt}'
+            elif len(indexes) > 16:
+                addopt += r',legend columns=5,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt},/tikz/column 6/.style={column sep=5pt},/tikz/column 8/.style={column sep=5pt}'
+        # if indexes list is very long use multicolum in legend
         else:
-            for requirement in requirements:
-                if not type(requirement) is ClassRequirements:
-                    raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
-                tikzplot.addcolor(
-                    'requirement' + str(requirements.index(requirement)),
-                    requirement.graphcolor
-                )
-                max_values.append(max(requirement.data).yvalue)
-                min_values.append(min(requirement.data).yvalue)
-                lmeans.append(max(requirement.data).yvalue)
-                hmeans.append(max(requirement.data).yvalue)
+            if len(indexes) + len(requirements) > 5:
+                addopt += r',legend columns=2,/tikz/column 2/.style={column sep=5pt}'
+            elif len(indexes) + len(requirements) > 11:
+                addopt += r',legend columns=3,/tikz/column 2/.style={column sep=5pt},/tikz/column 4/.style={column sep=5pt}'
+        # rows of the traces of this plot in the shared arrays
+        rows = [allindexes.index(index) for index in indexes]
+        traces = [alltraces[row] for row in rows]
 
-    max_value = max(max_values)
-    min_value = min(min_values)
+        for i in range(0, len(indexes), 1):
+            # define a color for each graph to be added
+            if type(indexes[i]) is tuple:
+                colornames.append(
+                    'colorS' + str(indexes[i][0]) + str(indexes[i][1]))
+            elif indexes[i] == 'D':
+                colornames.append(
+                    'colorS' + indexes[i])
+            else:
+                raise TypeError("Innapropriate Type for indexes element must be S-Param tuple or a known String!")
+        # check the requirements before the file is created
+        if requirements:
+            get_requirement_list(requirements)
 
-    # Values below -40 dB will be cut off
-    # due to non validity of measurement values for S-Parameters
-    if min_value < -40:
-        min_value = -40
+        # create a new tikzplot, which writes all sections to the file
+        # directly
+        tikzplot = ClassTikzExport(**exportoptions)
+        tikzplot.openTikzFile(filename)
+        try:
+            # add the header to the tikzfile with the current date
+            tikzplot.addheader(filenames=network.name)
+            # Use colors if given else use own defaults
+            if len(colors) == len(indexes):
+                tikzplot.addcolors(zip(colornames, colors))
+            else:
+                tikzplot.addcolors(
+                    (colornames[i],
+                     tikzplot.get_collist()[i % len(tikzplot.get_collist())])
+                    for i in range(len(indexes)))
 
-    # range to add above and below the graph in y direction
-    yaddr = int((max_value - min_value) * 0.1)
-    if yaddr < 0.5:
-        yaddr = 0.5
+            min_values, max_values, lmeans, hmeans = (
+                [stat[row] for row in rows] for stat in allstats)
 
-    # value of the middle of the y axis
-    ymid = min_value + (max_value - min_value) / 2
-    # chose quarter of the plot for the legendposition
-    # where the graphs have the minimum mean distance
-    # to the middle of the plot
-    # 1 | 0
-    # ----- plotmiddle
-    # 2 | 3
-    legenddec = [max(hmeans) - ymid, max(lmeans) - ymid,
-                 ymid - min(lmeans), ymid - min(hmeans)]
-    legendposind = legenddec.index(min(legenddec))
+            if requirements:
+                if type(requirements) is ClassRequirements:
+                    tikzplot.addcolor('requirement', requirements.graphcolor)
+                    max_values.append(requirements.data.get_max().yvalue)
+                    min_values.append(requirements.data.get_min().yvalue)
+                    lmeans.append(requirements.data.get_max().yvalue)
+                    hmeans.append(requirements.data.get_max().yvalue)
+                else:
+                    for requirement in requirements:
+                        if not type(requirement) is ClassRequirements:
+                            raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
+                        tikzplot.addcolor(
+                            'requirement' + str(requirements.index(requirement)),
+                            requirement.graphcolor
+                        )
+                        max_values.append(requirement.data.get_max().yvalue)
+                        min_values.append(requirement.data.get_min().yvalue)
+                        lmeans.append(requirement.data.get_max().yvalue)
+                        hmeans.append(requirement.data.get_max().yvalue)
 
-    # Add plot optimized for S-Paramter plotting
-    tikzplot.addconf(
-        str(min(network.f) / get_frequnits()[frequnit]),
-        str(max(network.f) / get_frequnits()[frequnit]),
-        str(min_value - yaddr), str(max_value + yaddr),
-        xunit=frequnit, yunit=unity, addoptions=addopt,
-        legendpos=tikzplot.get_legendpositions()[legendposind][0],
-        legendanchor=tikzplot.get_legendpositions()[legendposind][1]
-    )
+            # y axis range and legend position of all traces and requirements,
+            # values below -40 dB are cut off
+            ymin, ymax, legendposind = get_axis_layout(
+                min_values, max_values, lmeans, hmeans)
 
-    # Add all the graphs to the plot
-    for i in range(0, len(indexes), 1):
-        # Use linestyles if given else use own default
-        if len(linestyles) == len(indexes):
-            tikzplot.addplot(colornames[i], linestyles[i], addoptions=graphopt)
-        else:
-            tikzplot.addplot(
-                colornames[i],
-                tikzplot.get_linestyles()
-                [i % len(tikzplot.get_linestyles())],
-                addoptions=graphopt
+            # Add plot optimized for S-Paramter plotting
+            tikzplot.addconf(
+                format_number(xdata.min()), format_number(xdata.max()),
+                format_number(ymin), format_number(ymax),
+                xunit=frequnit, yunit=unity, addoptions=addopt,
+                legendpos=tikzplot.get_legendpositions()[legendposind][0],
+                legendanchor=tikzplot.get_legendpositions()[legendposind][1]
             )
-        # Transform data to required format
-        data = []
-        if type(indexes[i]) is tuple:
-            if unity == 'dB':
-                for m in range(0, len(network.f), 1):
-                    data.append(
-                        ClassData2D(
-                            network.f[m] / get_frequnits()[frequnit],
-                            network.s_db[m][int(indexes[i][0]) - 1]
-                            [int(indexes[i][1]) - 1]
-                        )
-                    )
-            elif unity == 'deg':
-                for m in range(0, len(network.f), 1):
-                    data.append(
-                        ClassData2D(
-                            network.f[m] / get_frequnits()[frequnit],
-                            network.s_deg[m][int(indexes[i][0]) - 1]
-                            [int(indexes[i][1]) - 1]
-                        )
-                    )
-            else:
-                raise ValueError('Innapropriate Unit for Y-Data in unity variable!')
-        elif indexes[i] == 'D':  # Calculate directivity
-            for m in range(0, len(network.f), 1):
-                directivity = (network.s_db[m][(3) - 1][(1) - 1] -
-                               (network.s_db[m][(2) - 1][(1) - 1] +
-                                network.s_db[m][(3) - 1][(2) - 1]))
-                data.append(
-                    ClassData2D(
-                        network.f[m] / get_frequnits()[frequnit],
-                        directivity
-                    )
-                )
-        else:
-            raise TypeError('indexes contains unknown Type and Option!')
 
-        # Add data to plot
-        tikzplot.adddata(data)
-        # Add legend with description if given
-        try:
-            if indexes[i] == 'D':
-                tikzplot.addlegend('D', ' - Direktivit"at')
-            else:
-                tikzplot.addlegend(str(indexes[i][0]) + str(indexes[i][1]),
-                                   descriptions[i])
-        except IndexError:
-            tikzplot.addlegend(str(indexes[i][0]) + str(indexes[i][1]))
+            # Add all the graphs to the plot at once
+            graphs = []
+            for i in range(0, len(indexes), 1):
+                # Use linestyles if given else use own default
+                if len(linestyles) == len(indexes):
+                    linestyle = linestyles[i]
+                else:
+                    linestyle = tikzplot.get_linestyles()[
+                        i % len(tikzplot.get_linestyles())]
+                # Add legend with description if given
+                if indexes[i] == 'D':
+                    legend = ('D', ' - Direktivit"at')
+                elif i < len(descriptions):
+                    legend = (str(indexes[i][0]) + str(indexes[i][1]),
+                              descriptions[i])
+                else:
+                    legend = (str(indexes[i][0]) + str(indexes[i][1]),)
+                # the trace is already extracted and reduced
+                graphs.append((colornames[i], linestyle, graphopt,
+                               ClassGraphData(allplotxdata[rows[i]],
+                                              allplotydata[rows[i]],
+                                              yunit=unity, xunit=frequnit),
+                               legend))
+            tikzplot.addgraphs(graphs)
 
-    # Add requirements if given:
-    if requirements:
-        if type(requirements) is ClassRequirements:
-            tikzplot.addplot('requirement', requirements.linestyle,
-                             addoptions='ultra thick')
-            tikzplot.adddata(requirements.data)
-            tikzplot.addlegend(label=requirements.legendentry)
-            # filter empty string, beacuse then nothing is to do
-            if requirements.reqtype:
-                tikzplot.add_req_type_ind(requirements, 'requirement')
-        else:
-            for requirement in requirements:
-                if not type(requirement) is ClassRequirements:
-                    raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
-                tikzplot.addplot(
-                    'requirement' + str(requirements.index(requirement)),
-                    requirement.linestyle, addoptions='ultra thick'
-                )
-                tikzplot.adddata(requirement.data)
-                tikzplot.addlegend(label=requirement.legendentry)
+            # Add requirements if given:
+            if requirements:
+                if type(requirements) is ClassRequirements:
+                    tikzplot.addplot('requirement', requirements.linestyle,
+                                     addoptions='ultra thick')
+                    tikzplot.adddata(requirements.data)
+                    tikzplot.addlegend(label=requirements.legendentry)
+                    # filter empty string, beacuse then nothing is to do
+                    if requirements.reqtype:
+                        tikzplot.add_req_type_ind(requirements, 'requirement')
+                else:
+                    for requirement in requirements:
+                        if not type(requirement) is ClassRequirements:
+                            raise TypeError('Variable requirements must be of type ClassRequirements or a list with ClassRequirements Objects!')
+                        tikzplot.addplot(
+                            'requirement' + str(requirements.index(requirement)),
+                            requirement.linestyle, addoptions='ultra thick'
+                        )
+                        tikzplot.adddata(requirement.data)
+                        tikzplot.addlegend(label=requirement.legendentry)
+
+                    for requirement in requirements:
+                        # filter empty string, beacuse then nothing is to do
+                        if requirement.reqtype:
+                            tikzplot.add_req_type_ind(
+                                requirement,
+                                'requirement' + str(
+                                    requirements.index(requirement))
+                            )
 
-            for requirement in requirements:
-                # filter empty string, beacuse then nothing is to do
-                if requirement.reqtype:
-                    tikzplot.add_req_type_ind(
-                        requirement,
-                        'requirement' + str(
-                            requirements.index(requirement))
-                    )
+            # Mark the worst margin to every requirement
+            if requirements and annotate:
+                if type(requirements) is ClassRequirements:
+                    reqcolornames = ['requirement']
+                else:
+                    reqcolornames = ['requirement' + str(i)
+                                     for i in range(len(requirements))]
+                add_margin_annotations(tikzplot, xdata, traces, requirements,
+                                       reqcolornames, unity)
 
-    # Final thing to add to the Tikzpicture before export
-    tikzplot.addfooter()
-    # Export generated Tikzcode to file
-    # in folder where this Classfile is located
-    tikzplot.createTikzFile(filename)
+            # Final thing to add to the Tikzpicture before export
+            tikzplot.addfooter()
+            # Finish the export of the generated Tikzcode to file
+            # in folder where this Classfile is located
+            tikzplot.createTikzFile(filename)
+        finally:
+            # removes the incomplete file if the export failed
+            tikzplot.closeTikzFile()
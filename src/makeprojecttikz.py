@@ -8,88 +8,203 @@
 # and comparison plots with all .s*p files
 # in subfolders of #sourcedir.
 #
+# The plots are created by independent jobs on a pool of worker
+# processes, one job per Touchstone file and one per comparison folder.
+# With --manifest the plots of a JSON plot manifest are created instead,
+# see configscripts/manifesttouchstone2tikz.py
+#
 # Resulting .tikz files are exported to #resultdir.
 #
 # @date Created on 27.04.2017\n
-# Last edited on 27.08.2017
+# Last edited on 18.10.2026
 #
 # @author lukasl93
 
+import argparse
+import calendar
 import os
 import sys
+import time
 sys.path.append(os.path.join(os.path.dirname(__file__), 'basefiles'))
-from tikzhelpers import clearImportFile
+from tikzhelpers import writeImportFile, get_sorted_glob
+from networkcache import set_cache_dir
+from buildmanifest import get_build_manifest, pop_manifest_updates, \
+    merge_manifest_updates
+from jobscheduler import ClassJobScheduler
+from profiler import profiler, enable_profiling, stage
 sys.path.append(os.path.join(os.path.dirname(__file__), 'configscripts'))
-from singletouchstone2tikz import threadtouchstone2tikz
-from completetouchstone2tikz import threadfulltouchstone2tikz
-from comptouchstone2tikz import threadcomparisons2tikz
-from multcomptouchstone2tikz import threadmultcomparisons2tikz
-
-
-# Source directory with .s*p files
-sourcedir = os.path.join(os.path.dirname(__file__),
-                         '..', 'touchstoneinput')
-
-# Result directory for tikz files
-resultdir = os.path.join(os.path.dirname(__file__),
-                         '..', 'LatexTest', 'tikz')
-
-# Support command line arguments for input and output directory
-if len(sys.argv) == 1:
-    pass
-elif len(sys.argv) == 3:
-    sourcedir = sys.argv[1]
-    resultdir = sys.argv[2]
-else:
-    print("Usage: python2 makeprojectikz.py <sourcedir> <resultdir>")
-
-singlesubdirs = [
-    o for o in os.listdir(os.path.join(sourcedir, 'singlecomppic'))
-    if os.path.isdir(os.path.join(sourcedir, 'singlecomppic', o))
-]
-
-multsubdirs = [
-    o for o in os.listdir(os.path.join(sourcedir, 'multcomppic'))
-    if os.path.isdir(os.path.join(sourcedir, 'multcomppic', o))
-]
-
-clearImportFile(os.path.join(resultdir, 'completepictures.tex'))
-clearImportFile(os.path.join(resultdir, 'importallpictures.tex'))
-clearImportFile(os.path.join(resultdir, 'importcomppictures.tex'))
-clearImportFile(os.path.join(resultdir, 'importmultcomppictures.tex'))
-
-# Create Tikz plots containing full S-Matrix
-fulltikz = threadfulltouchstone2tikz(os.path.join(sourcedir, 'fullpic'),
-                                     resultdir)
-fulltikz.start()
-
-
-# Create Tikz plots based on one Touchstone file
-singletikz = threadtouchstone2tikz(os.path.join(sourcedir, 'singlepic'),
-                                   resultdir)
-singletikz.start()
-
-# Create Tikz plots containing comparisions of multiple
-# Touchstone files
-for d in singlesubdirs:
-    # Call the main function provided by this package
-    comptikz = threadcomparisons2tikz(
-        os.path.join(sourcedir, 'singlecomppic', d),
-        resultdir, d)
-    comptikz.start()
-
-# Create Tikz plots containing comparisions of multiple
-# Touchstone files and multiple S-Paramesters
-for d in multsubdirs:
-    # Call the main function provided by this package
-    multcomptikz = threadmultcomparisons2tikz(
-        os.path.join(sourcedir, 'multcomppic', d),
-        resultdir, d)
-    multcomptikz.start()
-
-fulltikz.join()
-singletikz.join()
-comptikz.join()
-multcomptikz.join()
-
-print("All done")
+from singletouchstone2tikz import touchstone2tikz_file
+from completetouchstone2tikz import fulltouchstone2tikz_file
+from comptouchstone2tikz import comparisons2tikz
+from multcomptouchstone2tikz import multcomparisons2tikz
+from manifesttouchstone2tikz import load_plot_manifest, compile_job_graph, \
+    plots2tikz
+
+
+## Set up a worker process
+# @param cachedir Directory of the binary cache of parsed Touchstone files
+# @param profile Record the stages of the jobs
+def init_worker(cachedir, profile):
+    set_cache_dir(cachedir)
+    enable_profiling(profile)
+
+
+## Run a function of a config script as job on a worker process
+# @param function Function of a config script
+# @param args Arguments for @parname{function}, the first one is the
+# Touchstone file, the comparison folder or the plots of a manifest job
+# @return Tuple of the result of @parname{function}, the fingerprints
+# of all Tikz files created by it and the recorded profiling events
+def run_config(function, *args):
+    with stage(function.__name__, 'job', source=args[0]):
+        result = function(*args)
+    return result, pop_manifest_updates(), profiler.pop_events()
+
+
+## Return the names of all subdirectories of a directory
+# @param directory Path of the directory
+# @return Sorted list of subdirectory names, empty if
+# @parname{directory} does not exist
+def get_subdirs(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(o for o in os.listdir(directory)
+                  if os.path.isdir(os.path.join(directory, o)))
+
+
+## @cond Prevents doxygen from scanning the following
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='(Re)create all Tikz plots of the project')
+    # Source directory with .s*p files
+    parser.add_argument(
+        'sourcedir', nargs='?',
+        default=os.path.join(os.path.dirname(__file__),
+                             '..', 'touchstoneinput'))
+    # Result directory for tikz files
+    parser.add_argument(
+        'resultdir', nargs='?',
+        default=os.path.join(os.path.dirname(__file__),
+                             '..', 'LatexTest', 'tikz'))
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='number of worker processes, default one per CPU')
+    parser.add_argument(
+        '--profile', action='store_true', default=profiler.enabled,
+        help='record wall time, CPU time and memory of all stages '
+        'to tikzprofile.json in the result directory, '
+        'also enabled by the environment variable TIKZPROFILE=1')
+    parser.add_argument(
+        '--manifest', default=None,
+        help='create the plots of a JSON plot manifest, '
+        'for example configscripts/plotmanifest.json, '
+        'instead of the plots of the source folders')
+    parser.add_argument(
+        '--date', default=None,
+        help='date written to the headers of the Tikz files in the format '
+        'YYYY-MM-DD, so unchanged plots are byte identical between builds, '
+        'default the environment variable SOURCE_DATE_EPOCH or today')
+    args = parser.parse_args()
+    sourcedir = args.sourcedir
+    resultdir = args.resultdir
+    if not os.path.isdir(resultdir):
+        parser.error('Path not existent. Please create the Folders and run again!\nPath: ' + resultdir)
+
+    if args.date is not None:
+        try:
+            epoch = calendar.timegm(time.strptime(args.date, '%Y-%m-%d'))
+        except ValueError:
+            parser.error('Invalid date ' + args.date + '! Must be YYYY-MM-DD')
+        # passed to the worker processes by their environment
+        os.environ['SOURCE_DATE_EPOCH'] = str(epoch)
+
+    # Keep parsed Touchstone files in a binary cache for the next run,
+    # shared by all worker processes
+    enable_profiling(args.profile)
+    scheduler = ClassJobScheduler(
+        args.jobs, init_worker,
+        (os.path.join(sourcedir, '.networkcache'), args.profile))
+
+    # Import file and sort key of the Tex code returned by every job
+    imports = []
+
+    if args.manifest:
+        # Create the plots of the manifest, one job per group of plots
+        # sharing Touchstone files, the jobs return their import files
+        for plots in compile_job_graph(load_plot_manifest(args.manifest),
+                                       sourcedir):
+            scheduler.add(plots[0]['output'], run_config, plots2tikz,
+                          plots, resultdir)
+            imports.append(None)
+    else:
+        # Create Tikz plots containing full S-Matrix
+        for touchstone in get_sorted_glob(
+                os.path.join(sourcedir, 'fullpic', '*.s*p')):
+            scheduler.add(touchstone, run_config,
+                          fulltouchstone2tikz_file, touchstone, resultdir)
+            imports.append(('completepictures.tex',
+                            os.path.basename(touchstone)))
+
+        # Create Tikz plots based on one Touchstone file
+        for touchstone in get_sorted_glob(
+                os.path.join(sourcedir, 'singlepic', '*.s*p')):
+            scheduler.add(touchstone, run_config,
+                          touchstone2tikz_file, touchstone, resultdir)
+            imports.append(('importallpictures.tex',
+                            os.path.basename(touchstone)))
+
+        # Create Tikz plots containing comparisions of multiple
+        # Touchstone files
+        for d in get_subdirs(os.path.join(sourcedir, 'singlecomppic')):
+            scheduler.add(d, run_config, comparisons2tikz,
+                          os.path.join(sourcedir, 'singlecomppic', d),
+                          resultdir, d)
+            imports.append(('importcomppictures.tex', d))
+
+        # Create Tikz plots containing comparisions of multiple
+        # Touchstone files and multiple S-Paramesters
+        for d in get_subdirs(os.path.join(sourcedir, 'multcomppic')):
+            scheduler.add(d, run_config, multcomparisons2tikz,
+                          os.path.join(sourcedir, 'multcomppic', d),
+                          resultdir, d)
+            imports.append(('importmultcomppictures.tex', d))
+
+    results = scheduler.run()
+
+    # Collect the fingerprints of the created Tikz files
+    # and the Tex code of all workers
+    teximports = {}
+    if not args.manifest:
+        teximports = dict((importfile, []) for importfile in [
+            'completepictures.tex', 'importallpictures.tex',
+            'importcomppictures.tex', 'importmultcomppictures.tex'])
+    for jobimport, result in zip(imports, results):
+        if result is not None:
+            teximport, updates, events = result
+            merge_manifest_updates(updates)
+            profiler.add_events(events)
+            if jobimport is None:
+                for importfile, sortkey, text in teximport:
+                    teximports.setdefault(importfile, []).append(
+                        (sortkey, text))
+            else:
+                importfile, sortkey = jobimport
+                teximports[importfile].append((sortkey, teximport))
+    get_build_manifest(resultdir).save()
+
+    # Write every import file once in a stable order
+    for importfile, entries in teximports.items():
+        writeImportFile(os.path.join(resultdir, importfile), entries)
+
+    if args.profile:
+        profiler.write_trace(os.path.join(resultdir, 'tikzprofile.json'))
+        profiler.print_summary()
+
+    if scheduler.failures:
+        scheduler.print_failures()
+        print(str(len(scheduler.failures)) + ' of ' + str(len(results)) +
+              ' jobs failed')
+        sys.exit(1)
+
+    print("All done")
+## @endcond Prevents doxygen from scanning the code above